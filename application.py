@@ -1,15 +1,78 @@
 """The flask api to run the BOLT Swarm."""
-from typing import Any, Dict, List, Union
+import collections
+import os
+from itertools import count
+from threading import Lock, RLock, Thread
+from time import monotonic, perf_counter, sleep, time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, abort, g, jsonify, request
 
+import routing
 from bolt import Bolt, Swarm
-from maze_maker import Location, Maze, manhattan_distance
-from maze_search import astar
-
-app: Flask = Flask(__name__, template_folder="user-interface")
+from demand import DemandHeatmap, assign_sites, median_sites
+from flow_field import UNREACHABLE, FlowField, FlowFieldCache
+from landmarks import Landmarks
+from layout import Layout, line_cells, load_grid, rect_cells
+from maze_maker import Location, Maze, escape_path, manhattan_distance
+from maze_search import AnytimeAStar, astar
+from metrics import REGISTRY, SIZE_BUCKETS, Counter, Gauge, Histogram
+from planner_pool import PlannerPool
+from profiler import RequestProfiler, stats_text
+from reservations import ReservationTable
+from single_flight import SingleFlight
+from route_store import RouteStore
+from static_assets import AssetBundle
+from traffic import TrafficRecorder
+
+# The static files are served from memory by serve_static
+app: Flask = Flask(__name__, template_folder="user-interface", static_folder=None)
+# Percentage of all requests that is profiled, next to the ones asking for it
+app.config["PROFILE_SAMPLE_PERCENTAGE"] = 0.0
+# Seconds a bolt can take to acknowledge a batch of waypoints
+app.config["COMMAND_LEASE_SECONDS"] = 30
+# The search find_path uses when no engine is given, astar, bidirectional or
+# travel_time, which minimises the cell costs plus TURN_PENALTY per turn
+app.config["ROUTING_ENGINE"] = "astar"
+app.config["TURN_PENALTY"] = 2.0
+# The A* heuristic on the factory layout, manhattan or landmarks
+app.config["ROUTING_HEURISTIC"] = "manhattan"
+app.config["LANDMARK_COUNT"] = 8
+# Fleet-wide planning runs on PLANNER_WORKERS processes, None for every core,
+# batches smaller than PLANNER_MIN_BATCH are planned on the request thread
+app.config["PLANNER_WORKERS"] = None
+app.config["PLANNER_MIN_BATCH"] = 16
+app.config["PLANNER_DEADLINE_SECONDS"] = 10.0
+# Destinations shared by FLOW_FIELD_MIN_ROUTES routes of a batch get a flow
+# field, the fields of the last FLOW_FIELD_CACHE_SIZE destinations are kept
+app.config["FLOW_FIELD_MIN_ROUTES"] = 2
+app.config["FLOW_FIELD_CACHE_SIZE"] = 16
+# Milliseconds /goto and /api/nest may search before they answer with the best
+# path so far, which is refined in the background, None for an exact A*. A
+# request can set its own budget with ?budget_ms=<ms>
+app.config["PLANNING_BUDGET_MS"] = None
+# /command only hands out waypoints over cells no other bolt holds, a bolt
+# that waited RESERVATION_REROUTE_AFTER times is routed around the others
+app.config["RESERVATIONS_ENABLED"] = False
+app.config["RESERVATION_REROUTE_AFTER"] = 3
+# The amount of maze edits /api/maze?since=<version> can replay
+app.config["LAYOUT_LOG_SIZE"] = 1024
+# The targets of /goto and /api/nest count half after DEMAND_HALF_LIFE_SECONDS,
+# idle bolts are sent towards them every PREPOSITION_INTERVAL_SECONDS, 0 only
+# does so on /api/preposition
+app.config["DEMAND_HALF_LIFE_SECONDS"] = 600.0
+app.config["DEMAND_CELLS"] = 64
+app.config["PREPOSITION_INTERVAL_SECONDS"] = 0
+# Identical /goto and /api/nest requests in flight at the same time, for the
+# same layout version, share one path and bolt assignment
+app.config["COALESCE_REQUESTS"] = True
+# Bolts without a /command or /ack for BOLT_LEASE_SECONDS are evicted and
+# their ids reused, None keeps every bolt registered
+app.config["BOLT_LEASE_SECONDS"] = 300
+# Append every api request to this JSON lines file, to replay it with traffic.py
+app.config["TRAFFIC_LOG"] = None
 swarm: Swarm = Swarm()
-paths: Dict[int, Dict[str, Union[int, List[Location]]]] = {}
+paths: RouteStore = RouteStore()
 factory_layout = [
     [0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
     [1, 1, 1, 1, 0, 1, 1, 0, 1, 1],
@@ -22,27 +85,259 @@ factory_layout = [
     [0, 1, 0, 1, 1, 1, 1, 1, 1, 1],
     [0, 0, 0, 0, 1, 1, 1, 1, 1, 1],
 ]
+# Every hall runs as its own site process with its own layout, see site_router.py
+if os.environ.get("ROLLENBOLLEN_LAYOUT"):
+    factory_layout = load_grid(os.environ["ROLLENBOLLEN_LAYOUT"])
+SITE = os.environ.get("ROLLENBOLLEN_SITE", "")
+maze_layout = Layout(factory_layout, log_size=app.config["LAYOUT_LOG_SIZE"])
+landmarks = Landmarks(maze_layout, count=app.config["LANDMARK_COUNT"])
+flow_fields = FlowFieldCache(maze_layout, size=app.config["FLOW_FIELD_CACHE_SIZE"])
+planner = PlannerPool(maze_layout, workers=app.config["PLANNER_WORKERS"])
+lease_ids = count(1)
+# The home base is shared, all bolts start there
+reservations = ReservationTable(exempt=[Location(x=0, y=0)])
+# The amount of bolts in a row that are sent aside to make room for one
+MAX_PUSH_DEPTH = 3
+# Per bolt that gave way the bolt it lets pass, the cell it went aside to and
+# the cells of its path the other bolt still has to pass
+giving_way: Dict[int, Tuple[int, Location, Set[Location]]] = {}
+# The React build and its chunks, then the files of the old user interface
+assets = AssetBundle({"": "./client/build", "static/": "./static"})
+profiler = RequestProfiler(size=50)
+demand = DemandHeatmap(
+    half_life=app.config["DEMAND_HALF_LIFE_SECONDS"], size=app.config["DEMAND_CELLS"]
+)
+preposition_lock = Lock()
+# Serialises the changes of the paths, their leases and the reservations of
+# the request handlers, the background refinement and the pre-positioning
+route_lock = RLock()
+flights = SingleFlight()
+recorder: Optional[TrafficRecorder] = None
+prepositioner: Optional[Thread] = None
+
+# region: Instrumentation
+request_latency = REGISTRY.register(
+    Histogram(
+        "rollenbollen_request_latency_seconds",
+        "Latency of the requests per flask route.",
+        labels=("route", "method"),
+    )
+)
+search_expanded = REGISTRY.register(
+    Histogram(
+        "rollenbollen_astar_nodes_expanded",
+        "Nodes expanded by A* per search.",
+        labels=("caller",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+search_frontier_peak = REGISTRY.register(
+    Histogram(
+        "rollenbollen_astar_frontier_peak",
+        "Peak size of the A* frontier per search.",
+        labels=("caller",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+path_length = REGISTRY.register(
+    Histogram(
+        "rollenbollen_path_length",
+        "Length of the paths before and after optimize_path.",
+        labels=("stage",),
+        buckets=SIZE_BUCKETS,
+    )
+)
+paths_refined = REGISTRY.register(
+    Counter(
+        "rollenbollen_paths_refined_total",
+        "Paths replaced by a shorter one from the background refinement.",
+    )
+)
+reservation_waits = REGISTRY.register(
+    Counter(
+        "rollenbollen_reservation_waits_total",
+        "Commands that kept a bolt waiting for a cell held by another bolt.",
+    )
+)
+requests_coalesced = REGISTRY.register(
+    Counter(
+        "rollenbollen_requests_coalesced_total",
+        "Requests answered with the result of an identical request in flight.",
+    )
+)
+bolts_evicted = REGISTRY.register(
+    Counter(
+        "rollenbollen_bolts_evicted_total",
+        "Bolts evicted because their lease expired.",
+    )
+)
+reservation_reroutes = REGISTRY.register(
+    Counter(
+        "rollenbollen_reservation_reroutes_total",
+        "Paths routed around the cells held by other bolts.",
+    )
+)
+reservation_yields = REGISTRY.register(
+    Counter(
+        "rollenbollen_reservation_yields_total",
+        "Bolts sent aside to let a blocked bolt pass.",
+    )
+)
+REGISTRY.register(
+    Gauge("rollenbollen_swarm_size", "Registered bolts.", lambda: len(swarm.bolts))
+)
+REGISTRY.register(
+    Gauge(
+        "rollenbollen_swarm_busy",
+        "Bolts that still have a task at hand.",
+        lambda: sum(bolt.is_busy() for bolt in swarm.bolts),
+    )
+)
+REGISTRY.register(
+    Gauge("rollenbollen_paths_pending", "Bolts with a path in progress.", lambda: len(paths))
+)
+REGISTRY.register(
+    Gauge(
+        "rollenbollen_waypoints_pending",
+        "Waypoints not yet sent to the bolts.",
+        paths.pending_waypoints,
+    )
+)
+# Tells the metrics of the site processes apart
+REGISTRY.register(
+    Gauge(
+        "rollenbollen_site_info",
+        "The hall this process serves.",
+        lambda: {(SITE,): 1},
+        labels=["site"],
+    )
+)
+
+
+@app.before_request
+def start_request_timer():
+    """Remember when the request started."""
+    g.request_start = perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+    """Add the duration of the request to the latency histogram."""
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    request_latency.observe(perf_counter() - g.request_start, route, request.method)
+    g.response_status = response.status_code
+    return response
+
+
+@app.before_request
+def evict_expired_bolts():
+    """Evict the bolts whose lease expired, with their paths and reservations."""
+    seconds = app.config["BOLT_LEASE_SECONDS"]
+    if seconds is None:
+        return
+    for code in swarm.evict_expired(seconds):
+        if code in paths:
+            del paths[code]
+        reservations.release(code)
+        giving_way.pop(code, None)
+        bolts_evicted.inc()
+
+
+@app.before_request
+def start_prepositioning():
+    """Start the pre-positioning loop once PREPOSITION_INTERVAL_SECONDS is set."""
+    global prepositioner
+    if app.config["PREPOSITION_INTERVAL_SECONDS"] > 0 and not (
+        prepositioner and prepositioner.is_alive()
+    ):
+        prepositioner = Thread(target=preposition_loop, daemon=True)
+        prepositioner.start()
+
+
+@app.after_request
+def record_traffic(response):
+    """Append the api request to the TRAFFIC_LOG, when it is set."""
+    global recorder
+    log = app.config["TRAFFIC_LOG"]
+    if not log or not request.path.startswith("/api"):
+        return response
+    if recorder is None or recorder.path != log:
+        if recorder is not None:
+            recorder.close()
+        recorder = TrafficRecorder(log)
+    recorder.record(
+        request.method,
+        request.full_path.rstrip("?"),
+        request.get_json(silent=True),
+        response.status_code,
+        perf_counter() - g.request_start,
+        maze_layout.version,
+    )
+    return response
+
+
+@app.before_request
+def start_request_profile():
+    """Profile the request when asked with X-Profile or ?profile=1, or sampled."""
+    if request.path.startswith("/api/admin/"):
+        return
+    forced = request.headers.get("X-Profile") == "1" or request.args.get("profile") == "1"
+    g.profile = profiler.start(forced, app.config["PROFILE_SAMPLE_PERCENTAGE"])
+    if g.profile is not None:
+        g.profile_snapshot = snapshot_state()
+
+
+@app.teardown_request
+def finish_request_profile(_):
+    """Store the profile of the request, also when the request failed."""
+    profile = g.pop("profile", None)
+    if profile is not None:
+        info = {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "status": g.get("response_status", 500),
+        }
+        profiler.finish(profile, info, g.pop("profile_snapshot"))
+
+
+def snapshot_state():
+    """Copy the layout and positions of the bolts, to reproduce a request."""
+    return {
+        "layout_version": maze_layout.version,
+        "maze": [row[:] for row in factory_layout],
+        "bolts": [
+            {"id": bolt.id, "position": dict(bolt.position), "next_move": dict(bolt.next_move)}
+            for bolt in swarm.bolts
+        ],
+    }
+
+
+# endregion
 
 
 # region: Pages
 @app.route("/", methods=["GET", "POST"])
 def page_home():
     """Return the home page of the website."""
+    # The old user interface is ./user-interface/index.html
+    return serve_asset("index.html")
 
-    index_page = "./client/build/index.html"
-    app.static_folder = "./client/build/static"
-    # index_page = "./user-interface/index.html"
-    with open(index_page, encoding="UTF8") as f:
-        return "\n".join(f.readlines())
+
+@app.route("/static/<path:filename>")
+def serve_static(filename: str):
+    """Return a file of the build, or of ./static, from memory."""
+    return serve_asset(f"static/{filename}")
 
 
 @app.route("/api/reset", methods=["GET"])
 def reset_webserver():
     """Reset the server."""
-    global swarm
-    swarm = Swarm()
-    global paths
-    paths = {}
+    # Reset in place, the helpers below are bound to these objects
+    swarm.reset()
+    paths.clear()
+    reservations.clear()
+    giving_way.clear()
+    demand.clear()
     return "Success!"
 
 
@@ -155,35 +450,91 @@ def api_bolt_goto(code: int):
         x = request.args.get("x")
         y = request.args.get("y")
         if digit(x) and digit(y):
-            route = get_path(code, int(x), int(y))
-            opt_route = optimize_path(route)
-            set_path(code, route)
-            return cors_resp({"path": route, "optimized_path": opt_route})
+            x, y = int(x), int(y)
+            budget = planning_budget()
+            key = ("goto", code, x, y, budget, maze_layout.version)
+            return coalesced(key, lambda: goto_bolt(code, x, y, budget))
     return cors_resp(swarm.get_bolt(code))
 
 
 @app.route("/api/bolt/<int:code>/command", methods=["GET"])
 def api_bolt_command(code: int):
-    """Send a command to the bolt."""
-    if code in paths and len(paths[code]["path"]) > 0:
-        loc: Location = paths[code]["path"][paths[code]["counter"]]
-        paths[code]["counter"] += 1
-        if paths[code]["counter"] == len(paths[code]["path"]):
-            del paths[code]
-        swarm.get_bolt_by_id(code).set_position(x=loc.x, y=loc.y)
-        return cors_resp({"x": loc.x, "y": loc.y})
-    pos = swarm.get_bolt_by_id(code).next_move
-    swarm.get_bolt_by_id(code).set_position(x=pos["x"], y=pos["y"])
-    return cors_resp(pos)
+    """Send a command to the bolt.
+
+    With ?n=<amount> or ?n=all the next waypoints are leased to the bolt at
+    once, the bolt reports its progress in bulk via /ack. A bolt that has to
+    wait for another bolt gets its current position with wait set. Every
+    command renews the lease of the bolt, an evicted bolt gets a 404 and has
+    to register again.
+    """
+    if not swarm.renew(code):
+        abort(404)
+    amount = request.args.get("n")
+    if amount is not None:
+        if amount != "all" and not (digit(amount) and int(amount) > 0):
+            abort(400)
+        with route_lock:
+            return cors_resp(lease_waypoints(code, amount))
+    with route_lock:
+        route = paths.get(code)
+        if route is not None:
+            if not reserve_waypoints(code, 1):
+                loc = paths.get(code).position()
+                return cors_resp({"x": loc.x, "y": loc.y, "wait": True})
+            route = paths.get(code)
+            loc: Location = route.next_waypoint()
+            paths.advance(code)
+            swarm.get_bolt_by_id(code).set_position(x=loc.x, y=loc.y)
+            if code not in paths:
+                hold_position(code, loc)
+            return cors_resp({"x": loc.x, "y": loc.y})
+        pos = swarm.get_bolt_by_id(code).next_move
+        swarm.get_bolt_by_id(code).set_position(x=pos["x"], y=pos["y"])
+        hold_position(code, Location(x=pos["x"], y=pos["y"]))
+        return cors_resp(pos)
+
+
+@app.route("/api/bolt/<int:code>/ack", methods=["GET"])
+def api_bolt_ack(code: int):
+    """Acknowledge the progress of a bolt on its leased waypoints.
+
+    Parameters
+    ----------
+    code : int
+        the id of the bolt
+
+    Returns
+    -------
+    Dict[str, int]
+        The counter and the amount of remaining waypoints of the path
+    """
+    if not swarm.renew(code):
+        abort(404)
+    lease_id = request.args.get("lease")
+    done = request.args.get("done")
+    if not (digit(lease_id) and digit(done)):
+        abort(400)
+    with route_lock:
+        route = paths.get(code)
+        lease = route.lease if route else None
+        if lease is None or lease["id"] != int(lease_id):
+            return cors_resp({"error": "Unknown or replaced lease"}), 409
+        counter = lease["counter"] + min(int(done), lease["end"] - lease["counter"])
+        if counter > route.counter:
+            paths.advance(code, counter - route.counter)
+            swarm.get_bolt_by_id(code).set_position(x=route.x, y=route.y)
+            if code not in paths:
+                hold_position(code, Location(x=route.x, y=route.y))
+        remaining = len(route) - route.counter
+        return cors_resp({"counter": route.counter, "remaining": remaining})
 
 
 @app.route("/api/bolt/<int:code>/path", methods=["GET"])
 def api_bolt_path(code: int):
     """Get the path from a given bolt."""
-    if code in paths and len(paths[code]["path"]) > 0:
-        x = paths[code]["path"][-1].x
-        y = paths[code]["path"][-1].y
-        route = get_path(code=code, x=x, y=y)
+    if code in paths:
+        finish = paths.get(code).destination()
+        route = get_path(code=code, x=finish.x, y=finish.y)
         opt_route = optimize_path(route)
         return cors_resp({"path": route, "optimal_route": opt_route})
     return cors_resp(swarm.get_bolt_by_id(code).next_move)
@@ -192,10 +543,46 @@ def api_bolt_path(code: int):
 @app.route("/api/home")
 def api_go_home():
     """Send all bolts to 0, 0 AKA Homebase."""
-    for bolt in swarm.bolts:
-        route = get_path(bolt.id, 0, 0)
-        set_path(bolt.id, route)
-    return cors_resp(swarm.get_bolts())
+    home = Location(x=0, y=0)
+    jobs = [(bolt.id, bolt_location(bolt), home) for bolt in swarm.bolts]
+    routes, missed = plan_routes(jobs)
+    apply_routes(routes)
+    response = cors_resp(swarm.get_bolts())
+    if missed:
+        response.headers["X-Planner-Missed"] = ",".join(map(str, missed))
+    return response
+
+
+@app.route("/api/goto", methods=["POST"])
+def api_batch_goto():
+    """Send many bolts to a location at once.
+
+    The body is {"moves": [{"bolt": <id>, "x": <x>, "y": <y>}, ...]}.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The optimized path per bolt, the bolts without a path and the bolts
+        that were not planned before the deadline
+    """
+    body = request.get_json(silent=True) or {}
+    moves = body.get("moves")
+    if not isinstance(moves, list):
+        abort(400)
+    rows, columns = len(factory_layout), len(factory_layout[0])
+    targets = []
+    for move in moves:
+        if not isinstance(move, dict):
+            abort(400)
+        values = [move.get(key) for key in ("bolt", "x", "y")]
+        if not all(isinstance(value, int) for value in values):
+            abort(400)
+        code, x, y = values
+        if swarm.get_bolt_by_id(code) is None or not (0 <= x < rows and 0 <= y < columns):
+            abort(400)
+        targets.append((code, Location(x=x, y=y)))
+    key = ("batch", tuple(targets), maze_layout.version)
+    return coalesced(key, lambda: goto_bolts(targets))
 
 
 # endregion
@@ -207,24 +594,116 @@ def api_nest_command(code: str, swarm: Swarm = swarm):
         code = "0" + code
     x = int(code[0])
     y = int(code[1])
-    bolt_code = get_bolt(x, y)
-    route = get_path(bolt_code, x, y)
-    opt_route = optimize_path(route)
-    set_path(bolt_code, route)
-    return cors_resp({"bolt": bolt_code, "path": route, "optimal_route": opt_route})
+    budget = planning_budget()
+    key = ("nest", x, y, budget, maze_layout.version)
+    return coalesced(key, lambda: nest_bolt(x, y, budget))
+
+
+@app.route("/api/preposition")
+def api_preposition():
+    """Send the idle bolts to where the most requests are expected.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The sites for the idle bolts and the bolts sent towards them
+    """
+    sites, routes = preposition_idle_bolts()
+    return cors_resp(
+        {
+            "sites": [{"x": site.x, "y": site.y} for site in sites],
+            "moves": [
+                {"bolt": code, "x": route[-1].x, "y": route[-1].y}
+                for code, route in routes.items()
+                if route is not None
+            ],
+        }
+    )
 
 
 # endregion
 # region: Maze
 @app.route("/api/maze")
 def api_get_maze():
-    """Give the current maze, with options to edit the options."""
+    """Give the current maze, with options to edit the options.
+
+    With ?since=<version> only the cells edited after that version are given,
+    or a zlib compressed snapshot when the change log does not go back that
+    far. The version is in the X-Layout-Version header.
+    """
     x = request.args.get("x")
     y = request.args.get("y")
     value = request.args.get("v")
     if digit(x) and digit(y) and digit(value):
-        factory_layout[int(y)][int(x)] = int(value)
-    return cors_resp({"maze": factory_layout})
+        if maze_layout.set_cell(int(y), int(x), int(value)):
+            layout_changed([(int(y), int(x), int(value))])
+    since = request.args.get("since")
+    if since is None:
+        response = cors_resp({"maze": factory_layout})
+    elif not digit(since):
+        abort(400)
+    else:
+        response = cors_resp(maze_delta(int(since)))
+    response.headers["X-Layout-Version"] = str(maze_layout.version)
+    return response
+
+
+@app.route("/api/maze/edit", methods=["POST"])
+def api_edit_maze():
+    """Edit many cells of the maze at once, as one new layout version.
+
+    The body is {"edits": [...]}, every edit has a value "v" and either
+    "cells": [[x, y], ...], "rect": [x1, y1, x2, y2] or "line": [[x, y], ...],
+    with x as the column and y as the row like /api/maze. The edits are
+    applied in order and nothing changes when one of them is invalid.
+
+    Returns
+    -------
+    Dict[str, int]
+        The new layout version and the amount of changed cells
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        cells = list(expand_edits(body.get("edits")))
+    except (TypeError, ValueError):
+        abort(400)
+    changed = maze_layout.set_cells(cells)
+    if changed:
+        layout_changed(changed)
+    response = cors_resp({"version": maze_layout.version, "changed": len(changed)})
+    response.headers["X-Layout-Version"] = str(maze_layout.version)
+    return response
+
+
+# endregion
+# region: Metrics
+@app.route("/api/metrics")
+def api_metrics():
+    """Expose the metrics in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+# endregion
+# region: Admin
+@app.route("/api/admin/profiles")
+def api_admin_profiles():
+    """List the stored request profiles."""
+    return cors_resp(profiler.summaries())
+
+
+@app.route("/api/admin/profiles/<int:code>")
+def api_admin_profile(code: int):
+    """Download a stored profile, as pstats file or as text with ?format=text."""
+    record = profiler.get(code)
+    if record is None:
+        abort(404)
+    if request.args.get("format") == "text":
+        return Response(stats_text(record), mimetype="text/plain")
+    return Response(
+        record["stats"],
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename=request-{code}.prof"},
+    )
 
 
 # endregion
@@ -248,6 +727,399 @@ def digit(string_value: str):
     return string_value and string_value.isdigit()
 
 
+def coalesced(key: Tuple[Any, ...], compute):
+    """Respond with the result of <compute>, shared by identical requests in flight.
+
+    The X-Coalesced header is set on the responses that waited on another
+    request with the same <key>.
+    """
+    if not app.config["COALESCE_REQUESTS"]:
+        return cors_resp(compute())
+    result, shared = flights.do(key, compute)
+    response = cors_resp(result)
+    if shared:
+        requests_coalesced.inc()
+        response.headers["X-Coalesced"] = "1"
+    return response
+
+
+def goto_bolt(code: int, x: int, y: int, budget: Optional[int]):
+    """Send Bolt[<code>] to <x>, <y>, within <budget> ms if given.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The path, the optimized path and the bound of an anytime search
+    """
+    demand.record(Location(x=x, y=y))
+    if budget is None:
+        route = get_path(code, x, y)
+        search = None
+    else:
+        route, search = get_path_within(code, x, y, budget)
+    opt_route = optimize_path(route)
+    set_path(code, route)
+    result = {"path": route, "optimized_path": opt_route}
+    if search is not None:
+        result["bound"] = search.bound
+        refine_in_background(code, route, search)
+    return result
+
+
+def goto_bolts(moves: List[Tuple[int, Location]]):
+    """Send every bolt of <moves> to its location at once.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The optimized path per bolt, the bolts without a path and the bolts
+        that were not planned before the deadline
+    """
+    jobs = []
+    for code, finish in moves:
+        demand.record(finish)
+        jobs.append((code, bolt_location(swarm.get_bolt_by_id(code)), finish))
+    routes, missed = plan_routes(jobs)
+    apply_routes(routes)
+    return {
+        "paths": [
+            {"bolt": code, "optimal_route": optimize_path(route)}
+            for code, route in routes.items()
+            if route is not None
+        ],
+        "unreachable": [code for code, route in routes.items() if route is None],
+        "missed": missed,
+    }
+
+
+def nest_bolt(x: int, y: int, budget: Optional[int]):
+    """Send the nearest idle bolt to <x>, <y>, within <budget> ms if given.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The bolt, its path, the optimal route and the bound of an anytime search
+    """
+    demand.record(Location(x=x, y=y))
+    bolt_code = get_bolt(x, y)
+    if swarm.get_bolt_by_id(bolt_code) is None:
+        # There is no idle bolt to send
+        return {"bolt": bolt_code, "path": [], "optimal_route": []}
+    if budget is None:
+        route = get_path(bolt_code, x, y)
+        search = None
+    else:
+        route, search = get_path_within(bolt_code, x, y, budget)
+    opt_route = optimize_path(route)
+    set_path(bolt_code, route)
+    result = {"bolt": bolt_code, "path": route, "optimal_route": opt_route}
+    if search is not None:
+        result["bound"] = search.bound
+        refine_in_background(bolt_code, route, search)
+    return result
+
+
+def serve_asset(name: str):
+    """Respond with the asset <name>, compressed when the client accepts it."""
+    response = assets.response(name, request.headers)
+    if response is None:
+        abort(404)
+    return response
+
+
+def expand_edits(edits: List[Dict[str, Any]]):
+    """Expand the bulk edits of /api/maze/edit into row, column, value cells.
+
+    Raises
+    ------
+    ValueError
+        When an edit or one of its points is invalid
+    """
+    if not isinstance(edits, list):
+        raise ValueError("edits has to be a list")
+    for edit in edits:
+        if not isinstance(edit, dict) or not is_int(edit.get("v")) or edit["v"] < 0:
+            raise ValueError(f"Invalid edit {edit}")
+        value = edit["v"]
+        if "cells" in edit:
+            cells = [grid_point(point) for point in edit["cells"]]
+        elif "rect" in edit:
+            rect = edit["rect"]
+            if not isinstance(rect, list) or len(rect) != 4:
+                raise ValueError("rect has to be [x1, y1, x2, y2]")
+            row1, column1 = grid_point(rect[:2])
+            row2, column2 = grid_point(rect[2:])
+            cells = rect_cells(row1, column1, row2, column2)
+        elif "line" in edit:
+            cells = line_cells([grid_point(point) for point in edit["line"]])
+        else:
+            raise ValueError(f"Invalid edit {edit}")
+        for row, column in cells:
+            yield row, column, value
+
+
+def grid_point(point: List[int]):
+    """Turn an [x, y] point of the api into a row and column in the maze."""
+    if not (isinstance(point, list) and len(point) == 2 and all(map(is_int, point))):
+        raise ValueError(f"Invalid point {point}")
+    column, row = point
+    if not (0 <= row < len(factory_layout) and 0 <= column < len(factory_layout[0])):
+        raise ValueError(f"Point {point} is outside the maze")
+    return row, column
+
+
+def is_int(value: Any):
+    """Check if a JSON value is an integer."""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def layout_changed(cells: List[Tuple[int, int, int]]):
+    """Bring everything derived from the layout up to date, once per edit.
+
+    Only the bolts whose remaining route crosses one of the edited <cells>
+    get a new path, a route over cells that became free is still valid. The
+    flow fields and the planner pool follow the layout version by themselves.
+    """
+    if app.config["ROUTING_HEURISTIC"] == "landmarks":
+        landmarks.refresh()
+    replan_paths(paths.crossing(Location(x=row, y=column) for row, column, _ in cells))
+
+
+def maze_delta(version: int):
+    """The edits of the maze after <version>, or a snapshot if too far behind.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The current version and either the changes, with x as the column and
+        y as the row like the edit arguments, or the compressed snapshot
+    """
+    changes = maze_layout.changes_since(version)
+    if changes is None:
+        return {
+            "version": maze_layout.version,
+            "snapshot": maze_layout.snapshot(),
+            "encoding": "zlib+base64",
+        }
+    # Only the last edit of a cell matters
+    latest = {(row, column): value for _, row, column, value in changes}
+    return {
+        "version": maze_layout.version,
+        "changes": [
+            {"x": column, "y": row, "v": value} for (row, column), value in latest.items()
+        ],
+    }
+
+
+def lease_waypoints(code: int, amount: str):
+    """Lease the next <amount> waypoints of the path to Bolt[<code>].
+
+    The lease is handed out again until it expires or the bolt acknowledges
+    progress, so a retried command gives the same waypoints.
+
+    Parameters
+    ----------
+    code : int
+        The id of the bolt
+    amount : str
+        The amount of waypoints, or all for the remaining path
+
+    Returns
+    -------
+    Dict[str, Any]
+        The waypoints, the lease id and the counter of the first waypoint
+    """
+    route = paths.get(code)
+    if route is not None:
+        lease = route.lease
+        now = time()
+        if lease is None or lease["expires"] < now or lease["counter"] != route.counter:
+            granted = reserve_waypoints(code, None if amount == "all" else int(amount))
+            if not granted:
+                return {
+                    "waypoints": [],
+                    "lease": None,
+                    "counter": route.counter,
+                    "remaining": len(route) - route.counter,
+                    "wait": True,
+                }
+            # The path can be rerouted around the other bolts
+            route = paths.get(code)
+            end = route.counter + granted
+            lease = route.lease = {
+                "id": next(lease_ids),
+                "counter": route.counter,
+                "end": end,
+                "expires": now + app.config["COMMAND_LEASE_SECONDS"],
+            }
+        waypoints = route.waypoints(lease["end"] - lease["counter"])
+        return {
+            "waypoints": [{"x": loc.x, "y": loc.y} for loc in waypoints],
+            "lease": lease["id"],
+            "counter": lease["counter"],
+            "remaining": len(route) - lease["counter"],
+            "expires_in": max(lease["expires"] - now, 0),
+        }
+    pos = swarm.get_bolt_by_id(code).next_move
+    swarm.get_bolt_by_id(code).set_position(x=pos["x"], y=pos["y"])
+    hold_position(code, Location(x=pos["x"], y=pos["y"]))
+    return {"waypoints": [pos], "lease": None, "counter": 0, "remaining": 0}
+
+
+def hold_position(code: int, position: Location):
+    """Shrink the reservation of a bolt without a route to the cell it stands on."""
+    if app.config["RESERVATIONS_ENABLED"]:
+        reservations.hold(code, position)
+
+
+def reserve_waypoints(code: int, amount: Optional[int]):
+    """Reserve the cells towards the next <amount> waypoints of Bolt[<code>].
+
+    When the bolt waited RESERVATION_REROUTE_AFTER times for the cells of its
+    next waypoint, it gets a path around the cells the other bolts hold. When
+    there is no such path one of the two bolts gives way, see give_way.
+
+    Parameters
+    ----------
+    code : int
+        The id of the bolt, it has to have a path
+    amount : int
+        The amount of waypoints, None for all remaining waypoints
+
+    Returns
+    -------
+    int
+        The amount of granted waypoints, 0 when the bolt has to wait
+    """
+    route = paths.get(code)
+    if not app.config["RESERVATIONS_ENABLED"]:
+        return min(amount or len(route), len(route) - route.counter)
+    if code in giving_way and giving_way[code][1] not in set(route.cells()):
+        # The bolt is aside, it goes on when the other bolt passed
+        passer, _, shared = giving_way[code]
+        ahead = cells_ahead(passer)
+        patience = 2 * app.config["RESERVATION_REROUTE_AFTER"]
+        if not ahead & shared or reservations.waits.get(code, 0) >= patience:
+            del giving_way[code]
+        elif ahead.intersection(next(route.legs(1), [])):
+            reservations.grant(code, route.position(), [])
+            reservation_waits.inc()
+            return 0
+    granted = reservations.grant(code, route.position(), route.legs(amount))
+    if granted:
+        return granted
+    reservation_waits.inc()
+    if reservations.waits.get(code, 0) < app.config["RESERVATION_REROUTE_AFTER"]:
+        return 0
+    start, finish = route.position(), route.destination()
+    grid = [row[:] for row in factory_layout]
+    for loc in reservations.held_by_others(code) - {finish}:
+        grid[loc.x][loc.y] = 1
+    try:
+        detour = find_path(start.x, start.y, finish.x, finish.y, layout=grid, engine="astar")
+    except ValueError:
+        detour = None
+    if detour is not None:
+        set_path(code, detour)
+        reservation_reroutes.inc()
+        route = paths.get(code)
+        granted = reservations.grant(code, route.position(), route.legs(amount))
+        if granted:
+            return granted
+    give_way(code)
+    return 0
+
+
+def give_way(code: int):
+    """Send aside the bolt that blocks Bolt[<code>], or Bolt[<code>] itself.
+
+    A bolt without a path always gives way. Of two waiting bolts the one with
+    the higher id gives way, so bolts that wait for each other, like head-on
+    in a corridor, always get out. A bolt that is still driving is waited
+    for. The bolt that gives way drives to the nearest cell off the rest of
+    the other path, and from there on to its own finish once the other bolt
+    passed.
+
+    Returns
+    -------
+    int
+        The id of the bolt that was sent aside, None if none was
+    """
+    route = paths.get(code)
+    blocker = reservations.conflict(code, next(route.legs(1), []))
+    if blocker is None or swarm.get_bolt_by_id(blocker) is None:
+        return None
+    if blocker not in paths or (reservations.waits.get(blocker) and blocker > code):
+        turns = [(blocker, code), (code, blocker)]
+    elif reservations.waits.get(blocker):
+        turns = [(code, blocker), (blocker, code)]
+    else:
+        return None
+    # The other bolt gives way when the first one is boxed in
+    for mover, passer in turns:
+        if move_aside(mover, passer):
+            reservation_yields.inc()
+            return mover
+    return None
+
+
+def move_aside(mover: int, passer: int, avoid: Optional[Set[Location]] = None, depth: int = 0):
+    """Send Bolt[<mover>] off the rest of the path of Bolt[<passer>].
+
+    When other bolts box the mover in, they are sent aside first, off the
+    cells the mover drives over, up to MAX_PUSH_DEPTH bolts deep.
+
+    Parameters
+    ----------
+    avoid : Set[Location]
+        The cells to get off, the rest of the path of the passer by default
+
+    Returns
+    -------
+    bool
+        If there is a free cell to go aside to
+    """
+    mover_route = paths.get(mover)
+    if mover_route is not None:
+        start = mover_route.position()
+    else:
+        start = bolt_location(swarm.get_bolt_by_id(mover))
+    if avoid is None:
+        avoid = cells_ahead(passer)
+    with reservations.lock:
+        held = {loc: holder for loc, holder in reservations.holders.items() if holder != mover}
+    grid = [row[:] for row in factory_layout]
+    for loc in held:
+        grid[loc.x][loc.y] = 1
+    aside = escape_path(grid, start, avoid)
+    if aside is None and depth < MAX_PUSH_DEPTH:
+        aside = escape_path(factory_layout, start, avoid)
+        if aside is None:
+            return False
+        for blocker in dict.fromkeys(held[loc] for loc in aside if loc in held):
+            if not move_aside(blocker, mover, avoid | set(aside), depth + 1):
+                return False
+    if aside is None or len(aside) < 2:
+        return False
+    pocket, rest = aside[-1], []
+    if mover_route is not None and mover_route.destination() != pocket:
+        finish = mover_route.destination()
+        try:
+            rest = find_path(pocket.x, pocket.y, finish.x, finish.y)[1:]
+        except ValueError:
+            rest = []
+    set_path(mover, aside + rest)
+    if rest:
+        giving_way[mover] = (passer, pocket, avoid.intersection(rest))
+    return True
+
+
+def cells_ahead(code: int) -> Set[Location]:
+    """The cell Bolt[<code>] stands on and the cells of the rest of its path."""
+    route = paths.get(code)
+    return {route.position(), *route.cells()} if route is not None else set()
+
+
 def get_path(code: int, x: int, y: int, layout=factory_layout):
     """Get a path via A* for the given BOLT and coordinates.
 
@@ -269,14 +1141,107 @@ def get_path(code: int, x: int, y: int, layout=factory_layout):
     return find_path(pos["x"], pos["y"], x, y, layout=layout)
 
 
-def find_path(x1, y1, x2, y2, layout=factory_layout):
-    start = Location(x=x1, y=y1)
-    finish = Location(x=x2, y=y2)
+def planning_budget():
+    """The search budget in ms from ?budget_ms or the PLANNING_BUDGET_MS config."""
+    budget = request.args.get("budget_ms")
+    if budget is None:
+        return app.config["PLANNING_BUDGET_MS"]
+    if not digit(budget):
+        abort(400)
+    return int(budget)
+
+
+def get_path_within(code: int, x: int, y: int, budget_ms: int, layout=factory_layout):
+    """Get a path for the given BOLT with the anytime planner.
+
+    The planner runs for <budget_ms>, or until it found a first path.
+
+    Returns
+    -------
+    Tuple[List[Location], AnytimeAStar]
+        The best path so far, including the start and the finish, and the
+        search to refine it with
+    """
+    start = bolt_location(swarm.get_bolt_by_id(code))
+    finish = Location(x=x, y=y)
     m = Maze(factory=layout, start=start, finish=finish)
-    distance = manhattan_distance(m.finish)
-    final_astar, _ = astar(m.start, m.finish_line, m.frontier, distance)
-    final_astar.append(m.finish)
-    return [start] + final_astar
+    search = AnytimeAStar(m.start, m.finish_line, m.frontier, routing_heuristic(finish, layout))
+    path, _ = search.run(monotonic() + budget_ms / 1000)
+    search_expanded.observe(search.expanded, "anytime")
+    if path is None:
+        raise ValueError(f"No path from {start} to {finish}")
+    return [start] + path + [finish], search
+
+
+def refine_in_background(code: int, route: List[Location], search: AnytimeAStar):
+    """Keep improving <route> of Bolt[<code>] after the request, if not optimal yet."""
+    if search.finished:
+        return None
+    thread = Thread(
+        target=refine_path, args=(code, route, search, maze_layout.version), daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def refine_path(code: int, route: List[Location], search: AnytimeAStar, version: int):
+    """Run <search> to the shortest path and use it if it is still worth it.
+
+    The shorter path replaces the rest of the route when the layout did not
+    change, the bolt still drives to the same finish, it has no leased
+    waypoints left to acknowledge and its last reached waypoint lies on the
+    new path.
+    """
+    path, _ = search.run()
+    if path is None or len(path) + 2 >= len(route) or maze_layout.version != version:
+        return False
+    with route_lock:
+        current = paths.get(code)
+        if current is None or current.destination() != route[-1]:
+            return False
+        lease = current.lease
+        if lease is not None and lease["expires"] >= time() and current.counter < lease["end"]:
+            # Replacing the path drops the lease the bolt is still driving
+            return False
+        shorter = [route[0]] + path + [route[-1]]
+        position = current.position()
+        if position not in shorter:
+            return False
+        rest = shorter[shorter.index(position) :]
+        if len(rest) - 1 >= current.remaining:
+            return False
+        set_path(code, rest)
+    paths_refined.inc()
+    return True
+
+
+def find_path(x1, y1, x2, y2, layout=factory_layout, engine=None):
+    """Find the shortest path from <x1>, <y1> to <x2>, <y2>.
+
+    Parameters
+    ----------
+    engine : str
+        astar, bidirectional or travel_time, the ROUTING_ENGINE config by default
+
+    Returns
+    -------
+    List[Location]
+        The path, including the start and the finish
+    """
+    stats: Dict[str, int] = {}
+    try:
+        return routing.find_path(
+            Location(x=x1, y=y1),
+            Location(x=x2, y=y2),
+            layout,
+            engine=engine or app.config["ROUTING_ENGINE"],
+            heuristic=lambda target: routing_heuristic(target, layout),
+            turn_penalty=app.config["TURN_PENALTY"],
+            stats=stats,
+        )
+    finally:
+        if stats:
+            observe_search("find_path", stats)
 
 
 def set_path(code: int, path: List[Location], swarm: Swarm = swarm):
@@ -290,13 +1255,156 @@ def set_path(code: int, path: List[Location], swarm: Swarm = swarm):
         The path (pre-optimization)
     """
     final_path = optimize_path(path)
-    paths[code] = {"path": final_path, "counter": 0}
-    swarm.get_bolt_by_id(code).next_move = {
-        "x": final_path[-1].x,
-        "y": final_path[-1].y,
+    # A bolt that is already there keeps its current position
+    finish = final_path[-1] if final_path else path[0]
+    with route_lock:
+        paths.set(code, path[0], final_path)
+        swarm.get_bolt_by_id(code).next_move = {"x": finish.x, "y": finish.y}
+
+
+def bolt_location(bolt: Bolt):
+    """The current position of <bolt> as a Location."""
+    return Location(x=int(bolt.position["x"]), y=int(bolt.position["y"]))
+
+
+def plan_routes(jobs: List[Tuple[int, Location, Location]]):
+    """Find the paths of many bolts, on the planner pool for big batches.
+
+    Routes to a destination that is shared in the batch or already has a
+    flow field are walked along the field, unless the engine is travel_time.
+
+    Parameters
+    ----------
+    jobs : List[Tuple[int, Location, Location]]
+        The id, start and finish per bolt
+
+    Returns
+    -------
+    Tuple[Dict[int, Optional[List[Location]]], List[int]]
+        The path per bolt id, None when there is no path, and the ids of the
+        bolts that were not planned before the PLANNER_DEADLINE_SECONDS
+    """
+    engine = app.config["ROUTING_ENGINE"]
+    routes = {}
+    if engine != "travel_time":
+        shared = collections.Counter(finish for _, _, finish in jobs)
+        for code, start, finish in jobs:
+            if shared[finish] >= app.config["FLOW_FIELD_MIN_ROUTES"] or finish in flow_fields:
+                routes[code] = flow_fields.get(finish).path(start)
+        jobs = [job for job in jobs if job[0] not in routes]
+    if len(jobs) < app.config["PLANNER_MIN_BATCH"] or planner.workers < 2:
+        for code, start, finish in jobs:
+            try:
+                routes[code] = find_path(start.x, start.y, finish.x, finish.y, engine=engine)
+            except ValueError:
+                routes[code] = None
+        return routes, []
+    planned, missed = planner.plan(
+        jobs, engine, app.config["PLANNER_DEADLINE_SECONDS"], app.config["TURN_PENALTY"]
+    )
+    routes.update(planned)
+    return routes, missed
+
+
+def apply_routes(routes):
+    """Set the planned paths, the bolts without a path stay where they are."""
+    with route_lock:
+        for code, route in routes.items():
+            if route is None:
+                if code in paths:
+                    del paths[code]
+                bolt = swarm.get_bolt_by_id(code)
+                bolt.next_move = dict(bolt.position)
+            else:
+                set_path(code, route)
+
+
+def preposition_idle_bolts():
+    """Send the idle bolts to the k-median of the demand heatmap.
+
+    A bolt is idle when it has no task at hand and no path. The sites
+    minimise the expected shortest-path distance to the recent targets, the
+    closest bolt and site are paired first. The paths are only set for the
+    bolts that are still idle once they are planned.
+
+    Returns
+    -------
+    Tuple[List[Location], Dict[int, Optional[List[Location]]]]
+        The sites and the path per bolt that was sent to one
+    """
+    with preposition_lock:
+        with route_lock:
+            idle = {code: bolt_location(bolt) for code, bolt in idle_bolts().items()}
+        sites = median_sites(factory_layout, demand.weights(), len(idle))
+        # A field per site, the sites would push the requested ones out of flow_fields
+        fields = {site: FlowField(factory_layout, site) for site in sites}
+        assigned = assign_sites(idle, sites, lambda start, site: fields[site].distance(start))
+        jobs = [
+            (code, idle[code], site)
+            for code, site in sorted(assigned.items())
+            if site != idle[code]
+        ]
+        routes, _ = plan_routes(jobs)
+        with route_lock:
+            still_idle = idle_bolts()
+            routes = {code: route for code, route in routes.items() if code in still_idle}
+            apply_routes(routes)
+        return sites, routes
+
+
+def idle_bolts():
+    """The bolts without a task at hand and without a path, per id."""
+    return {
+        bolt.id: bolt for bolt in swarm.bolts if not bolt.is_busy() and bolt.id not in paths
     }
 
 
+def preposition_loop():
+    """Pre-position the idle bolts every PREPOSITION_INTERVAL_SECONDS."""
+    while app.config["PREPOSITION_INTERVAL_SECONDS"] > 0:
+        sleep(app.config["PREPOSITION_INTERVAL_SECONDS"])
+        preposition_idle_bolts()
+
+
+def replan_paths(codes: Iterable[int]):
+    """Find new paths for the bolts with <codes> after the layout changed.
+
+    A bolt drives the waypoints it leased anyway and only reports its
+    position with the ack. Its path is replanned from the last leased
+    waypoint, behind the leased ones, and it keeps the lease so the ack still
+    counts. A bolt without a new path stops at the last leased waypoint.
+    """
+    now = time()
+    with route_lock:
+        jobs = []
+        leased: Dict[int, List[Location]] = {}
+        for code in sorted(codes):
+            route = paths.get(code)
+            if route is None:
+                continue
+            start = bolt_location(swarm.get_bolt_by_id(code))
+            lease = route.lease
+            if lease is not None and lease["expires"] >= now and route.counter < lease["end"]:
+                leased[code] = list(route.waypoints(lease["end"] - route.counter))
+                start = leased[code][-1]
+            jobs.append((code, start, route.destination()))
+        routes, _ = plan_routes(jobs)
+        apply_routes({code: path for code, path in routes.items() if code not in leased})
+        for code, waypoints in leased.items():
+            route = paths.get(code)
+            lease = route.lease
+            path = routes.get(code)
+            paths.set(code, route.position(), waypoints + (optimize_path(path) if path else []))
+            # Counted from the new route, the waypoints acked before it count below 0
+            paths.get(code).lease = dict(
+                lease,
+                counter=lease["counter"] - route.counter,
+                end=len(waypoints),
+            )
+            finish = paths.get(code).destination()
+            swarm.get_bolt_by_id(code).next_move = {"x": finish.x, "y": finish.y}
+
+
 def optimize_path(path: List[Location]):
     """Optimize the path so it will be run in less actions.
 
@@ -310,24 +1418,20 @@ def optimize_path(path: List[Location]):
     List[Location]
         The final optimized path
     """
-    counter = 0
+    cells = [loc for i, loc in enumerate(path) if i == 0 or loc != path[i - 1]]
     optimized_path: List[Location] = []
-    optimized_path.append(path[0])
-    x = path[counter].x
-    y = path[counter].y
-    counter += 1
-    while optimized_path[-1] != path[-1]:
-        while counter < len(path) and (path[counter].x == x or path[counter].y == y):
-            counter += 1
-        optimized_path.append(path[counter - 1])
-        if optimized_path[-1] != path[-1]:
-            x = path[counter - 1].x
-            y = path[counter - 1].y
-    optimized_path = optimized_path[1:]
+    # A waypoint where the path turns, or turns back like when giving way
+    for previous, loc, following in zip(cells, cells[1:], cells[2:]):
+        if (loc.x - previous.x, loc.y - previous.y) != (following.x - loc.x, following.y - loc.y):
+            optimized_path.append(loc)
+    if len(cells) > 1:
+        optimized_path.append(cells[-1])
+    path_length.observe(len(path), "raw")
+    path_length.observe(len(optimized_path), "optimized")
     return optimized_path
 
 
-def get_bolt(x: int, y: int, swarm: Swarm = swarm):
+def get_bolt(x: int, y: int, swarm: Swarm = swarm, layout=factory_layout):
     """Get the id of the nearest Bolt to position x, y.
 
     Parameters
@@ -336,6 +1440,8 @@ def get_bolt(x: int, y: int, swarm: Swarm = swarm):
         The x position
     y : int
         The y position
+    layout : List[List[int]]
+        The layout to measure the distances in
 
     Returns
     -------
@@ -344,15 +1450,24 @@ def get_bolt(x: int, y: int, swarm: Swarm = swarm):
     """
     min_dist = 100
     bolt_id = -1
+    # All bolts measure to the same cell, one flow field gives every distance
+    field = flow_fields.get(Location(x=x, y=y)) if layout is factory_layout else None
     for bolt in swarm.bolts:
-        curr_dist = calc_dist(start_pos=bolt.position, x=x, y=y)
+        if field is None:
+            curr_dist = calc_dist(start_pos=bolt.position, x=x, y=y, layout=layout)
+        else:
+            steps = field.distance(bolt_location(bolt))
+            if steps == UNREACHABLE:
+                continue
+            # The same measure as calc_dist, the cells between the two
+            curr_dist = max(steps - 1, 0)
         if not bolt.is_busy() and curr_dist < min_dist and curr_dist > 0:
             bolt_id = bolt.id
             min_dist = curr_dist
     return bolt_id if bolt_id != -1 else 0
 
 
-def calc_dist(start_pos: Dict[str, int], x: int, y: int):
+def calc_dist(start_pos: Dict[str, int], x: int, y: int, layout=factory_layout):
     """Calc the length of a path from the Bolt to <x> and <y>.
 
     Parameters
@@ -363,6 +1478,8 @@ def calc_dist(start_pos: Dict[str, int], x: int, y: int):
         The end.x position
     y : int
         The end.y position
+    layout : List[List[int]]
+        The layout to find the path in
 
     Returns
     -------
@@ -370,12 +1487,31 @@ def calc_dist(start_pos: Dict[str, int], x: int, y: int):
         The total length of the path
     """
     start = Location(x=int(start_pos["x"]), y=int(start_pos["y"]))
-    m = Maze(factory=factory_layout, start=start, finish=Location(x=x, y=y))
-    distance = manhattan_distance(m.finish)
-    final_astar, _ = astar(m.start, m.finish_line, m.frontier, distance)
+    m = Maze(factory=layout, start=start, finish=Location(x=x, y=y))
+    distance = routing_heuristic(m.finish, layout)
+    stats: Dict[str, int] = {}
+    final_astar, _ = astar(m.start, m.finish_line, m.frontier, distance, stats)
+    observe_search("calc_dist", stats)
     return len(final_astar)
 
 
+def routing_heuristic(finish: Location, layout):
+    """Get the A* heuristic towards <finish> from the ROUTING_HEURISTIC config.
+
+    Landmarks are only kept for the factory layout, other layouts use the
+    manhattan distance.
+    """
+    if app.config["ROUTING_HEURISTIC"] == "landmarks" and layout is factory_layout:
+        return landmarks.heuristic(finish)
+    return manhattan_distance(finish)
+
+
+def observe_search(caller: str, stats: Dict[str, int]):
+    """Add the statistics of an A* search to the metrics."""
+    search_expanded.observe(stats["expanded"], caller)
+    search_frontier_peak.observe(stats["frontier_peak"], caller)
+
+
 def cors_resp(data: Any):
     """cors_resp will create responses with CORS access
 
@@ -399,4 +1535,12 @@ def cors_resp(data: Any):
 # endregion
 
 if __name__ == "__main__":
-    app.run(port=80, host="0.0.0.0")
+    port = int(os.environ.get("ROLLENBOLLEN_PORT", 80))
+    host = os.environ.get("ROLLENBOLLEN_HOST", "0.0.0.0")
+    # ROLLENBOLLEN_SERVER=async serves many open bolt connections, see async_server.py
+    if os.environ.get("ROLLENBOLLEN_SERVER") == "async":
+        from async_server import run
+
+        run(app, host, port)
+    else:
+        app.run(port=port, host=host)
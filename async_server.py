@@ -0,0 +1,308 @@
+"""Serve the flask app from an asyncio event loop, for many open connections.
+
+Every connection is a coroutine instead of a thread, so thousands of bolts
+can keep a connection open to poll their commands. The app itself, with the
+CPU heavy planning, runs on a bounded pool of executor threads, the event
+loop only reads and writes the sockets.
+
+Run from the root of the repository:
+    python async_server.py --port 80 --workers 16
+"""
+import argparse
+import asyncio
+import os
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from io import BytesIO
+from threading import Event, Thread
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+# The longest request line plus headers that is read
+HEAD_LIMIT = 64 * 1024
+REASONS = {
+    400: "Bad Request",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+def parse_head(head: bytes) -> Optional[Tuple[str, str, str, List[Tuple[str, str]]]]:
+    """Parse the request line and headers, None when they are malformed.
+
+    Returns
+    -------
+    Tuple[str, str, str, List[Tuple[str, str]]]
+        The method, target, HTTP version and the headers
+    """
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        return None
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep or not name.strip():
+            return None
+        headers.append((name.strip(), value.strip()))
+    method, target, version = parts
+    return method, target, version, headers
+
+
+class AsyncWSGIServer:
+    """Speak HTTP/1.1 with keep-alive on asyncio streams and call a WSGI app."""
+
+    def __init__(
+        self,
+        app: Callable,
+        workers: Optional[int] = None,
+        keep_alive: float = 75.0,
+        max_body: int = 1 << 20,
+    ) -> None:
+        """Create a server for <app>.
+
+        Parameters
+        ----------
+        app : Callable
+            The WSGI app
+        workers : int
+            The amount of threads that run the app, the default of
+            ThreadPoolExecutor if None
+        keep_alive : float
+            Seconds an idle connection is kept open
+        max_body : int
+            The largest request body in bytes
+        """
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wsgi")
+        self.keep_alive = keep_alive
+        self.max_body = max_body
+        self.connections = 0
+        self.peak_connections = 0
+        self.writers: Set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of a single connection until it closes."""
+        self.connections += 1
+        self.peak_connections = max(self.peak_connections, self.connections)
+        self.writers.add(writer)
+        try:
+            while await self.handle_request(reader, writer):
+                pass
+        finally:
+            self.connections -= 1
+            self.writers.discard(writer)
+            writer.close()
+            with suppress(ConnectionError, OSError):
+                await writer.wait_closed()
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the next request on the connection, False to close it."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive)
+        except (
+            asyncio.TimeoutError,
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            ConnectionError,
+        ):
+            return False
+        request = parse_head(head)
+        if request is None:
+            await self.write_error(writer, 400)
+            return False
+        method, target, version, headers = request
+        fields = {name.lower(): value for name, value in headers}
+        if "chunked" in fields.get("transfer-encoding", "").lower():
+            await self.write_error(writer, 411)
+            return False
+        length = fields.get("content-length", "0")
+        if not length.isdigit():
+            await self.write_error(writer, 400)
+            return False
+        if int(length) > self.max_body:
+            await self.write_error(writer, 413)
+            return False
+        try:
+            body = await reader.readexactly(int(length))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return False
+        environ = self.environ(method, target, version, headers, body, writer)
+        loop = asyncio.get_running_loop()
+        status, response_headers, content = await loop.run_in_executor(
+            self.executor, self.call_app, environ
+        )
+        connection = fields.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep = connection == "keep-alive"
+        else:
+            keep = connection != "close"
+        names = {name.lower() for name, _ in response_headers}
+        if "content-length" not in names:
+            response_headers.append(("Content-Length", str(len(content))))
+        response_headers.append(("Connection", "keep-alive" if keep else "close"))
+        lines = [f"{version} {status}"]
+        lines.extend(f"{name}: {value}" for name, value in response_headers)
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if method != "HEAD":
+            writer.write(content)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            return False
+        return keep
+
+    def environ(
+        self,
+        method: str,
+        target: str,
+        version: str,
+        headers: List[Tuple[str, str]],
+        body: bytes,
+        writer: asyncio.StreamWriter,
+    ) -> Dict[str, Any]:
+        """Create the WSGI environ of a request."""
+        path, _, query = target.partition("?")
+        server = writer.get_extra_info("sockname") or ("", 0)
+        peer = writer.get_extra_info("peername") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(path, encoding="latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": str(server[0]),
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": str(peer[0]),
+            "REMOTE_PORT": str(peer[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in headers:
+            key = name.upper().replace("-", "_")
+            if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[key] = value
+            elif "HTTP_" + key in environ:
+                environ["HTTP_" + key] += "," + value
+            else:
+                environ["HTTP_" + key] = value
+        return environ
+
+    def call_app(self, environ: Dict[str, Any]) -> Tuple[str, List[Tuple[str, str]], bytes]:
+        """Run the app on an executor thread and collect its whole response."""
+        started: List[Any] = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [status, list(headers)]
+
+        try:
+            result = self.app(environ, start_response)
+            try:
+                content = b"".join(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        except Exception:  # The app failed before it could answer
+            traceback.print_exc(file=environ["wsgi.errors"])
+            return "500 Internal Server Error", [("Content-Type", "text/plain")], b""
+        return started[0], started[1], content
+
+    async def write_error(self, writer: asyncio.StreamWriter, code: int):
+        """Answer a request that can not be handed to the app, and close."""
+        writer.write(
+            f"HTTP/1.1 {code} {REASONS[code]}\r\n"
+            "Content-Length: 0\r\nConnection: close\r\n\r\n".encode("latin-1")
+        )
+        with suppress(ConnectionError):
+            await writer.drain()
+
+    async def start(self, host: str, port: int) -> asyncio.AbstractServer:
+        """Listen on <host>, <port>, 0 picks a free port."""
+        return await asyncio.start_server(
+            self.handle, host, port, limit=HEAD_LIMIT, backlog=4096
+        )
+
+    async def close_connections(self, timeout: float = 5.0):
+        """Close the open connections and wait for their handlers to finish."""
+        for writer in list(self.writers):
+            writer.close()
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self.connections and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.01)
+
+    def shutdown(self):
+        """Stop the executor threads."""
+        self.executor.shutdown(wait=False)
+
+
+class ServerThread(Thread):
+    """Run an AsyncWSGIServer on its own event loop in a background thread."""
+
+    def __init__(self, app: Callable, host: str = "127.0.0.1", port: int = 0, **kwargs) -> None:
+        """Create the thread, the keyword arguments go to AsyncWSGIServer."""
+        super().__init__(daemon=True)
+        self.server = AsyncWSGIServer(app, **kwargs)
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.ready = Event()
+        self.stopped: Optional[asyncio.Future] = None
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+        self.loop.close()
+
+    async def _serve(self):
+        server = await self.server.start(self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.stopped = self.loop.create_future()
+        self.ready.set()
+        async with server:
+            await self.stopped
+            await self.server.close_connections()
+
+    def start(self):
+        """Start serving and wait until the port is open."""
+        super().start()
+        self.ready.wait()
+
+    def stop(self):
+        """Stop serving and wait for the thread."""
+        self.loop.call_soon_threadsafe(self.stopped.set_result, None)
+        self.join()
+        self.server.shutdown()
+
+
+def run(app: Callable, host: str = "0.0.0.0", port: int = 80, workers: Optional[int] = None):
+    """Serve <app> until interrupted."""
+
+    async def serve():
+        server = await AsyncWSGIServer(app, workers=workers).start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    with suppress(KeyboardInterrupt):
+        asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default=os.environ.get("ROLLENBOLLEN_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("ROLLENBOLLEN_PORT", 80)))
+    parser.add_argument("--workers", type=int, help="Threads that run the app")
+    arguments = parser.parse_args()
+
+    from application import app as flask_app
+
+    run(flask_app, arguments.host, arguments.port, arguments.workers)
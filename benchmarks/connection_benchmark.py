@@ -0,0 +1,169 @@
+"""Compare the open bolt connections the threaded and the async server can serve.
+
+Every virtual bolt opens a connection, waits until all bolts are connected
+and then polls its command a few times. The threaded server of app.run
+closes the connection after every answer, so its bolts connect again for
+every poll, and it runs a thread per connection. The async server keeps the
+connections open, each as a coroutine.
+
+Run from the root of the repository:
+    python -m benchmarks.connection_benchmark --connections 100 1000 2000
+"""
+import argparse
+import asyncio
+import threading
+from threading import Thread
+from time import perf_counter
+from typing import Dict, List
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from application import app
+from async_server import ServerThread
+from load_generator import percentile
+
+
+class QuietHandler(WSGIRequestHandler):
+    """The request handler of app.run without the access log."""
+
+    def log_request(self, *args, **kwargs):
+        """Leave out the access log, the async server has none either."""
+
+
+def start_threaded():
+    """Start the werkzeug server app.run uses, a thread per connection."""
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    server.daemon_threads = True
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server.server_port, server.shutdown
+
+
+def start_async():
+    """Start the async server."""
+    server = ServerThread(app)
+    server.start()
+    return server.port, server.stop
+
+
+async def connect(port: int):
+    """Open a connection to the server on <port>."""
+    return await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), 10)
+
+
+async def bolt(port: int, code: int, polls: int, connected, stats: Dict[str, List]):
+    """Connect, wait for all other bolts and poll the command <polls> times."""
+    request = f"GET /api/bolt/{code}/command HTTP/1.1\r\nHost: bench\r\n\r\n".encode()
+    try:
+        reader, writer = await connect(port)
+    except (OSError, asyncio.TimeoutError):
+        stats["failed"].append(code)
+        connected.release()
+        return
+    connected.release()
+    await connected.all_in.wait()
+    try:
+        for _ in range(polls):
+            start = perf_counter()
+            if writer is None:
+                reader, writer = await connect(port)
+            writer.write(request)
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 30)
+            headers = dict(
+                line.lower().split(":", 1) for line in head.decode("latin-1").split("\r\n")[1:-2]
+            )
+            length = int(headers.get("content-length", 0))
+            await asyncio.wait_for(reader.readexactly(length), 30)
+            stats["latencies"].append(perf_counter() - start)
+            if headers.get("connection", "").strip() == "close":
+                writer.close()
+                writer = None
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        stats["failed"].append(code)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+class Barrier:
+    """Count the connected bolts and release them all at once."""
+
+    def __init__(self, amount: int) -> None:
+        self.amount = amount
+        self.all_in = asyncio.Event()
+
+    def release(self):
+        self.amount -= 1
+        if self.amount == 0:
+            self.all_in.set()
+
+
+async def sample_threads(peak: List[int]):
+    """Keep the highest amount of threads of the process in <peak>."""
+    while True:
+        peak[0] = max(peak[0], threading.active_count())
+        await asyncio.sleep(0.05)
+
+
+async def run_bolts(port: int, connections: int, polls: int):
+    """Run <connections> bolts against the server on <port>."""
+    stats: Dict[str, List] = {"latencies": [], "failed": []}
+    connected = Barrier(connections)
+    peak = [0]
+    sampler = asyncio.ensure_future(sample_threads(peak))
+    start = perf_counter()
+    await asyncio.gather(
+        *(bolt(port, code % 50 + 1, polls, connected, stats) for code in range(connections))
+    )
+    elapsed = perf_counter() - start
+    sampler.cancel()
+    latencies = stats["latencies"]
+    return {
+        "failed": len(stats["failed"]),
+        "threads": peak[0],
+        "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def benchmark(connections=(100, 1000), polls=5, servers=("threaded", "async")):
+    """Measure every server at every amount of connections.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        The bolts that failed to connect or poll, the peak threads of the
+        process, the requests per second and the p50/p99 latency in ms per run
+    """
+    client = app.test_client()
+    client.get("/api/reset")
+    for _ in range(50):
+        client.get("/api/register")
+    starters = {"threaded": start_threaded, "async": start_async}
+    results = {}
+    for server in servers:
+        for amount in connections:
+            port, stop = starters[server]()
+            results[f"{server} {amount}"] = asyncio.run(run_bolts(port, amount, polls))
+            stop()
+    client.get("/api/reset")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--polls", type=int, default=5)
+    parser.add_argument(
+        "--servers", nargs="+", default=["threaded", "async"], choices=["threaded", "async"]
+    )
+    args = parser.parse_args()
+
+    results = benchmark(args.connections, args.polls, args.servers)
+    print(f"{'run':<16}{'failed':>8}{'threads':>9}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<16}{row['failed']:>8}{row['threads']:>9}{row['rps']:>10.1f}"
+            f"{row['p50']:>10.2f}{row['p99']:>10.2f}"
+        )
@@ -0,0 +1,59 @@
+"""Measure the routes per second of the planner pool per amount of workers.
+
+Run from the root of the repository:
+    python -m benchmarks.planner_benchmark --size 200 --routes 400 --workers 1 2 4
+"""
+import argparse
+import os
+from random import Random
+from time import perf_counter
+
+from benchmarks.search_benchmark import long_routes
+from layout import Layout
+from maze_maker import random_factory
+from planner_pool import PlannerPool, plan_route
+
+
+def benchmark(size=200, routes=400, workers=(1, 2, 4), barriers=0.25, seed=1):
+    """Plan the same batch sequentially and on pools of <workers> processes.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        The time in seconds and the routes per second per run
+    """
+    factory = random_factory(size, size, barriers, seed)
+    jobs = [
+        (code, start, finish)
+        for code, (start, finish) in enumerate(long_routes(factory, routes, Random(seed)))
+    ]
+    before = perf_counter()
+    for _, start, finish in jobs:
+        plan_route(start, finish, factory, "astar")
+    elapsed = perf_counter() - before
+    results = {"sequential": {"seconds": elapsed, "routes/s": routes / elapsed}}
+    for amount in workers:
+        pool = PlannerPool(Layout(factory), workers=amount)
+        # Start the processes before the clock runs
+        pool.plan(jobs[:amount], "astar", 60)
+        before = perf_counter()
+        pool.plan(jobs, "astar", 600)
+        elapsed = perf_counter() - before
+        pool.shutdown()
+        results[f"{amount} workers"] = {"seconds": elapsed, "routes/s": routes / elapsed}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--routes", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1])
+    parser.add_argument("--barriers", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    results = benchmark(args.size, args.routes, args.workers, args.barriers, args.seed)
+    print(f"{'run':<16}{'seconds':>10}{'routes/s':>12}")
+    for name, row in results.items():
+        print(f"{name:<16}{row['seconds']:>10.2f}{row['routes/s']:>12.1f}")
@@ -0,0 +1,72 @@
+"""Compare shortest and travel-time-optimal routes on random floors.
+
+Run from the root of the repository:
+    python -m benchmarks.routing_benchmark --size 40 --routes 200
+"""
+import argparse
+from random import Random
+from time import perf_counter
+
+from application import find_path, optimize_path
+from maze_maker import random_factory, reachable_cells
+from travel_time import route_time
+
+
+def slow_cells(factory, share: float, rng: Random):
+    """Give a <share> of the free cells a traversal cost of 2 to 4."""
+    for row in factory:
+        for y, value in enumerate(row):
+            if value == 0 and rng.random() < share:
+                row[y] = rng.randint(2, 4)
+    factory[0][0] = 0
+    return factory
+
+
+def benchmark(size=40, routes=200, barriers=0.2, slow=0.1, turn_penalty=2.0, seed=1):
+    """Route the same pairs with every engine.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        The mean cells, segments, travel time and planning time per engine
+    """
+    rng = Random(seed)
+    factory = slow_cells(random_factory(size, size, barriers, seed), slow, rng)
+    cells = sorted(reachable_cells(factory))
+    pairs = []
+    while len(pairs) < routes:
+        start, finish = rng.choice(cells), rng.choice(cells)
+        if start != finish:
+            pairs.append((start, finish))
+    results = {}
+    for engine in ("astar", "travel_time"):
+        totals = {"cells": 0.0, "segments": 0.0, "time": 0.0, "ms": 0.0}
+        for start, finish in pairs:
+            before = perf_counter()
+            path = find_path(
+                start.x, start.y, finish.x, finish.y, layout=factory, engine=engine
+            )
+            totals["ms"] += (perf_counter() - before) * 1000
+            totals["cells"] += len(path) - 1
+            totals["segments"] += len(optimize_path(path))
+            totals["time"] += route_time(path, factory, turn_penalty)
+        results[engine] = {key: value / len(pairs) for key, value in totals.items()}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=40)
+    parser.add_argument("--routes", type=int, default=200)
+    parser.add_argument("--barriers", type=float, default=0.2)
+    parser.add_argument("--slow", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    results = benchmark(args.size, args.routes, args.barriers, args.slow, seed=args.seed)
+    print(f"{'engine':<14}{'cells':>10}{'segments':>10}{'time':>10}{'ms':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<14}{row['cells']:>10.1f}{row['segments']:>10.2f}"
+            f"{row['time']:>10.1f}{row['ms']:>10.2f}"
+        )
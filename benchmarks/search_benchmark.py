@@ -0,0 +1,136 @@
+"""Compare the explored nodes and time of the search engines on big floors.
+
+Run from the root of the repository:
+    python -m benchmarks.search_benchmark --size 200 --routes 50
+"""
+import argparse
+from random import Random
+from time import perf_counter
+
+from landmarks import Landmarks
+from layout import Layout
+from maze_maker import Maze, manhattan_distance, random_factory, reachable_cells
+from maze_search import astar, bidirectional_search, breadth_first_search
+
+
+def run_bfs(m: Maze, stats, alt: Landmarks):
+    path, searched = breadth_first_search(m.start, m.finish_line, m.frontier)
+    stats["expanded"] = len(searched) + 2
+    return path
+
+
+def run_bidirectional_bfs(m: Maze, stats, alt: Landmarks):
+    path, _ = bidirectional_search(
+        m.start, m.finish_line, m.frontier, stats=stats, finish=m.finish
+    )
+    return path
+
+
+def run_astar(m: Maze, stats, alt: Landmarks):
+    path, _ = astar(m.start, m.finish_line, m.frontier, manhattan_distance(m.finish), stats)
+    return path
+
+
+def run_bidirectional_astar(m: Maze, stats, alt: Landmarks):
+    path, _ = bidirectional_search(
+        m.start,
+        m.finish_line,
+        m.frontier,
+        manhattan_distance(m.finish),
+        stats,
+        finish=m.finish,
+        reverse_heuristic=manhattan_distance(m.start),
+    )
+    return path
+
+
+def run_astar_landmarks(m: Maze, stats, alt: Landmarks):
+    path, _ = astar(m.start, m.finish_line, m.frontier, alt.heuristic(m.finish), stats)
+    return path
+
+
+def run_bidirectional_landmarks(m: Maze, stats, alt: Landmarks):
+    path, _ = bidirectional_search(
+        m.start,
+        m.finish_line,
+        m.frontier,
+        alt.heuristic(m.finish),
+        stats,
+        finish=m.finish,
+        reverse_heuristic=alt.heuristic(m.start),
+    )
+    return path
+
+
+ENGINES = {
+    "bfs": run_bfs,
+    "bidirectional_bfs": run_bidirectional_bfs,
+    "astar": run_astar,
+    "bidirectional_astar": run_bidirectional_astar,
+    "astar_landmarks": run_astar_landmarks,
+    "bidirectional_landmarks": run_bidirectional_landmarks,
+}
+
+
+def long_routes(factory, routes: int, rng: Random):
+    """Pick <routes> pairs of reachable cells at least a floor width apart."""
+    cells = sorted(reachable_cells(factory))
+    width = len(factory[0])
+    pairs = []
+    while len(pairs) < routes:
+        start, finish = rng.choice(cells), rng.choice(cells)
+        if abs(start.x - finish.x) + abs(start.y - finish.y) >= width:
+            pairs.append((start, finish))
+    return pairs
+
+
+def benchmark(size=200, routes=50, barriers=0.25, seed=1):
+    """Run every engine over the same long routes.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        The mean expanded nodes, time in ms and path length per engine, and
+        the time to precompute the landmarks
+    """
+    rng = Random(seed)
+    factory = random_factory(size, size, barriers, seed)
+    pairs = long_routes(factory, routes, rng)
+    before = perf_counter()
+    alt = Landmarks(Layout(factory)).refresh()
+    results = {"landmark_precompute": {"ms": (perf_counter() - before) * 1000}}
+    for name, engine in ENGINES.items():
+        expanded = 0
+        length = 0
+        elapsed = 0.0
+        for start, finish in pairs:
+            m = Maze(factory=factory, start=start, finish=finish)
+            stats = {}
+            before = perf_counter()
+            path = engine(m, stats, alt)
+            elapsed += perf_counter() - before
+            expanded += stats["expanded"]
+            length += len(path)
+        results[name] = {
+            "expanded": expanded / len(pairs),
+            "ms": elapsed / len(pairs) * 1000,
+            "length": length / len(pairs),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--barriers", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    results = benchmark(args.size, args.routes, args.barriers, args.seed)
+    print(f"{'engine':<26}{'expanded':>12}{'ms':>10}{'length':>10}")
+    for name, row in results.items():
+        print(
+            f"{name:<26}{row.get('expanded', 0):>12.0f}{row['ms']:>10.2f}"
+            f"{row.get('length', 0):>10.1f}"
+        )
@@ -1,5 +1,9 @@
 """The BOLT and Swarm class document."""
-from typing import Dict, List
+from collections import OrderedDict
+from heapq import heappop, heappush
+from threading import Lock
+from time import monotonic
+from typing import Dict, List, Optional
 
 
 class Bolt:
@@ -38,19 +42,88 @@ class Bolt:
 
 
 class Swarm:
-    """A Swarm is a group of BOLT working together."""
+    """A Swarm is a group of BOLT working together.
+
+    Every bolt holds a lease that its heartbeats renew. Bolts whose lease
+    expired are evicted and their ids are given to the next registrations.
+    """
 
     def __init__(self) -> None:
         """Create a Swarm of BOLT and coordinate them."""
+        # The highest id given out so far
         self.counter: int = 0
         self.bolts: List[Bolt] = []
+        self.index: Dict[int, Bolt] = {}
+        # The ids of evicted bolts, the lowest is reused first
+        self.free_ids: List[int] = []
+        # The time of the last heartbeat per bolt id, the oldest first
+        self.heartbeats: "OrderedDict[int, float]" = OrderedDict()
+        self.lock = Lock()
 
-    def register_bolt(self, bolt: Bolt):
+    def register_bolt(self, bolt: Bolt, now: Optional[float] = None):
         """Register a BOLT to the Swarm."""
-        self.counter += 1
-        self.bolts.append(bolt)
-        bolt.register(self.counter)
-        return self.counter
+        with self.lock:
+            if self.free_ids:
+                code = heappop(self.free_ids)
+            else:
+                self.counter += 1
+                code = self.counter
+            self.bolts.append(bolt)
+            self.index[code] = bolt
+            self.heartbeats[code] = monotonic() if now is None else now
+        bolt.register(code)
+        return code
+
+    def renew(self, code: int, now: Optional[float] = None):
+        """Renew the lease of Bolt[<code>], False if it is not registered."""
+        with self.lock:
+            if code not in self.heartbeats:
+                return False
+            self.heartbeats[code] = monotonic() if now is None else now
+            self.heartbeats.move_to_end(code)
+            return True
+
+    def evict_expired(self, seconds: float, now: Optional[float] = None) -> List[int]:
+        """Evict the bolts without a heartbeat in the last <seconds>.
+
+        Only the expired bolts are visited, the heartbeats are kept oldest
+        first.
+
+        Returns
+        -------
+        List[int]
+            The ids of the evicted bolts
+        """
+        deadline = (monotonic() if now is None else now) - seconds
+        evicted = []
+        with self.lock:
+            while self.heartbeats:
+                code, heartbeat = next(iter(self.heartbeats.items()))
+                if heartbeat >= deadline:
+                    break
+                self._evict(code)
+                evicted.append(code)
+        return evicted
+
+    def evict(self, code: int):
+        """Remove Bolt[<code>] from the Swarm and free its id."""
+        with self.lock:
+            if code in self.index:
+                self._evict(code)
+
+    def reset(self):
+        """Remove all BOLTS, the next registration gets id 1 again."""
+        with self.lock:
+            self.counter = 0
+            self.bolts = []
+            self.index = {}
+            self.free_ids = []
+            self.heartbeats = OrderedDict()
+
+    def _evict(self, code: int):
+        self.bolts.remove(self.index.pop(code))
+        del self.heartbeats[code]
+        heappush(self.free_ids, code)
 
     def get_bolts(self):
         """Get the info of all the BOLTS."""
@@ -58,12 +131,9 @@ class Swarm:
 
     def get_bolt(self, code: int):
         """Get the details of a single BOLT."""
-        if code <= len(self.bolts):
-            return self.bolts[code - 1].__dict__
-        return None
+        bolt = self.index.get(code)
+        return bolt.__dict__ if bolt is not None else None
 
-    def get_bolt_by_id(self, code: int):
+    def get_bolt_by_id(self, code: int) -> Optional[Bolt]:
         """Get the details of a single BOLT."""
-        if code <= len(self.bolts):
-            return self.bolts[code - 1]
-        return None
+        return self.index.get(code)
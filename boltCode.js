@@ -419,15 +419,19 @@ const registerBolt = async () => {
   await speak('Bolt id is ' + boltId);
 };
 /**
- * Make a call to the web-API for the next move
+ * Make a call to the web-API for the next moves, drive them and report back
  */
 const getNextMove = async () => {
-  const response = await fetch(boltIdLink() + 'command');
-  const move = await response.json();
-  const { x, y } = move;
-  await bolt.drive(x, y);
-  if (-1 === x && -1 === y) {
-    running = false;
+  const response = await fetch(boltIdLink() + 'command?n=all');
+  const { waypoints, lease } = await response.json();
+  for (const { x, y } of waypoints) {
+    await bolt.drive(x, y);
+    if (-1 === x && -1 === y) {
+      running = false;
+    }
+  }
+  if (lease !== null) {
+    await fetch(`${boltIdLink()}ack?lease=${lease}&done=${waypoints.length}`);
   }
 };
 
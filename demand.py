@@ -0,0 +1,186 @@
+"""Where the BOLT's are asked to go, and where idle bolts should wait for it.
+
+Every requested target adds to a heatmap that halves every half-life. The
+cells that minimise the weighted shortest-path distance to the demand, a
+k-median over the factory grid, are the best places for idle bolts to wait.
+"""
+from threading import Lock
+from time import monotonic
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from flow_field import UNREACHABLE, wavefront
+from util import Location
+
+
+class DemandHeatmap:
+    """The requested target cells, weighted by how recently they were asked."""
+
+    def __init__(
+        self, half_life: float = 600.0, size: int = 64, clock: Callable[[], float] = monotonic
+    ) -> None:
+        """Create an empty heatmap.
+
+        Parameters
+        ----------
+        half_life : float
+            Seconds after which a request counts half
+        size : int
+            The amount of cells to keep, the lightest ones are dropped
+        clock : Callable[[], float]
+            The time in seconds, monotonic by default
+        """
+        self.half_life = half_life
+        self.size = size
+        self.clock = clock
+        # The weight of every cell and the time it was last decayed
+        self.cells: Dict[Location, Tuple[float, float]] = {}
+        self.lock = Lock()
+
+    def _decayed(self, weight: float, since: float, now: float):
+        return weight * 0.5 ** ((now - since) / self.half_life)
+
+    def record(self, target: Location, weight: float = 1.0):
+        """Add a request for <target>."""
+        now = self.clock()
+        with self.lock:
+            current, since = self.cells.get(target, (0.0, now))
+            self.cells[target] = (self._decayed(current, since, now) + weight, now)
+            if len(self.cells) > self.size:
+                del self.cells[min(self.cells, key=lambda loc: self._weight(loc, now))]
+
+    def _weight(self, target: Location, now: float):
+        weight, since = self.cells[target]
+        return self._decayed(weight, since, now)
+
+    def weights(self) -> Dict[Location, float]:
+        """The current weight of every requested cell."""
+        now = self.clock()
+        with self.lock:
+            return {loc: self._weight(loc, now) for loc in self.cells}
+
+    def clear(self):
+        """Forget all requests."""
+        with self.lock:
+            self.cells.clear()
+
+
+def k_median(costs: np.ndarray, weights: np.ndarray, k: int, rounds: int = 10) -> List[int]:
+    """Pick <k> columns of <costs> that minimise the weighted distance of the rows.
+
+    A greedy start, then single swaps while they lower the total cost.
+
+    Parameters
+    ----------
+    costs : np.ndarray
+        The distance from every demand (row) to every candidate site (column)
+    weights : np.ndarray
+        The weight of every demand
+    k : int
+        The amount of sites
+    rounds : int
+        The maximum amount of swap rounds
+
+    Returns
+    -------
+    List[int]
+        The chosen columns
+    """
+    k = min(k, costs.shape[1])
+    if k <= 0:
+        return []
+    sites: List[int] = []
+    nearest = np.full(costs.shape[0], np.inf)
+    for _ in range(k):
+        totals = weights @ np.minimum(nearest[:, None], costs)
+        totals[sites] = np.inf
+        site = int(np.argmin(totals))
+        sites.append(site)
+        nearest = np.minimum(nearest, costs[:, site])
+    best = float(weights @ nearest)
+    for _ in range(rounds):
+        improved = False
+        for index in range(k):
+            others = sites[:index] + sites[index + 1 :]
+            rest = costs[:, others].min(axis=1) if others else np.full(costs.shape[0], np.inf)
+            totals = weights @ np.minimum(rest[:, None], costs)
+            totals[others] = np.inf
+            site = int(np.argmin(totals))
+            if totals[site] < best - 1e-9:
+                sites[index] = site
+                best = float(totals[site])
+                improved = True
+        if not improved:
+            break
+    return sites
+
+
+def median_sites(grid: List[List[int]], demand: Dict[Location, float], k: int):
+    """The <k> free cells of <grid> with the least expected distance to <demand>.
+
+    Parameters
+    ----------
+    grid : List[List[int]]
+        The factory grid, 1 is a wall
+    demand : Dict[Location, float]
+        The weight per requested cell
+
+    Returns
+    -------
+    List[Location]
+        The sites, in the order they were picked
+    """
+    free = np.array(grid) != 1
+    candidates = np.flatnonzero(free)
+    if not demand or candidates.size == 0:
+        return []
+    targets = list(demand)
+    costs = np.stack([wavefront(free, target).ravel()[candidates] for target in targets])
+    costs = costs.astype(float)
+    # A site that can not reach a target is as bad as the whole grid away
+    costs[costs == UNREACHABLE] = free.size
+    weights = np.array([demand[target] for target in targets])
+    columns = free.shape[1]
+    return [
+        Location(x=int(candidates[site] // columns), y=int(candidates[site] % columns))
+        for site in k_median(costs, weights, k)
+    ]
+
+
+def assign_sites(
+    bolts: Dict[int, Location],
+    sites: List[Location],
+    distance: Callable[[Location, Location], int],
+) -> Dict[int, Location]:
+    """Pair every site with a bolt, the closest pairs first.
+
+    Parameters
+    ----------
+    bolts : Dict[int, Location]
+        The position per bolt id
+    sites : List[Location]
+        The cells to send the bolts to
+    distance : Callable[[Location, Location], int]
+        The steps from a position to a site, -1 when it can not be reached
+
+    Returns
+    -------
+    Dict[int, Location]
+        The site per bolt, bolts without a reachable site are left out
+    """
+    pairs: List[Tuple[int, int, Location]] = []
+    for code, position in bolts.items():
+        for site in sites:
+            steps = distance(position, site)
+            if steps != UNREACHABLE:
+                pairs.append((steps, code, site))
+    pairs.sort()
+    assigned: Dict[int, Location] = {}
+    taken: set = set()
+    for _, code, site in pairs:
+        if code not in assigned and site not in taken:
+            assigned[code] = site
+            taken.add(site)
+    return assigned
+
@@ -0,0 +1,154 @@
+"""Distance and flow fields towards popular destinations.
+
+One wavefront from the destination gives the distance of every cell and the
+direction of its next step, so the route of any bolt to that destination is
+a walk along the directions instead of a new search.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Optional
+
+import numpy as np
+
+from layout import Layout
+from route_store import DX, DY
+from util import Location
+
+UNREACHABLE = -1
+
+
+def wavefront(free: np.ndarray, destination: Location) -> np.ndarray:
+    """Get the amount of steps from every cell to <destination>, -1 if unreachable.
+
+    Every ring of the wavefront is grown in one go by shifting the frontier
+    over the grid in the four directions.
+    """
+    distances = np.full(free.shape, UNREACHABLE, dtype=np.int32)
+    distances[destination.x, destination.y] = 0
+    frontier = np.zeros(free.shape, dtype=bool)
+    frontier[destination.x, destination.y] = True
+    step = 0
+    while frontier.any():
+        step += 1
+        grown = np.zeros_like(frontier)
+        grown[1:, :] |= frontier[:-1, :]
+        grown[:-1, :] |= frontier[1:, :]
+        grown[:, 1:] |= frontier[:, :-1]
+        grown[:, :-1] |= frontier[:, 1:]
+        frontier = grown & free & (distances == UNREACHABLE)
+        distances[frontier] = step
+    return distances
+
+
+class FlowField:
+    """The distances to one destination and the next step from every cell."""
+
+    def __init__(self, grid: List[List[int]], destination: Location) -> None:
+        """Run the wavefront from <destination> over <grid>.
+
+        The destination is free even when it is a wall, like in Maze.
+        """
+        free = np.array(grid) != 1
+        free[destination.x, destination.y] = True
+        self.destination = destination
+        self.distances = wavefront(free, destination)
+        rows, columns = free.shape
+        padded = np.full((rows + 2, columns + 2), UNREACHABLE, dtype=np.int32)
+        padded[1:-1, 1:-1] = self.distances
+        directions = np.full(free.shape, UNREACHABLE, dtype=np.int8)
+        # The first direction in the order of Maze.frontier that gets closer
+        for code in reversed(range(4)):
+            neighbour = padded[
+                1 + DX[code] : rows + 1 + DX[code], 1 + DY[code] : columns + 1 + DY[code]
+            ]
+            closer = (self.distances > 0) & (neighbour == self.distances - 1)
+            directions[closer] = code
+        self._distances = self.distances.tolist()
+        self._directions = directions.tolist()
+
+    def _entry(self, start: Location):
+        """The distance from <start> and its first step, also from a wall."""
+        distance = self._distances[start.x][start.y]
+        if distance != UNREACHABLE:
+            return distance, start
+        best = None
+        for code in range(4):
+            x, y = start.x + DX[code], start.y + DY[code]
+            if 0 <= x < len(self._distances) and 0 <= y < len(self._distances[0]):
+                neighbour = self._distances[x][y]
+                if neighbour != UNREACHABLE and (best is None or neighbour + 1 < best[0]):
+                    best = (neighbour + 1, Location(x, y))
+        return best if best is not None else (UNREACHABLE, None)
+
+    def distance(self, start: Location):
+        """The amount of steps from <start> to the destination, -1 if unreachable."""
+        return self._entry(start)[0]
+
+    def path(self, start: Location) -> Optional[List[Location]]:
+        """The path from <start> like find_path, None if there is none.
+
+        Returns
+        -------
+        List[Location]
+            The path, including the start and the destination
+        """
+        distance, loc = self._entry(start)
+        if distance == UNREACHABLE:
+            return None
+        path = [start]
+        if loc != start:
+            path.append(loc)
+        while loc != self.destination:
+            code = self._directions[loc.x][loc.y]
+            loc = Location(loc.x + DX[code], loc.y + DY[code])
+            path.append(loc)
+        if start == self.destination:
+            path.append(start)
+        return path
+
+
+class FlowFieldCache:
+    """The flow fields of the most recently used destinations of a layout."""
+
+    def __init__(self, layout: Layout, size: int = 16) -> None:
+        """Create an empty cache for <layout>.
+
+        Parameters
+        ----------
+        layout : Layout
+            The layout, all fields are dropped when its version changes
+        size : int
+            The amount of destinations to keep
+        """
+        self.layout = layout
+        self.size = size
+        self.version = layout.version
+        self.fields: "OrderedDict[Location, FlowField]" = OrderedDict()
+        self.lock = Lock()
+
+    def __contains__(self, destination: Location):
+        with self.lock:
+            return self.version == self.layout.version and destination in self.fields
+
+    def get(self, destination: Location) -> FlowField:
+        """Get the field towards <destination>, computing it when needed."""
+        with self.lock:
+            if self.version != self.layout.version:
+                self.fields.clear()
+                self.version = self.layout.version
+            field = self.fields.get(destination)
+            if field is not None:
+                self.fields.move_to_end(destination)
+                return field
+        field = FlowField(self.layout.grid, destination)
+        with self.lock:
+            if self.version == self.layout.version:
+                self.fields[destination] = field
+                while len(self.fields) > self.size:
+                    self.fields.popitem(last=False)
+        return field
+
+    def clear(self):
+        """Drop all the fields."""
+        with self.lock:
+            self.fields.clear()
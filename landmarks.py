@@ -0,0 +1,115 @@
+"""Landmark (ALT) heuristic, exact distances to a few cells bound the rest."""
+from collections import deque
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from layout import Layout
+from util import Location
+
+UNREACHABLE = -1
+
+
+def bfs_distances(grid: List[List[int]], source: Location) -> np.ndarray:
+    """Get the amount of steps from <source> to every cell, -1 if unreachable."""
+    rows = len(grid)
+    columns = len(grid[0])
+    distances = np.full((rows, columns), UNREACHABLE, dtype=np.int32)
+    if grid[source.x][source.y] == 1:
+        return distances
+    found = [[False] * columns for _ in range(rows)]
+    found[source.x][source.y] = True
+    frontier = deque([(source.x, source.y, 0)])
+    while frontier:
+        x, y, dist = frontier.popleft()
+        distances[x, y] = dist
+        for nx, ny in ((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y)):
+            if 0 <= nx < rows and 0 <= ny < columns and not found[nx][ny]:
+                found[nx][ny] = True
+                if grid[nx][ny] != 1:
+                    frontier.append((nx, ny, dist + 1))
+    return distances
+
+
+class Landmarks:
+    """Distances from a set of landmark cells, kept per layout version."""
+
+    def __init__(self, layout: Layout, count: int = 8) -> None:
+        """Create the landmarks for <layout>, they are computed when needed.
+
+        Parameters
+        ----------
+        layout : Layout
+            The layout to compute the distances in
+        count : int
+            The amount of landmarks
+        """
+        self.layout = layout
+        self.count = count
+        self.version: Optional[int] = None
+        self.cells: List[Location] = []
+        self.distances = np.zeros((0, 0, 0), dtype=np.int32)
+
+    def refresh(self):
+        """Recompute the landmarks if the layout changed since the last time."""
+        if self.version != self.layout.version:
+            self.compute()
+        return self
+
+    def compute(self):
+        """Pick the landmarks by farthest point selection and store distances."""
+        grid = self.layout.grid
+        self.version = self.layout.version
+        self.cells = []
+        free = [
+            Location(x, y)
+            for x, row in enumerate(grid)
+            for y, value in enumerate(row)
+            if value != 1
+        ]
+        if not free:
+            self.distances = np.zeros((0, len(grid), len(grid[0])), dtype=np.int32)
+            return
+        # The first landmark is the cell farthest from the first free cell, at the
+        # edge of the part of the layout that cell reaches
+        seed = bfs_distances(grid, free[0])
+        candidate = Location(*np.unravel_index(np.argmax(seed), seed.shape))
+        distances = []
+        nearest = np.full(seed.shape, np.iinfo(np.int32).max, dtype=np.int64)
+        while len(distances) < self.count:
+            dist = bfs_distances(grid, candidate)
+            self.cells.append(candidate)
+            distances.append(dist)
+            nearest = np.where(dist >= 0, np.minimum(nearest, dist), nearest)
+            reachable = np.where(seed >= 0, nearest, -1)
+            best = Location(*np.unravel_index(np.argmax(reachable), reachable.shape))
+            if reachable[best.x, best.y] <= 0:
+                break
+            candidate = best
+        self.distances = np.stack(distances)
+
+    def table(self, finish: Location) -> np.ndarray:
+        """Lower bounds of the distance from every cell to <finish>.
+
+        The bound is the largest of the manhattan distance and the triangle
+        inequality |d(L, finish) - d(L, cell)| over the landmarks L.
+        """
+        self.refresh()
+        rows, columns = len(self.layout.grid), len(self.layout.grid[0])
+        x_index, y_index = np.indices((rows, columns))
+        bounds = np.abs(x_index - finish.x) + np.abs(y_index - finish.y)
+        if len(self.distances):
+            to_finish = self.distances[:, finish.x, finish.y][:, None, None]
+            valid = (self.distances >= 0) & (to_finish >= 0)
+            triangle = np.where(valid, np.abs(self.distances - to_finish), 0)
+            bounds = np.maximum(bounds, triangle.max(axis=0))
+        return bounds
+
+    def heuristic(self, finish: Location) -> Callable[[Location], int]:
+        """Create an A* heuristic towards <finish>."""
+        bounds = self.table(finish).tolist()
+
+        def distance(loc: Location):
+            return bounds[loc.x][loc.y]
+
+        return distance
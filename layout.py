@@ -0,0 +1,145 @@
+"""The factory layout the BOLT's drive in."""
+import base64
+import json
+import zlib
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# A logged edit: the version it created, the row, the column and the value
+Change = Tuple[int, int, int, int]
+
+
+def load_grid(path: str) -> List[List[int]]:
+    """Read a factory grid from a JSON file, a list of rows or {"maze": rows}.
+
+    Raises
+    ------
+    ValueError
+        When the grid is empty, not rectangular or has other values than ints
+    """
+    with open(path, encoding="utf-8") as file:
+        grid = json.load(file)
+    if isinstance(grid, dict):
+        grid = grid.get("maze")
+    if not (isinstance(grid, list) and grid and all(isinstance(row, list) for row in grid)):
+        raise ValueError(f"{path} has no grid")
+    if len({len(row) for row in grid}) != 1 or not grid[0]:
+        raise ValueError(f"The rows of {path} differ in length")
+    if not all(type(value) is int for row in grid for value in row):
+        raise ValueError(f"The cells of {path} have to be ints")
+    return grid
+
+
+class Layout:
+    """The factory grid, with a version that changes on every edit."""
+
+    def __init__(self, grid: List[List[int]], log_size: int = 1024) -> None:
+        """Wrap <grid>, the grid is edited in place.
+
+        Parameters
+        ----------
+        grid : List[List[int]]
+            The factory grid
+        log_size : int
+            The amount of edits to remember for changes_since
+        """
+        self.grid = grid
+        self.version: int = 0
+        self.changes: Deque[Change] = deque(maxlen=log_size)
+        # The oldest version the change log can bring up to date
+        self.log_start: int = 0
+        self._snapshot: Optional[Tuple[int, str]] = None
+
+    def set_cell(self, row: int, column: int, value: int):
+        """Set the value of a single cell, 1 is a wall and 0 is free.
+
+        Returns
+        -------
+        bool
+            If the cell changed and the version was increased
+        """
+        if self.grid[row][column] == value:
+            return False
+        self.grid[row][column] = value
+        self.version += 1
+        self._log(row, column, value)
+        return True
+
+    def set_cells(self, cells: Iterable[Tuple[int, int, int]]):
+        """Set the value of many cells as one edit, the version increases once.
+
+        Parameters
+        ----------
+        cells : Iterable[Tuple[int, int, int]]
+            The row, column and value per cell, a later value of a cell wins
+
+        Returns
+        -------
+        List[Tuple[int, int, int]]
+            The cells that changed, empty if the version stayed the same
+        """
+        latest: Dict[Tuple[int, int], int] = {}
+        for row, column, value in cells:
+            latest[(row, column)] = value
+        changed = [
+            (row, column, value)
+            for (row, column), value in latest.items()
+            if self.grid[row][column] != value
+        ]
+        if changed:
+            self.version += 1
+            for row, column, value in changed:
+                self.grid[row][column] = value
+                self._log(row, column, value)
+        return changed
+
+    def _log(self, row: int, column: int, value: int):
+        """Remember the edit of a cell in the current version."""
+        if len(self.changes) == self.changes.maxlen:
+            self.log_start = self.changes[0][0]
+        self.changes.append((self.version, row, column, value))
+
+    def changes_since(self, version: int) -> Optional[List[Change]]:
+        """Get the edits after <version>, None if the log does not go back that far.
+
+        Returns
+        -------
+        List[Tuple[int, int, int, int]]
+            The version, row, column and new value per edited cell
+        """
+        if version < self.log_start or version > self.version:
+            return None
+        return [change for change in self.changes if change[0] > version]
+
+    def snapshot(self):
+        """The grid as zlib compressed JSON in base64, computed once per version."""
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            data = zlib.compress(json.dumps(self.grid, separators=(",", ":")).encode(), 9)
+            self._snapshot = (self.version, base64.b64encode(data).decode("ascii"))
+        return self._snapshot[1]
+
+
+def rect_cells(row1: int, column1: int, row2: int, column2: int) -> Iterator[Tuple[int, int]]:
+    """All the cells of the rectangle with corners <row1>, <column1> and <row2>, <column2>."""
+    for row in range(min(row1, row2), max(row1, row2) + 1):
+        for column in range(min(column1, column2), max(column1, column2) + 1):
+            yield row, column
+
+
+def line_cells(points: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+    """All the cells on the polyline through <points>, by Bresenham per segment."""
+    if points:
+        yield points[0]
+    for (row, column), (row2, column2) in zip(points, points[1:]):
+        d_row, d_column = abs(row2 - row), -abs(column2 - column)
+        s_row = 1 if row < row2 else -1
+        s_column = 1 if column < column2 else -1
+        error = d_row + d_column
+        while (row, column) != (row2, column2):
+            if 2 * error >= d_column:
+                error += d_column
+                row += s_row
+            if 2 * error <= d_row:
+                error += d_row
+                column += s_column
+            yield row, column
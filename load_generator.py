@@ -0,0 +1,246 @@
+"""Simulate a fleet of virtual BOLT's against the API and report latencies."""
+import argparse
+import json
+import random
+import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+_ENDPOINT_PATTERNS = [
+    (re.compile(r"^/api/bolt/\d+/"), "/api/bolt/<code>/"),
+    (re.compile(r"^/api/nest/\d+"), "/api/nest/<code>"),
+]
+
+
+class FlaskClient:
+    """Send requests to the flask app in process via its test client."""
+
+    def __init__(self, app=None) -> None:
+        """Create a test client for <app>, defaults to the application."""
+        if app is None:
+            from application import app
+        self.client = app.test_client()
+
+    def get(self, url: str) -> Tuple[int, Any]:
+        """Do a GET request and return the status and decoded json body."""
+        resp = self.client.get(url)
+        return resp.status_code, resp.get_json(silent=True)
+
+    def request(self, method: str, url: str, body: Any = None) -> Tuple[int, Any, Dict[str, str]]:
+        """Do a request with an optional json <body>, also return the headers."""
+        resp = self.client.open(url, method=method, json=body)
+        return resp.status_code, resp.get_json(silent=True), dict(resp.headers)
+
+
+class HttpClient:
+    """Send requests to a (local) server over HTTP."""
+
+    def __init__(self, base_url: str, timeout: float = 10.0) -> None:
+        """Create a client for the server at <base_url>."""
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def get(self, url: str) -> Tuple[int, Any]:
+        """Do a GET request and return the status and decoded json body."""
+        status, body, _ = self.request("GET", url)
+        return status, body
+
+    def request(self, method: str, url: str, body: Any = None) -> Tuple[int, Any, Dict[str, str]]:
+        """Do a request with an optional json <body>, also return the headers."""
+        data = None if body is None else json.dumps(body).encode()
+        req = Request(self.base_url + url, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        try:
+            with urlopen(req, timeout=self.timeout) as resp:
+                content = resp.read()
+                status = resp.status
+                headers = dict(resp.headers)
+        except HTTPError as error:
+            return error.code, None, dict(error.headers)
+        try:
+            return status, json.loads(content), headers
+        except ValueError:
+            return status, None, headers
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the <pct> percentile of <values> using the nearest rank.
+
+    Parameters
+    ----------
+    values : List[float]
+        The measured values
+    pct : float
+        The percentile between 0 and 100
+
+    Returns
+    -------
+    float
+        The value at the percentile, 0.0 when there are no values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def endpoint_name(url: str) -> str:
+    """Group an url by its flask route, so ids don't create new endpoints."""
+    path = url.split("?", 1)[0]
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def summarize(samples: Dict[str, List[float]], elapsed: float):
+    """Create the report of the latencies in seconds, per endpoint.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        count, rps and the p50/p95/p99 latency in milliseconds per endpoint
+    """
+    report = {}
+    for endpoint, latencies in sorted(samples.items()):
+        report[endpoint] = {
+            "count": len(latencies),
+            "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        }
+    return report
+
+
+class LoadGenerator:
+    """Register virtual BOLT's and drive them through the command loop."""
+
+    def __init__(
+        self,
+        client,
+        bolts: int = 10,
+        nest_rate: float = 0.1,
+        goto_rate: float = 0.1,
+        workers: int = 8,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Create a load generator.
+
+        Parameters
+        ----------
+        client : FlaskClient | HttpClient
+            The client to send the requests with
+        bolts : int
+            The amount of virtual bolts
+        nest_rate : float
+            The chance per bolt per round to fire a nest request
+        goto_rate : float
+            The chance per bolt per round to fire a goto request
+        workers : int
+            The amount of requests in flight at the same time
+        """
+        self.client = client
+        self.bolts = bolts
+        self.nest_rate = nest_rate
+        self.goto_rate = goto_rate
+        self.workers = workers
+        self.random = random.Random(seed)
+        self.codes: List[int] = []
+        self.free_cells: List[Tuple[int, int]] = []
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+
+    def request(self, url: str):
+        """Send a single request and record its latency."""
+        start = perf_counter()
+        status, body = self.client.get(url)
+        latency = perf_counter() - start
+        endpoint = endpoint_name(url)
+        with self._lock:
+            self.samples[endpoint].append(latency)
+            if status >= 400:
+                self.errors[endpoint] += 1
+        return body
+
+    def setup(self):
+        """Register the virtual bolts and look up the free cells in the maze."""
+        self.codes = [self.request("/api/register") for _ in range(self.bolts)]
+        maze = self.request("/api/maze")["maze"]
+        self.free_cells = [
+            (x, y)
+            for x, row in enumerate(maze)
+            for y, value in enumerate(row)
+            if value == 0 and x < 10 and y < 10
+        ]
+
+    def round_urls(self) -> List[str]:
+        """Create the urls fired during a single round."""
+        urls = []
+        for code in self.codes:
+            urls.append(f"/api/bolt/{code}/command")
+            if self.random.random() < self.nest_rate:
+                x, y = self.random.choice(self.free_cells)
+                urls.append(f"/api/nest/{x}{y}")
+            if self.random.random() < self.goto_rate:
+                x, y = self.random.choice(self.free_cells)
+                urls.append(f"/api/bolt/{code}/goto?x={x}&y={y}")
+        self.random.shuffle(urls)
+        return urls
+
+    def run(self, rounds: int = 10):
+        """Run <rounds> rounds of traffic and return the report."""
+        if not self.codes:
+            self.setup()
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in range(rounds):
+                list(executor.map(self.request, self.round_urls()))
+        elapsed = perf_counter() - start
+        report = summarize(self.samples, elapsed)
+        for endpoint, errors in self.errors.items():
+            report[endpoint]["errors"] = errors
+        return report
+
+
+def print_report(report: Dict[str, Dict[str, float]]):
+    """Print the report as a table."""
+    print(
+        f"{'endpoint':<28}{'count':>8}{'rps':>10}{'p50 ms':>10}"
+        f"{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    )
+    for endpoint, row in report.items():
+        print(
+            f"{endpoint:<28}{row['count']:>8}{row['rps']:>10.1f}{row['p50']:>10.2f}"
+            f"{row['p95']:>10.2f}{row['p99']:>10.2f}{row.get('errors', 0):>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", help="Server to test, uses the test client if empty")
+    parser.add_argument("--bolts", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--nest-rate", type=float, default=0.1)
+    parser.add_argument("--goto-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    generator = LoadGenerator(
+        HttpClient(args.url) if args.url else FlaskClient(),
+        bolts=args.bolts,
+        nest_rate=args.nest_rate,
+        goto_rate=args.goto_rate,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    print_report(generator.run(rounds=args.rounds))
@@ -1,6 +1,8 @@
 # Verkregen van https://github.com/slevin886/maze_maker op 17/09/2021
 
-from typing import List
+from collections import deque
+from random import Random
+from typing import List, Set
 
 from maze_search import astar, depth_first_search
 from util import Location
@@ -108,6 +110,59 @@ class Maze:
         return pretty_printed
 
 
+def random_factory(rows=10, columns=10, barriers=0.4, seed=None):
+    """Create a random factory layout with <barriers> as the chance of a wall.
+
+    The corner at 0, 0 is always kept free, so it can be used as home base.
+    """
+    rng = Random(seed)
+    factory = [
+        [1 if rng.random() < barriers else 0 for _ in range(columns)]
+        for _ in range(rows)
+    ]
+    factory[0][0] = 0
+    return factory
+
+
+def reachable_cells(factory: List[List[int]], start=Location(0, 0)):
+    """Get all the free cells in <factory> that can be reached from <start>."""
+    maze = Maze(factory=factory, start=start, finish=start)
+    searched = {start}
+    frontier = deque([start])
+    while frontier:
+        for space in maze.frontier(frontier.popleft()):
+            if space not in searched:
+                searched.add(space)
+                frontier.append(space)
+    return searched
+
+
+def escape_path(factory: List[List[int]], start: Location, avoid: Set[Location]):
+    """The shortest path from <start> to the nearest free cell not in <avoid>.
+
+    Returns
+    -------
+    List[Location]
+        The path including <start>, None when every reachable cell is avoided
+    """
+    maze = Maze(factory=factory, start=start, finish=start)
+    parents = {start: None}
+    frontier = deque([start])
+    while frontier:
+        curr = frontier.popleft()
+        if curr not in avoid:
+            path = []
+            while curr is not None:
+                path.append(curr)
+                curr = parents[curr]
+            return path[::-1]
+        for space in maze.frontier(curr):
+            if space not in parents:
+                parents[space] = curr
+                frontier.append(space)
+    return None
+
+
 def manhattan_distance(finish: Location):
     def distance(loc: Location):
         xdistance = abs(loc.y - finish.y)
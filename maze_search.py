@@ -2,7 +2,8 @@
 
 from collections import deque
 from heapq import heappop, heappush
-from typing import Callable, List
+from time import monotonic
+from typing import Callable, Dict, List, Optional
 
 from util import Location
 
@@ -50,6 +51,7 @@ class Queue:
 class PriorityQueue:
     def __init__(self):
         self._container = []
+        self.peak = 0
 
     @property
     def empty(self):
@@ -57,10 +59,21 @@ class PriorityQueue:
 
     def push(self, item):
         heappush(self._container, item)
+        if len(self._container) > self.peak:
+            self.peak = len(self._container)
 
     def pop(self):
         return heappop(self._container)
 
+    def peek(self):
+        return self._container[0]
+
+    def __len__(self):
+        return len(self._container)
+
+    def __iter__(self):
+        return iter(self._container)
+
     def __repr__(self):
         return repr(self._container)
 
@@ -147,7 +160,19 @@ def astar(
     finish_line: Callable[[Location], bool],
     next_moves: Callable[[Location], List[Location]],
     heuristic: Callable[[Location], int],
+    stats: Optional[Dict[str, int]] = None,
+    cost: Optional[Callable[[Location, Location], float]] = None,
 ):
+    """
+    Algorithm for an A* search on class Maze
+    :param start: the Location to start the search from
+    :param finish_line: a function from class 'Maze' that checks if you reached the finish line
+    :param next_moves: a list of class Location for available next moves given a Location
+    :param heuristic: a function that estimates the remaining cost from a Location to the finish
+    :param stats: optional dict that is filled with the 'expanded' nodes and the 'frontier_peak' size
+    :param cost: optional function that gives the cost of a move between two Locations, 1 by default
+    :return: None if there is no maze solution or the path and all searched locations.
+    """
     frontier = PriorityQueue()
     frontier.push(Move(start, None, 0.0, heuristic(start)))
     searched = {start: 0.0}
@@ -158,10 +183,222 @@ def astar(
         full_search.append(active)
         if finish_line(active):
             final_path = get_path("A*:", loc)
+            if stats is not None:
+                stats["expanded"] = len(full_search)
+                stats["frontier_peak"] = frontier.peak
             return final_path[1:], full_search[1:-1]
         for space in next_moves(active):
-            new_cost = loc.cost + 1
+            new_cost = loc.cost + (1 if cost is None else cost(active, space))
             if space not in searched or searched[space] > new_cost:
                 searched[space] = new_cost
                 frontier.push(Move(space, loc, new_cost, heuristic(space)))
+    if stats is not None:
+        stats["expanded"] = len(full_search)
+        stats["frontier_peak"] = frontier.peak
     return None
+
+
+def bidirectional_search(
+    start: Location,
+    finish_line: Callable[[Location], bool],
+    next_moves: Callable[[Location], List[Location]],
+    heuristic: Optional[Callable[[Location], int]] = None,
+    stats: Optional[Dict[str, int]] = None,
+    finish: Optional[Location] = None,
+    reverse_heuristic: Optional[Callable[[Location], int]] = None,
+):
+    """
+    Algorithm for a bidirectional search on class Maze, searching from the start and the finish at the same time
+    Without heuristics this is a bidirectional breadth-first search, with them a bidirectional A* that uses the
+    average of both heuristics as potential, so the result is still the shortest path.
+    :param start: the Location to start the search from
+    :param finish_line: a function from class 'Maze' that checks if you reached the finish line
+    :param next_moves: a list of class Location for available next moves given a Location, moves have to be reversible
+    :param heuristic: optional function that estimates the remaining cost from a Location to the finish
+    :param stats: optional dict that is filled with the 'expanded' nodes and the 'frontier_peak' size
+    :param finish: the Location of the finish, where the backward search starts
+    :param reverse_heuristic: optional function that estimates the cost from the start to a Location
+    :return: None if there is no maze solution or the path and all searched locations.
+    """
+    if finish is None:
+        raise ValueError("A bidirectional search needs the finish location")
+    forward = heuristic or (lambda loc: 0)
+    backward = reverse_heuristic or (lambda loc: 0)
+
+    def potential(loc):
+        return (forward(loc) - backward(loc)) / 2
+
+    # Entries are (key, -cost, order, cost, location), ties go to the deepest node
+    frontiers = (PriorityQueue(), PriorityQueue())
+    costs = ({start: 0}, {finish: 0})
+    parents = ({start: None}, {finish: None})
+    closed = (set(), set())
+    signs = (1, -1)
+    order = 0
+    frontiers[0].push((potential(start), 0, order, 0, start))
+    frontiers[1].push((-potential(finish), 0, order, 0, finish))
+    best = 0 if finish_line(start) else float("inf")
+    meet = start if best == 0 else None
+    full_search = []
+    while not frontiers[0].empty and not frontiers[1].empty:
+        if frontiers[0].peek()[0] + frontiers[1].peek()[0] >= best:
+            break
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        _, _, _, cost, active = frontiers[side].pop()
+        if active in closed[side]:
+            continue
+        closed[side].add(active)
+        full_search.append(active)
+        side_costs = costs[side]
+        other_costs = costs[1 - side]
+        new_cost = cost + 1
+        for space in next_moves(active):
+            if space not in side_costs or side_costs[space] > new_cost:
+                side_costs[space] = new_cost
+                parents[side][space] = active
+                order += 1
+                key = new_cost + signs[side] * potential(space)
+                frontiers[side].push((key, -new_cost, order, new_cost, space))
+                other = other_costs.get(space)
+                if other is not None and new_cost + other < best:
+                    best = new_cost + other
+                    meet = space
+    if stats is not None:
+        stats["expanded"] = len(full_search)
+        stats["frontier_peak"] = frontiers[0].peak + frontiers[1].peak
+    if meet is None:
+        return None
+    final_path = []
+    loc = meet
+    while loc is not None:
+        final_path.append(loc)
+        loc = parents[0][loc]
+    final_path.reverse()
+    loc = parents[1][meet]
+    while loc is not None:
+        final_path.append(loc)
+        loc = parents[1][loc]
+    searched = [loc for loc in full_search if loc not in (start, finish)]
+    return final_path[1:-1], searched
+
+
+class AnytimeAStar:
+    """
+    Anytime Repairing A* (ARA*), a weighted A* search that is repeated with a decreasing weight
+    Every run reuses the costs of the previous one, so a first path is found fast and improved while time allows.
+    The search can be stopped at a deadline and continued later, for example in the background.
+    """
+
+    def __init__(
+        self,
+        start: Location,
+        finish_line: Callable[[Location], bool],
+        next_moves: Callable[[Location], List[Location]],
+        heuristic: Callable[[Location], int],
+        weights=(3.0, 2.0, 1.5, 1.25, 1.0),
+    ):
+        """
+        :param start: the Location to start the search from
+        :param finish_line: a function from class 'Maze' that checks if you reached the finish line
+        :param next_moves: a list of class Location for available next moves given a Location
+        :param heuristic: an admissible function that estimates the remaining cost from a Location to the finish
+        :param weights: the decreasing weights of the heuristic per run, end with 1.0 for the shortest path
+        """
+        self.finish_line = finish_line
+        self.next_moves = next_moves
+        self.heuristic = heuristic
+        self.weights = list(weights)
+        self.weight = self.weights.pop(0)
+        self.costs: Dict[Location, int] = {start: 0}
+        self.parents: Dict[Location, Optional[Location]] = {start: None}
+        self.open = PriorityQueue()
+        self.closed = set()
+        self.incons = set()
+        self.goal: Optional[Location] = start if finish_line(start) else None
+        self.path: Optional[List[Location]] = None
+        self.bound = float("inf")
+        self.finished = False
+        self.expanded = 0
+        self.order = 0
+        self._push(start)
+
+    def run(self, deadline: Optional[float] = None):
+        """
+        Improve the path until the monotonic clock passes <deadline>, or until it is the shortest
+        The search always continues until a first path is found.
+        :param deadline: a time.monotonic() timestamp, None to run until the path is the shortest
+        :return: the path between the start and the finish (both excluded, like astar) and its suboptimality bound,
+                 None and infinity if there is no path
+        """
+        while not self.finished and self._improve(deadline):
+            self._publish()
+            if not self.weights:
+                if self.weight <= 1.0:
+                    self.bound = 1.0
+                self.finished = True
+            else:
+                self._next_weight()
+            if deadline is not None and monotonic() >= deadline:
+                break
+        return self.path, self.bound
+
+    def _push(self, loc: Location):
+        self.order += 1
+        self.open.push((self.costs[loc] + self.weight * self.heuristic(loc), self.order, loc))
+
+    def _improve(self, deadline: Optional[float]):
+        """Run weighted A* until the path is found for the current weight, False when stopped early."""
+        goal_cost = float("inf") if self.goal is None else self.costs[self.goal]
+        while not self.open.empty and goal_cost > self.open.peek()[0]:
+            if self.path is not None and self.expanded % 64 == 0 and deadline is not None:
+                if monotonic() >= deadline:
+                    return False
+            _, _, active = self.open.pop()
+            if active in self.closed:
+                continue
+            self.closed.add(active)
+            self.expanded += 1
+            new_cost = self.costs[active] + 1
+            for space in self.next_moves(active):
+                if new_cost < self.costs.get(space, float("inf")):
+                    self.costs[space] = new_cost
+                    self.parents[space] = active
+                    if self.goal is None and self.finish_line(space):
+                        self.goal = space
+                    if space == self.goal:
+                        goal_cost = new_cost
+                    if space in self.closed:
+                        self.incons.add(space)
+                    else:
+                        self._push(space)
+        if self.goal is None:
+            # There is no path at all
+            self.finished = True
+            return False
+        return True
+
+    def _publish(self):
+        """Store the path of the run and its suboptimality bound."""
+        path = []
+        loc = self.parents[self.goal]
+        while loc is not None:
+            path.append(loc)
+            loc = self.parents[loc]
+        path.reverse()
+        self.path = path[1:]
+        pending = [loc for _, _, loc in self.open] + list(self.incons)
+        lowest = min((self.costs[loc] + self.heuristic(loc) for loc in pending), default=None)
+        if lowest is None or lowest <= 0:
+            self.bound = 1.0
+        else:
+            self.bound = max(1.0, min(self.weight, self.costs[self.goal] / lowest))
+
+    def _next_weight(self):
+        """Lower the weight and start a new run from the open and the inconsistent nodes."""
+        self.weight = self.weights.pop(0)
+        pending = {loc for _, _, loc in self.open} | self.incons
+        self.incons = set()
+        self.closed = set()
+        self.open = PriorityQueue()
+        for loc in pending:
+            self._push(loc)
@@ -0,0 +1,200 @@
+"""Light-weight metrics that can be exposed in the Prometheus text format."""
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _escape(value: object):
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra=""):
+    """Format the labels as {name="value",...}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float):
+    """Format a number the way Prometheus expects it."""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class of a metric, with children per combination of labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        """Create a metric with the given label names."""
+        self.name = name
+        self.description = description
+        self.label_names: Tuple[str, ...] = tuple(labels)
+        self._lock = Lock()
+
+    def header(self) -> List[str]:
+        """Return the HELP and TYPE lines of the metric."""
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> List[str]:
+        """Return the lines of the metric in the text format."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        """Create a counter."""
+        super().__init__(name, description, labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        """Increase the counter of the given label values by <amount>."""
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels: str):
+        """Get the current value of the counter for the given label values."""
+        return self.values.get(labels, 0)
+
+    def render(self):
+        """Return the lines of the counter in the text format."""
+        lines = self.header()
+        with self._lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            lines.append(
+                f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Metric):
+    """A value that is read from <callback> at the moment it is rendered.
+
+    The callback returns the value, or a dict with the label values as key.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        callback: Callable[[], object],
+        labels: Iterable[str] = (),
+    ):
+        """Create a gauge."""
+        super().__init__(name, description, labels)
+        self.callback = callback
+
+    def render(self):
+        """Return the lines of the gauge in the text format."""
+        lines = self.header()
+        value = self.callback()
+        values = value if isinstance(value, dict) else {(): value}
+        for labels, item in sorted(values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(item)}"
+            )
+        return lines
+
+
+class Histogram(Metric):
+    """Count observations in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ):
+        """Create a histogram with the upper bounds of the <buckets>."""
+        super().__init__(name, description, labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (float("inf"),)
+        self.counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, *labels: str):
+        """Add an observation for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.counts.get(labels)
+            if counts is None:
+                counts = self.counts[labels] = [0] * len(self.buckets)
+                self.sums[labels] = 0.0
+            counts[index] += 1
+            self.sums[labels] += value
+
+    def count(self, *labels: str):
+        """Get the amount of observations for the given label values."""
+        return sum(self.counts.get(labels, ()))
+
+    def render(self):
+        """Return the lines of the histogram in the text format."""
+        lines = self.header()
+        with self._lock:
+            items = [
+                (labels, list(counts), self.sums[labels])
+                for labels, counts in sorted(self.counts.items())
+            ]
+        for labels, counts, total_sum in items:
+            total = 0
+            for bound, count in zip(self.buckets, counts):
+                total += count
+                label_text = _format_labels(
+                    self.label_names, labels, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{label_text} {total}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{label_text} {total}")
+        return lines
+
+
+class Registry:
+    """A collection of metrics that are rendered together."""
+
+    def __init__(self) -> None:
+        """Create an empty registry."""
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric):
+        """Add a metric to the registry and return it."""
+        self.metrics.append(metric)
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Get a registered metric by its name."""
+        for metric in self.metrics:
+            if metric.name == name:
+                return metric
+        return None
+
+    def render(self):
+        """Render all the metrics in the Prometheus text format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,108 @@
+"""Plan many routes at once on a pool of worker processes."""
+import os
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from layout import Layout
+from routing import TURN_PENALTY, find_path
+from util import Location
+
+Job = Tuple[int, Location, Location]
+
+
+def _plan_chunk(grid: List[List[int]], engine: str, turn_penalty: float, jobs: List[Job]):
+    """Plan the routes of a chunk of jobs on <grid> in a worker process."""
+    return [
+        (code, plan_route(start, finish, grid, engine, turn_penalty))
+        for code, start, finish in jobs
+    ]
+
+
+def plan_route(
+    start: Location, finish: Location, grid, engine: str, turn_penalty: float = TURN_PENALTY
+):
+    """Find the path from <start> to <finish>, None if there is none."""
+    try:
+        return find_path(start, finish, grid, engine, turn_penalty=turn_penalty)
+    except ValueError:
+        return None
+
+
+class PlannerPool:
+    """A process pool that plans the routes on the layout sent with every chunk."""
+
+    def __init__(self, layout: Layout, workers: Optional[int] = None) -> None:
+        """Create the pool, the processes start when the first batch arrives.
+
+        Parameters
+        ----------
+        layout : Layout
+            The layout, the workers keep running when its version changes
+        workers : int
+            The amount of processes, the amount of cores by default
+        """
+        self.layout = layout
+        self.workers = workers or os.cpu_count() or 1
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # The copy of the grid of a layout version, the pool keeps planning on
+        # it while the layout is edited
+        self.grid: Optional[Tuple[int, List[List[int]]]] = None
+
+    def _executor(self):
+        """Get the executor, the processes start on the first call."""
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def _grid(self):
+        """Get the copy of the grid of the current layout version."""
+        version = self.layout.version
+        if self.grid is None or self.grid[0] != version:
+            self.grid = (version, [row[:] for row in self.layout.grid])
+        return self.grid[1]
+
+    def plan(
+        self, jobs: List[Job], engine: str, deadline: float, turn_penalty: float = TURN_PENALTY
+    ):
+        """Plan all <jobs> and gather the results until <deadline> seconds pass.
+
+        Every chunk of jobs carries the grid, <engine> and <turn_penalty>, so
+        the workers serve every layout version and routing config.
+
+        Returns
+        -------
+        Tuple[Dict[int, Optional[List[Location]]], List[int]]
+            The paths per bolt id, None when there is no path, and the ids
+            of the bolts that were not planned before the deadline
+        """
+        executor = self._executor()
+        grid = self._grid()
+        size = max(len(jobs) // (self.workers * 4), 1)
+        chunks = {}
+        for i in range(0, len(jobs), size):
+            chunk = jobs[i : i + size]
+            chunks[executor.submit(_plan_chunk, grid, engine, turn_penalty, chunk)] = chunk
+        end = monotonic() + deadline
+        pending = set(chunks)
+        results: Dict[int, Optional[List[Location]]] = {}
+        while pending:
+            done, pending = wait(
+                pending, timeout=max(end - monotonic(), 0), return_when=FIRST_EXCEPTION
+            )
+            for future in done:
+                results.update(future.result())
+            if monotonic() >= end:
+                break
+        missed = []
+        for future in pending:
+            future.cancel()
+            missed.extend(code for code, _, _ in chunks[future])
+        return results, missed
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        if self.executor is not None:
+            # plan cancels the chunks that missed the deadline, the running ones finish
+            self.executor.shutdown(wait=False)
+            self.executor = None
@@ -0,0 +1,89 @@
+"""Opt-in profiling of single requests, kept in a ring buffer."""
+import cProfile
+import io
+import marshal
+import pstats
+from collections import deque
+from itertools import count
+from random import random
+from threading import Lock
+from time import perf_counter, time
+from typing import Any, Dict, List, Optional
+
+
+class RequestProfiler:
+    """Profile requests with cProfile and keep the last results."""
+
+    def __init__(self, size: int = 50) -> None:
+        """Create a profiler that keeps the last <size> profiles."""
+        self.records: deque = deque(maxlen=size)
+        self._ids = count(1)
+        # Only one profiler can be active in a process at the same time
+        self._active = Lock()
+        self._started = 0.0
+
+    def start(self, forced: bool, percentage: float = 0.0):
+        """Start profiling if <forced> or sampled by <percentage>.
+
+        Returns
+        -------
+        Optional[cProfile.Profile]
+            The running profile, None if the request isn't profiled
+        """
+        if not forced and (percentage <= 0 or random() * 100 >= percentage):
+            return None
+        if not self._active.acquire(blocking=False):
+            return None
+        self._started = perf_counter()
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile: cProfile.Profile, request: Dict[str, Any], snapshot):
+        """Stop <profile> and store it with the request info and <snapshot>."""
+        profile.disable()
+        duration = perf_counter() - self._started
+        self._active.release()
+        profile.create_stats()
+        record = {
+            "id": next(self._ids),
+            "time": time(),
+            "duration": duration,
+            "request": request,
+            "snapshot": snapshot,
+            "stats": marshal.dumps(profile.stats),
+        }
+        self.records.append(record)
+        return record
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """List the stored profiles without their stats."""
+        return [
+            {key: value for key, value in record.items() if key != "stats"}
+            for record in list(self.records)
+        ]
+
+    def get(self, code: int) -> Optional[Dict[str, Any]]:
+        """Get a stored profile by its id."""
+        for record in list(self.records):
+            if record["id"] == code:
+                return record
+        return None
+
+
+class _StoredStats:
+    """Stats loaded from a record, in the shape pstats.Stats can read."""
+
+    def __init__(self, stats) -> None:
+        self.stats = stats
+
+    def create_stats(self):
+        """The stats are already created."""
+
+
+def stats_text(record: Dict[str, Any], limit: int = 30):
+    """Format the stats of a profile as text, sorted by cumulative time."""
+    stream = io.StringIO()
+    stats = pstats.Stats(_StoredStats(marshal.loads(record["stats"])), stream=stream)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
@@ -0,0 +1,107 @@
+"""Runtime reservations of the cells the BOLT's stand on and drive over."""
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set
+
+from util import Location
+
+
+class ReservationTable:
+    """The cells every bolt holds, its position and the segments it may drive.
+
+    A bolt only gets a waypoint when no other bolt holds a cell of the
+    segment towards it. Checking a cell is a single dict lookup.
+    """
+
+    def __init__(self, exempt: Iterable[Location] = (Location(0, 0),)) -> None:
+        """Create an empty table.
+
+        Parameters
+        ----------
+        exempt : Iterable[Location]
+            Cells that can be shared, like the home base all bolts start on
+        """
+        self.exempt = set(exempt)
+        self.holders: Dict[Location, int] = {}
+        self.claims: Dict[int, Set[Location]] = {}
+        self.waits: Dict[int, int] = {}
+        self.lock = Lock()
+
+    def conflict(self, code: int, cells: Iterable[Location]) -> Optional[int]:
+        """The id of another bolt holding one of <cells>, None if they are free."""
+        for loc in cells:
+            holder = self.holders.get(loc)
+            if holder is not None and holder != code:
+                return holder
+        return None
+
+    def grant(self, code: int, position: Location, legs: Iterable[List[Location]]):
+        """Let Bolt[<code>] hold <position> and the longest free prefix of <legs>.
+
+        The previous claim of the bolt is released. When nothing is granted
+        the bolt only holds <position> and the amount of times it waited goes
+        up, so it does not block the cells it already drove over.
+
+        Parameters
+        ----------
+        code : int
+            The id of the bolt
+        position : Location
+            The cell the bolt stands on
+        legs : Iterable[List[Location]]
+            The cells of every segment the bolt wants to drive, in order
+
+        Returns
+        -------
+        int
+            The amount of granted legs
+        """
+        with self.lock:
+            granted = []
+            for leg in legs:
+                if self.conflict(code, leg) is not None:
+                    break
+                granted.append(leg)
+            waits = self.waits.get(code, 0) + 1 if not granted else None
+            self._hold(code, {position} | {loc for leg in granted for loc in leg})
+            if waits is not None:
+                self.waits[code] = waits
+            return len(granted)
+
+    def hold(self, code: int, position: Location):
+        """Let Bolt[<code>] hold only <position>, the cell it stands on.
+
+        Used when its route ended, the cells it drove over are released.
+        """
+        with self.lock:
+            self._hold(code, {position})
+
+    def held_by_others(self, code: int) -> Set[Location]:
+        """All the cells other bolts hold, to route Bolt[<code>] around them."""
+        with self.lock:
+            return {loc for loc, holder in self.holders.items() if holder != code}
+
+    def release(self, code: int):
+        """Release all the cells of Bolt[<code>]."""
+        with self.lock:
+            self._release(code)
+            self.waits.pop(code, None)
+
+    def _hold(self, code: int, cells: Set[Location]):
+        self._release(code)
+        self.waits.pop(code, None)
+        claim = cells - self.exempt
+        for loc in claim:
+            self.holders[loc] = code
+        self.claims[code] = claim
+
+    def _release(self, code: int):
+        for loc in self.claims.pop(code, ()):
+            if self.holders.get(loc) == code:
+                del self.holders[loc]
+
+    def clear(self):
+        """Release every cell."""
+        with self.lock:
+            self.holders.clear()
+            self.claims.clear()
+            self.waits.clear()
@@ -0,0 +1,212 @@
+"""Compact storage of the routes the BOLT's are driving."""
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from util import Location
+
+# Directions in the order of Maze.frontier: up, left, right, down
+DX = (-1, 0, 0, 1)
+DY = (0, -1, 1, 0)
+
+
+def direction(dx: int, dy: int):
+    """Get the direction code of a straight move over <dx>, <dy>."""
+    if dx and dy:
+        raise ValueError("A segment has to be a straight line")
+    if dx:
+        return 0 if dx < 0 else 3
+    return 1 if dy < 0 else 2
+
+
+class Route:
+    """A route as run-length encoded segments, with a cursor to the next one.
+
+    Every segment is packed as length << 2 | direction in a single array.
+    """
+
+    __slots__ = ("segments", "counter", "x", "y", "remaining", "end", "lease")
+
+    def __init__(self, start: Location, waypoints: List[Location]) -> None:
+        """Encode the route from <start> along the straight <waypoints>."""
+        self.segments = array("I")
+        self.counter: int = 0
+        self.x: int = start.x
+        self.y: int = start.y
+        self.remaining: int = 0
+        self.lease: Optional[Dict[str, float]] = None
+        prev = start
+        for loc in waypoints:
+            dx = loc.x - prev.x
+            dy = loc.y - prev.y
+            length = abs(dx) + abs(dy)
+            self.segments.append(length << 2 | direction(dx, dy))
+            self.remaining += length
+            prev = loc
+        self.end: Location = prev
+
+    def __len__(self):
+        """The total amount of waypoints, the reached ones included."""
+        return len(self.segments)
+
+    def position(self):
+        """The last reached waypoint, or the start of the route."""
+        return Location(self.x, self.y)
+
+    def next_waypoint(self):
+        """The waypoint the bolt has to drive to next."""
+        segment = self.segments[self.counter]
+        length = segment >> 2
+        return Location(
+            self.x + DX[segment & 3] * length, self.y + DY[segment & 3] * length
+        )
+
+    def advance(self, amount: int = 1):
+        """Mark the next <amount> waypoints as reached."""
+        for segment in self.segments[self.counter : self.counter + amount]:
+            length = segment >> 2
+            self.x += DX[segment & 3] * length
+            self.y += DY[segment & 3] * length
+            self.remaining -= length
+        self.counter = min(self.counter + amount, len(self.segments))
+
+    @property
+    def finished(self):
+        """If all the waypoints are reached."""
+        return self.counter >= len(self.segments)
+
+    def waypoints(self, amount: Optional[int] = None) -> Iterator[Location]:
+        """Expand the next <amount> waypoints, all remaining ones by default."""
+        end = len(self.segments) if amount is None else self.counter + amount
+        x, y = self.x, self.y
+        for segment in self.segments[self.counter : end]:
+            length = segment >> 2
+            x += DX[segment & 3] * length
+            y += DY[segment & 3] * length
+            yield Location(x, y)
+
+    def cells(self, amount: Optional[int] = None) -> Iterator[Location]:
+        """Expand every cell of the next <amount> waypoints, all by default."""
+        end = len(self.segments) if amount is None else self.counter + amount
+        x, y = self.x, self.y
+        for segment in self.segments[self.counter : end]:
+            step_x, step_y = DX[segment & 3], DY[segment & 3]
+            for _ in range(segment >> 2):
+                x += step_x
+                y += step_y
+                yield Location(x, y)
+
+    def legs(self, amount: Optional[int] = None) -> Iterator[List[Location]]:
+        """The cells of each of the next <amount> segments, its waypoint last."""
+        end = len(self.segments) if amount is None else self.counter + amount
+        x, y = self.x, self.y
+        for segment in self.segments[self.counter : end]:
+            step_x, step_y = DX[segment & 3], DY[segment & 3]
+            leg = []
+            for _ in range(segment >> 2):
+                x += step_x
+                y += step_y
+                leg.append(Location(x, y))
+            yield leg
+
+    def destination(self):
+        """The last waypoint of the route."""
+        return self.end
+
+
+class RouteStore:
+    """The in-flight routes per bolt id.
+
+    The store keeps a reverse index from every cell to the bolts that still
+    have to cross it, so an edit of the maze finds the affected routes.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty store."""
+        self.routes: Dict[int, Route] = {}
+        self.index: Dict[Location, Set[int]] = {}
+
+    def set(self, code: int, start: Location, waypoints: List[Location]):
+        """Store the route of Bolt[<code>], replacing its current route.
+
+        Parameters
+        ----------
+        code : int
+            The id of the bolt
+        start : Location
+            The position the bolt starts from
+        waypoints : List[Location]
+            The optimized path, every waypoint in a straight line from the last
+        """
+        self._remove(code)
+        if not waypoints:
+            return None
+        route = self.routes[code] = Route(start, waypoints)
+        for loc in route.cells():
+            self.index.setdefault(loc, set()).add(code)
+        return route
+
+    def advance(self, code: int, amount: int = 1):
+        """Mark the next <amount> waypoints of Bolt[<code>] as reached.
+
+        The route is removed when all its waypoints are reached.
+
+        Returns
+        -------
+        Route
+            The route of the bolt
+        """
+        route = self.routes[code]
+        self._unindex(code, route.cells(amount))
+        route.advance(amount)
+        if route.finished:
+            del self.routes[code]
+        return route
+
+    def crossing(self, cells: Iterable[Location]) -> Set[int]:
+        """The ids of the bolts whose remaining route crosses one of <cells>."""
+        codes: Set[int] = set()
+        for loc in cells:
+            codes.update(self.index.get(loc, ()))
+        return codes
+
+    def _remove(self, code: int):
+        """Remove the route of Bolt[<code>] and its cells from the index."""
+        route = self.routes.pop(code, None)
+        if route is not None:
+            self._unindex(code, route.cells())
+
+    def _unindex(self, code: int, cells: Iterable[Location]):
+        """Remove Bolt[<code>] from the index of <cells>."""
+        for loc in cells:
+            codes = self.index.get(loc)
+            if codes is not None:
+                codes.discard(code)
+                if not codes:
+                    del self.index[loc]
+
+    def get(self, code: int) -> Optional[Route]:
+        """Get the route of Bolt[<code>], None if it has no route."""
+        return self.routes.get(code)
+
+    def __contains__(self, code: int):
+        return code in self.routes
+
+    def __delitem__(self, code: int):
+        if code not in self.routes:
+            raise KeyError(code)
+        self._remove(code)
+
+    def __len__(self):
+        return len(self.routes)
+
+    def __iter__(self):
+        return iter(list(self.routes))
+
+    def clear(self):
+        """Remove all the routes."""
+        self.routes.clear()
+        self.index.clear()
+
+    def pending_waypoints(self):
+        """The total amount of waypoints that are not reached yet."""
+        return sum(len(route) - route.counter for route in list(self.routes.values()))
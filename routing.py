@@ -0,0 +1,73 @@
+"""Find a path on a factory grid with one of the search engines.
+
+Only the searches are imported here, so the planner processes can find paths
+without importing the flask application.
+"""
+from typing import Callable, Dict, List, Optional
+
+from maze_maker import Maze, manhattan_distance
+from maze_search import astar, bidirectional_search
+from travel_time import travel_time_search
+from util import Location
+
+ENGINES = ("astar", "bidirectional", "travel_time")
+# The cost of a turn of the travel_time engine, next to the cell costs
+TURN_PENALTY = 2.0
+
+
+def find_path(
+    start: Location,
+    finish: Location,
+    grid: List[List[int]],
+    engine: str = "astar",
+    heuristic: Callable[[Location], Callable[[Location], float]] = manhattan_distance,
+    turn_penalty: float = TURN_PENALTY,
+    stats: Optional[Dict[str, int]] = None,
+) -> List[Location]:
+    """Find the shortest path from <start> to <finish> on <grid>.
+
+    Parameters
+    ----------
+    engine : str
+        astar, bidirectional or travel_time
+    heuristic : Callable[[Location], Callable[[Location], float]]
+        Gives the A* heuristic towards a location
+    turn_penalty : float
+        The cost per turn of the travel_time engine
+    stats : Dict[str, int]
+        Filled with the statistics of the search
+
+    Returns
+    -------
+    List[Location]
+        The path, including the start and the finish
+
+    Raises
+    ------
+    ValueError
+        When there is no path or the engine is unknown
+    """
+    stats = {} if stats is None else stats
+    m = Maze(factory=grid, start=start, finish=finish)
+    if engine == "bidirectional":
+        result = bidirectional_search(
+            m.start,
+            m.finish_line,
+            m.frontier,
+            heuristic(m.finish),
+            stats,
+            finish=m.finish,
+            reverse_heuristic=heuristic(m.start),
+        )
+    elif engine == "astar":
+        result = astar(m.start, m.finish_line, m.frontier, heuristic(m.finish), stats)
+    elif engine == "travel_time":
+        result = travel_time_search(m, turn_penalty, stats)
+        result = None if result is None else (result, None)
+    else:
+        raise ValueError(f"Unknown routing engine {engine}")
+    if result is None:
+        raise ValueError(f"No path from {start} to {finish}")
+    final_astar, _ = result
+    final_astar.append(m.finish)
+    return [start] + final_astar
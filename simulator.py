@@ -0,0 +1,283 @@
+"""Discrete-event simulator to compare dispatch policies without real time."""
+import argparse
+import json
+from collections import deque
+from heapq import heappop, heappush
+from random import Random
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from application import factory_layout, find_path, get_bolt, optimize_path
+from bolt import Bolt, Swarm
+from maze_maker import random_factory, reachable_cells
+from util import Location
+
+HOME = Location(0, 0)
+
+# Event kinds, arrivals are handled before bolts finishing at the same tick
+ARRIVAL = 0
+FINISHED = 1
+
+
+class Task(NamedTuple):
+    """A request for a bolt at <x>, <y> arriving at <time>."""
+
+    time: int
+    x: int
+    y: int
+
+
+def nearest_policy(swarm: Swarm, task: Task, layout):
+    """Dispatch the nearest idle bolt, the same way /api/nest does.
+
+    /api/nest passes over the bolts on or next to the task, one of those is
+    dispatched when no other bolt is idle.
+    """
+    code = get_bolt(task.x, task.y, swarm=swarm, layout=layout)
+    if code:
+        return code
+    for bolt in swarm.bolts:
+        steps = abs(bolt.position["x"] - task.x) + abs(bolt.position["y"] - task.y)
+        if not bolt.is_busy() and steps <= 1:
+            return bolt.id
+    return 0
+
+
+def first_idle_policy(swarm: Swarm, task: Task, layout):
+    """Dispatch the idle bolt that was registered first."""
+    for bolt in swarm.bolts:
+        if not bolt.is_busy():
+            return bolt.id
+    return 0
+
+
+POLICIES: Dict[str, Callable[[Swarm, Task, List[List[int]]], int]] = {
+    "nearest": nearest_policy,
+    "first_idle": first_idle_policy,
+}
+
+
+def generate_trace(
+    layout, tasks=100, interval=5.0, seed=None, home: Location = HOME
+) -> List[Task]:
+    """Create a trace of tasks with poisson arrivals on reachable cells.
+
+    Parameters
+    ----------
+    tasks : int
+        The amount of tasks in the trace
+    interval : float
+        The mean amount of ticks between two arrivals
+    """
+    rng = Random(seed)
+    cells = sorted(reachable_cells(layout, home) - {home})
+    time = 0.0
+    trace = []
+    for _ in range(tasks):
+        time += rng.expovariate(1 / interval)
+        cell = rng.choice(cells)
+        trace.append(Task(time=int(time), x=cell.x, y=cell.y))
+    return trace
+
+
+def load_trace(file_name: str) -> List[Task]:
+    """Load a trace from a json file with a list of [time, x, y] items."""
+    with open(file_name, encoding="UTF8") as f:
+        return [Task(*item) for item in json.load(f)]
+
+
+class Simulation:
+    """Simulate a single shift of a swarm working through a trace."""
+
+    def __init__(
+        self,
+        trace: List[Task],
+        policy: Callable[[Swarm, Task, List[List[int]]], int],
+        bolts: int = 5,
+        layout=factory_layout,
+        turn_time: int = 1,
+    ) -> None:
+        """Create the simulation.
+
+        Parameters
+        ----------
+        trace : List[Task]
+            The task arrivals, sorted by time
+        policy : Callable
+            Picks the id of the bolt for a task, 0 if no bolt is available
+        bolts : int
+            The amount of bolts in the swarm, they all start at home
+        turn_time : int
+            The extra ticks a bolt needs for every segment of its route
+        """
+        self.trace = trace
+        self.policy = policy
+        self.layout = layout
+        self.turn_time = turn_time
+        self.swarm = Swarm()
+        for _ in range(bolts):
+            self.swarm.register_bolt(Bolt())
+        self.now = 0
+        self.events: List[Tuple[int, int, int, object]] = []
+        self.sequence = 0
+        self.pending = deque()
+        self.busy_since: Dict[int, int] = {}
+        self.busy_time = 0
+        self.completion_times: List[int] = []
+        self.occupied: Dict[int, Dict[Location, int]] = {}
+        self.pruned_until = 0
+        self.conflicts = 0
+
+    def schedule(self, time: int, kind: int, data):
+        """Add an event to the event queue."""
+        self.sequence += 1
+        heappush(self.events, (time, kind, self.sequence, data))
+
+    def dispatch(self):
+        """Assign pending tasks, in order of arrival, to the idle bolts."""
+        waiting = deque()
+        while self.pending and any(not bolt.is_busy() for bolt in self.swarm.bolts):
+            task = self.pending.popleft()
+            code = self.policy(self.swarm, task, self.layout)
+            if code:
+                self.start_task(self.swarm.get_bolt_by_id(code), task)
+            else:
+                waiting.append(task)
+        waiting.extend(self.pending)
+        self.pending = waiting
+
+    def start_task(self, bolt: Bolt, task: Task):
+        """Send <bolt> to the location of <task>."""
+        pos = bolt.position
+        duration = 0
+        if (pos["x"], pos["y"]) != (task.x, task.y):
+            route = find_path(pos["x"], pos["y"], task.x, task.y, layout=self.layout)
+            duration = len(route) - 1 + len(optimize_path(route)) * self.turn_time
+            self.reserve(bolt.id, route)
+        bolt.set_next_move(x=task.x, y=task.y)
+        self.busy_since[bolt.id] = self.now
+        if duration == 0:
+            # The bolt is already there, it can't be dispatched twice this tick
+            self.finish_task(bolt.id, task)
+        else:
+            self.schedule(self.now + duration, FINISHED, (bolt.id, task))
+
+    def reserve(self, code: int, route: List[Location]):
+        """Mark the cells of <route> per step, and count the collisions."""
+        for tick, loc in enumerate(route[1:], start=self.now + 1):
+            cells = self.occupied.setdefault(tick, {})
+            if cells.get(loc, code) != code:
+                self.conflicts += 1
+            cells[loc] = code
+
+    def prune(self):
+        """Forget the occupied cells of the ticks that have passed."""
+        for tick in range(self.pruned_until, self.now + 1):
+            self.occupied.pop(tick, None)
+        self.pruned_until = self.now + 1
+
+    def finish_task(self, code: int, task: Task):
+        """Let bolt <code> arrive at the location of <task>."""
+        bolt = self.swarm.get_bolt_by_id(code)
+        bolt.set_position(x=task.x, y=task.y)
+        self.busy_time += self.now - self.busy_since.pop(code)
+        self.completion_times.append(self.now - task.time)
+
+    def run(self):
+        """Run the simulation until no events are left, return the results.
+
+        The tasks no bolt was dispatched to are counted as unfinished.
+        """
+        for task in self.trace:
+            self.schedule(task.time, ARRIVAL, task)
+        while self.events:
+            self.now, kind, _, data = heappop(self.events)
+            if kind == ARRIVAL:
+                self.pending.append(data)
+            else:
+                self.finish_task(*data)
+            self.prune()
+            self.dispatch()
+        return self.results()
+
+    def results(self):
+        """Calculate the statistics of the finished simulation."""
+        duration = max(self.now, 1)
+        capacity = duration * len(self.swarm.bolts)
+        done = len(self.completion_times)
+        return {
+            "tasks": done,
+            "unfinished": len(self.pending),
+            "duration": self.now,
+            "throughput": done / duration,
+            "mean_completion_time": sum(self.completion_times) / done if done else 0.0,
+            "idle_ratio": 1 - self.busy_time / capacity if capacity else 0.0,
+            "conflicts": self.conflicts,
+        }
+
+
+def compare_policies(
+    policies: List[str],
+    shifts: int = 10,
+    bolts: int = 5,
+    tasks: int = 100,
+    interval: float = 5.0,
+    layout=None,
+    seed: Optional[int] = None,
+):
+    """Run every policy on the same generated shifts and average the results.
+
+    When no layout is given, the factory layout is used for every shift.
+    """
+    totals: Dict[str, Dict[str, float]] = {name: {} for name in policies}
+    rng = Random(seed)
+    for _ in range(shifts):
+        shift_seed = rng.random()
+        trace = generate_trace(
+            layout or factory_layout, tasks=tasks, interval=interval, seed=shift_seed
+        )
+        for name in policies:
+            simulation = Simulation(
+                trace, POLICIES[name], bolts=bolts, layout=layout or factory_layout
+            )
+            for key, value in simulation.run().items():
+                totals[name][key] = totals[name].get(key, 0) + value
+    return {
+        name: {key: value / shifts for key, value in total.items()}
+        for name, total in totals.items()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES))
+    parser.add_argument("--shifts", type=int, default=10)
+    parser.add_argument("--bolts", type=int, default=5)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--size", type=int, help="Use a random square floor")
+    parser.add_argument("--trace", help="Json file with [time, x, y] tasks")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    floor = random_factory(args.size, args.size, 0.25, args.seed) if args.size else None
+    if args.trace:
+        result = {
+            name: Simulation(
+                load_trace(args.trace),
+                POLICIES[name],
+                bolts=args.bolts,
+                layout=floor or factory_layout,
+            ).run()
+            for name in args.policies
+        }
+    else:
+        result = compare_policies(
+            args.policies,
+            shifts=args.shifts,
+            bolts=args.bolts,
+            tasks=args.tasks,
+            interval=args.interval,
+            layout=floor,
+            seed=args.seed,
+        )
+    print(json.dumps(result, indent=2))
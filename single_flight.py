@@ -0,0 +1,68 @@
+"""Share the work of identical requests that are handled at the same time."""
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """A computation in flight and its outcome."""
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Run a function once per key for all the callers that overlap in time.
+
+    Only calls in flight are shared, a call for a key that already finished
+    runs the function again.
+    """
+
+    def __init__(self) -> None:
+        """Create a group without calls in flight."""
+        self.calls: Dict[Hashable, _Call] = {}
+        self.lock = Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Call <function>, or wait for the call in flight with the same <key>.
+
+        Parameters
+        ----------
+        key : Hashable
+            What makes two calls identical
+        function : Callable[[], Any]
+            The computation, its exception is raised in every caller
+
+        Returns
+        -------
+        Tuple[Any, bool]
+            The result and if it was shared from another caller
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+            else:
+                call.waiters += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = function()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+    def __len__(self):
+        with self.lock:
+            return len(self.calls)
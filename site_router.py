@@ -0,0 +1,178 @@
+"""Serve several halls, one application process per site behind a local router.
+
+Every site process has its own layout, swarm, paths and caches, so planning
+in one hall never waits on another. The router forwards
+/sites/<site>/<path> to /<path> of the site, for example
+/sites/hall1/api/nest/23 to /api/nest/23 of hall1. The dashboard of a site
+loads its files from absolute URLs like /static/js/..., those go to the site
+of the page that refers to them.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from flask import Flask, Response, abort, jsonify, request
+
+APPLICATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "application.py")
+METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+# Headers of a single connection, they are not forwarded
+HOP_BY_HOP = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+}
+
+
+def referring_site(referer: str) -> Optional[str]:
+    """The site of the page at <referer>, None if it is no page of a site."""
+    parts = urlsplit(referer).path.split("/")
+    if len(parts) >= 3 and parts[1] == "sites" and parts[2]:
+        return parts[2]
+    return None
+
+
+def create_router(sites: Dict[str, str], timeout: float = 30.0) -> Flask:
+    """Create the flask app that forwards the requests per site.
+
+    Parameters
+    ----------
+    sites : Dict[str, str]
+        The base url of the server per site name
+    timeout : float
+        Seconds to wait for a site to answer
+    """
+    # No static folder, /static/... belongs to the sites
+    router = Flask(__name__, static_folder=None)
+
+    @router.route("/sites")
+    def list_sites():
+        """List the names of the sites."""
+        return jsonify(sorted(sites))
+
+    @router.route("/sites/<site>/", defaults={"path": ""}, methods=METHODS)
+    @router.route("/sites/<site>/<path:path>", methods=METHODS)
+    def forward(site: str, path: str):
+        """Forward the request to <path> of <site> and return its answer."""
+        base_url = sites.get(site)
+        if base_url is None:
+            abort(404)
+        url = f"{base_url}/{path}"
+        if request.query_string:
+            url += "?" + request.query_string.decode("latin-1")
+        forwarded = Request(url, data=request.get_data() or None, method=request.method)
+        for name, value in request.headers:
+            if name.lower() not in HOP_BY_HOP:
+                forwarded.add_header(name, value)
+        try:
+            with urlopen(forwarded, timeout=timeout) as resp:
+                status, headers, body = resp.status, resp.headers.items(), resp.read()
+        except HTTPError as error:
+            status, headers, body = error.code, error.headers.items(), error.read()
+        except (URLError, OSError):
+            abort(502)
+        headers = [(name, value) for name, value in headers if name.lower() not in HOP_BY_HOP]
+        return Response(body, status=status, headers=headers)
+
+    @router.route("/<path:path>", methods=METHODS)
+    def forward_referred(path: str):
+        """Forward a request from a page of a site, like /static/..., to that site."""
+        site = referring_site(request.headers.get("Referer", ""))
+        if site is None:
+            abort(404)
+        return forward(site, path)
+
+    return router
+
+
+def start_sites(layouts: Dict[str, str], first_port: int):
+    """Start an application process per site, on consecutive local ports.
+
+    Parameters
+    ----------
+    layouts : Dict[str, str]
+        The JSON layout file per site name
+    first_port : int
+        The port of the first site
+
+    Returns
+    -------
+    Tuple[Dict[str, str], List[subprocess.Popen]]
+        The base url per site and the processes
+    """
+    sites: Dict[str, str] = {}
+    processes: List[subprocess.Popen] = []
+    for port, (site, layout) in enumerate(sorted(layouts.items()), start=first_port):
+        env = dict(
+            os.environ,
+            ROLLENBOLLEN_SITE=site,
+            ROLLENBOLLEN_LAYOUT=os.path.abspath(layout),
+            ROLLENBOLLEN_HOST="127.0.0.1",
+            ROLLENBOLLEN_PORT=str(port),
+        )
+        processes.append(
+            subprocess.Popen(
+                [sys.executable, APPLICATION], env=env, cwd=os.path.dirname(APPLICATION)
+            )
+        )
+        sites[site] = f"http://127.0.0.1:{port}"
+    return sites, processes
+
+
+def parse_pairs(pairs: List[str]) -> Dict[str, str]:
+    """Turn name=value arguments into a dict."""
+    result: Dict[str, str] = {}
+    for pair in pairs:
+        name, sep, value = pair.partition("=")
+        if not sep or not name or not value:
+            raise ValueError(f"Expected <site>=<value>, got {pair}")
+        result[name] = value
+    return result
+
+
+def stop_sites(processes: List[subprocess.Popen], timeout: float = 5.0):
+    """Stop the site processes."""
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(args: argparse.Namespace) -> Tuple[Flask, List[subprocess.Popen]]:
+    """Start the local sites and create the router for them and the remote ones."""
+    sites, processes = start_sites(parse_pairs(args.site), args.site_port)
+    sites.update(parse_pairs(args.remote))
+    return create_router(sites), processes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--site", action="append", default=[], help="<site>=<layout.json>, started locally"
+    )
+    parser.add_argument(
+        "--remote", action="append", default=[], help="<site>=<url> of a running site process"
+    )
+    parser.add_argument("--port", type=int, default=80)
+    parser.add_argument("--site-port", type=int, default=8100, help="Port of the first site")
+    arguments = parser.parse_args()
+
+    site_router, site_processes = run(arguments)
+    try:
+        site_router.run(port=arguments.port, host="0.0.0.0", threaded=True)
+    finally:
+        stop_sites(site_processes)
@@ -0,0 +1,142 @@
+"""Static files kept in memory, precompressed and with content hash ETags."""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, List, Mapping, NamedTuple, Optional
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Build files with a content hash before the extension never change, like
+# main.0123abcd.chunk.js, runtime-main.7d072426.js and logo.6ce24c58.svg
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8}(\.chunk)?\.\w+(\.map)?$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESSIBLE = re.compile(r"^(text/|application/(javascript|json|xml|manifest\+json)|image/svg)")
+# Smaller files are not worth the compression headers
+MIN_COMPRESS_SIZE = 256
+
+
+class Asset(NamedTuple):
+    """A file with its compressed variants per content encoding."""
+
+    body: bytes
+    mimetype: str
+    digest: str
+    cache_control: str
+    encodings: Dict[str, bytes]
+
+    def etag(self, encoding: Optional[str] = None):
+        """The ETag of the variant in <encoding>, every variant has its own."""
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+def load_asset(path: str, name: str) -> Asset:
+    """Read the file at <path> and compress it once."""
+    with open(path, "rb") as f:
+        body = f.read()
+    mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    encodings = {}
+    if COMPRESSIBLE.match(mimetype) and len(body) >= MIN_COMPRESS_SIZE:
+        encodings["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            encodings["br"] = brotli.compress(body)
+        encodings = {key: value for key, value in encodings.items() if len(value) < len(body)}
+    return Asset(
+        body=body,
+        mimetype=mimetype,
+        digest=hashlib.sha256(body).hexdigest()[:16],
+        cache_control=IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE,
+        encodings=encodings,
+    )
+
+
+def accepted_encodings(header: str) -> List[str]:
+    """The content encodings of an Accept-Encoding header that are not q=0."""
+    accepted = []
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+class AssetBundle:
+    """All files below a few folders, loaded once into memory."""
+
+    def __init__(self, roots: Dict[str, str]) -> None:
+        """Load every file below <roots>, the first root wins for a name.
+
+        Parameters
+        ----------
+        roots : Dict[str, str]
+            The folder per name prefix, a missing folder is skipped
+        """
+        self.roots = roots
+        self.assets: Dict[str, Asset] = {}
+        self.load()
+
+    def load(self):
+        """(Re)load all the files from disk."""
+        assets: Dict[str, Asset] = {}
+        for prefix, root in self.roots.items():
+            for folder, _, files in os.walk(root):
+                for file in files:
+                    path = os.path.join(folder, file)
+                    name = prefix + os.path.relpath(path, root).replace(os.sep, "/")
+                    if name not in assets:
+                        assets[name] = load_asset(path, name)
+        self.assets = assets
+
+    def get(self, name: str) -> Optional[Asset]:
+        """Get the asset <name>, the prefix of its root and its path in the root."""
+        return self.assets.get(name)
+
+    def response(self, name: str, headers: Mapping[str, str]) -> Optional[Response]:
+        """Create the response for asset <name>, None if there is no such asset.
+
+        Parameters
+        ----------
+        name : str
+            The name of the asset
+        headers : Mapping[str, str]
+            The request headers, for If-None-Match and Accept-Encoding
+        """
+        asset = self.get(name)
+        if asset is None:
+            return None
+        accepted = accepted_encodings(headers.get("Accept-Encoding", ""))
+        encoding = None
+        for coding in ("br", "gzip"):
+            if coding in asset.encodings and coding in accepted:
+                encoding = coding
+                break
+        response_headers = {
+            "ETag": asset.etag(encoding),
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        # The client has the same content in any of the variants
+        variants = {asset.etag()} | {asset.etag(coding) for coding in asset.encodings}
+        if_none_match = {tag.strip() for tag in headers.get("If-None-Match", "").split(",")}
+        if "*" in if_none_match or variants & if_none_match:
+            return Response(status=304, headers=response_headers)
+        if encoding is None:
+            return Response(asset.body, mimetype=asset.mimetype, headers=response_headers)
+        response_headers["Content-Encoding"] = encoding
+        return Response(
+            asset.encodings[encoding], mimetype=asset.mimetype, headers=response_headers
+        )
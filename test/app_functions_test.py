@@ -58,6 +58,11 @@ class TestAppFunctions(unittest.TestCase):
         result = optimize_path(path=path)
         exp_res = [Location(x=0, y=3), Location(x=2, y=3), Location(x=2, y=0)]
         self.assertEqual(result, exp_res)
+        # Turning back is a waypoint too
+        path = [Location(x=3, y=5), Location(x=4, y=5), Location(x=3, y=5), Location(x=3, y=6)]
+        exp_res = [Location(x=4, y=5), Location(x=3, y=5), Location(x=3, y=6)]
+        self.assertEqual(optimize_path(path=path), exp_res)
+        self.assertEqual(optimize_path(path=[Location(x=1, y=1), Location(x=1, y=1)]), [])
 
     def test_get_path(self):
         swarm = Swarm()
@@ -0,0 +1,103 @@
+import json
+import socket
+import threading
+import unittest
+from http.client import HTTPConnection
+from io import StringIO
+
+from application import app, factory_layout
+from async_server import AsyncWSGIServer, ServerThread, parse_head
+
+
+class TestAsyncServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ServerThread(app, workers=4)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.stop()
+
+    def setUp(self) -> None:
+        self.connection = HTTPConnection("127.0.0.1", self.server.port, timeout=10)
+        self.request("GET", "/api/reset")
+
+    def tearDown(self) -> None:
+        self.request("GET", "/api/reset")
+        self.connection.close()
+
+    def request(self, method, url, body=None):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        data = json.dumps(body) if body is not None else None
+        self.connection.request(method, url, body=data, headers=headers)
+        resp = self.connection.getresponse()
+        return resp.status, resp.read(), resp
+
+    def test_parse_head(self):
+        head = b"GET /api?x=1 HTTP/1.1\r\nHost: a\r\nX-Profile:  1\r\n\r\n"
+        exp_res = ("GET", "/api?x=1", "HTTP/1.1", [("Host", "a"), ("X-Profile", "1")])
+        self.assertEqual(parse_head(head), exp_res)
+        self.assertIsNone(parse_head(b"GET /api\r\n\r\n"))
+        self.assertIsNone(parse_head(b"GET /api HTTP/1.1\r\nno colon\r\n\r\n"))
+
+    def test_keep_alive(self):
+        status, body, _ = self.request("GET", "/api/maze")
+        self.assertEqual((status, json.loads(body)), (200, {"maze": factory_layout}))
+        sock = self.connection.sock
+        self.assertEqual(json.loads(self.request("GET", "/api/register")[1]), 1)
+        moves = {"moves": [{"bolt": 1, "x": 0, "y": 3}]}
+        status, body, resp = self.request("POST", "/api/goto", moves)
+        self.assertEqual((status, json.loads(body)["paths"][0]["bolt"]), (200, 1))
+        self.assertEqual(resp.getheader("Connection"), "keep-alive")
+        self.assertEqual(self.request("GET", "/api/bolt/1/command?n=x")[0], 400)
+        self.assertEqual(self.request("GET", "/api/nothing")[0], 404)
+        # All requests went over the same connection
+        self.assertIs(self.connection.sock, sock)
+
+    def test_bad_request(self):
+        with socket.create_connection(("127.0.0.1", self.server.port), timeout=10) as sock:
+            sock.sendall(b"NONSENSE\r\n\r\n")
+            self.assertTrue(sock.recv(1024).startswith(b"HTTP/1.1 400 Bad Request"))
+        with socket.create_connection(("127.0.0.1", self.server.port), timeout=10) as sock:
+            sock.sendall(b"GET /api HTTP/1.1\r\nConnection: close\r\n\r\n")
+            data = b""
+            while True:
+                chunk = sock.recv(1024)
+                if not chunk:
+                    break
+                data += chunk
+            self.assertIn(b"Connection: close", data)
+            self.assertTrue(data.endswith(b'"Welkom bij de API"\n'))
+
+    def test_many_connections(self):
+        threads = threading.active_count()
+        sockets = []
+        try:
+            for _ in range(200):
+                sock = socket.create_connection(("127.0.0.1", self.server.port), timeout=10)
+                sock.sendall(b"GET /api HTTP/1.1\r\n\r\n")
+                sockets.append(sock)
+            for sock in sockets:
+                self.assertTrue(sock.recv(1024).startswith(b"HTTP/1.1 200 OK"))
+            self.assertGreaterEqual(self.server.server.connections, 200)
+            # The open connections do not hold a thread each
+            self.assertLessEqual(threading.active_count(), threads + 4)
+        finally:
+            for sock in sockets:
+                sock.close()
+
+    def test_app_error(self):
+        def broken_app(environ, start_response):
+            raise RuntimeError("broken")
+
+        server = AsyncWSGIServer(broken_app, workers=1)
+        errors = StringIO()
+        status, _, body = server.call_app({"wsgi.errors": errors})
+        server.shutdown()
+        self.assertEqual((status, body), ("500 Internal Server Error", b""))
+        self.assertIn("RuntimeError: broken", errors.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
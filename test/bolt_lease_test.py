@@ -0,0 +1,57 @@
+import unittest
+from time import monotonic
+
+from app_server_test import handle_client_request
+from application import app, paths, reservations, swarm
+
+
+class TestBoltLeases(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+        for _ in range(3):
+            self.client.get(f"{self.API}/register")
+
+    def tearDown(self) -> None:
+        app.config["BOLT_LEASE_SECONDS"] = 300
+        app.config["RESERVATIONS_ENABLED"] = False
+        self.client.get(f"{self.API}/reset")
+
+    def test_evict_expired_bolts(self):
+        app.config["RESERVATIONS_ENABLED"] = True
+        self.client.get(f"{self.API}/bolt/2/goto?x=2&y=0")
+        self.client.get(f"{self.API}/bolt/2/command?n=1")
+        self.assertIn(2, reservations.claims)
+        swarm.renew(2, now=monotonic() - 60)
+        for code in (1, 3):
+            swarm.renew(code)
+        app.config["BOLT_LEASE_SECONDS"] = 30
+        resp = self.client.get(f"{self.API}/bolt/2/command")
+        self.assertEqual(resp.status_code, 404)
+        self.assertNotIn(2, paths)
+        self.assertNotIn(2, reservations.claims)
+        bolts = handle_client_request(self.client.get(f"{self.API}/bolt"))
+        self.assertEqual([bolt["id"] for bolt in bolts], [1, 3])
+        # The id of the evicted bolt is given to the next registration
+        self.assertEqual(handle_client_request(self.client.get(f"{self.API}/register")), 2)
+        resp = handle_client_request(self.client.get(f"{self.API}/bolt/2/command"))
+        self.assertEqual(resp, {"x": 0, "y": 0})
+
+    def test_lease_disabled(self):
+        app.config["BOLT_LEASE_SECONDS"] = None
+        for code in (1, 2, 3):
+            swarm.heartbeats[code] = -1e9
+        self.client.get(f"{self.API}/bolt")
+        self.assertEqual(len(swarm.bolts), 3)
+
+    def test_batch_goto_unknown_bolt(self):
+        swarm.evict(2)
+        moves = [{"bolt": 2, "x": 0, "y": 3}]
+        resp = self.client.post(f"{self.API}/goto", json={"moves": moves})
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -79,3 +79,42 @@ class TestSwarm(unittest.TestCase):
         self.assertNotEqual(bolt, self.swarm.get_bolt_by_id(1))
         self.swarm.register_bolt(bolt)
         self.assertEqual(bolt, self.swarm.get_bolt_by_id(2))
+
+    def test_method_get_bolt_unknown(self):
+        self.swarm.register_bolt(Bolt())
+        self.assertIsNone(self.swarm.get_bolt(0))
+        self.assertIsNone(self.swarm.get_bolt_by_id(2))
+
+    def test_method_evict_expired(self):
+        bolts = [Bolt() for _ in range(3)]
+        for now, bolt in enumerate(bolts):
+            self.swarm.register_bolt(bolt, now=now)
+        self.assertTrue(self.swarm.renew(1, now=10))
+        self.assertEqual(self.swarm.evict_expired(5, now=6.5), [2])
+        self.assertEqual(self.swarm.evict_expired(5, now=6.5), [])
+        self.assertEqual(self.swarm.bolts, [bolts[0], bolts[2]])
+        self.assertIsNone(self.swarm.get_bolt_by_id(2))
+        self.assertFalse(self.swarm.renew(2))
+        self.assertEqual(self.swarm.evict_expired(5, now=20), [3, 1])
+        self.assertEqual(self.swarm.bolts, [])
+
+    def test_method_register_bolt_reuses_ids(self):
+        for _ in range(3):
+            self.swarm.register_bolt(Bolt())
+        self.swarm.evict(3)
+        self.swarm.evict(2)
+        self.assertEqual(self.swarm.register_bolt(Bolt()), 2)
+        self.assertEqual(self.swarm.register_bolt(Bolt()), 3)
+        self.assertEqual(self.swarm.register_bolt(Bolt()), 4)
+        self.assertEqual(self.swarm.counter, 4)
+        self.assertEqual(len(self.swarm.index), 4)
+
+    def test_method_reset(self):
+        for _ in range(3):
+            self.swarm.register_bolt(Bolt())
+        self.swarm.evict(2)
+        self.swarm.reset()
+        self.assertEqual(self.swarm.bolts, [])
+        self.assertFalse(self.swarm.renew(3))
+        self.assertEqual(self.swarm.register_bolt(Bolt()), 1)
+        self.assertEqual(self.swarm.register_bolt(Bolt()), 2)
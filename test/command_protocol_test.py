@@ -0,0 +1,71 @@
+import unittest
+
+from application import app
+from app_server_test import handle_client_request
+
+
+class TestCommandProtocol(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.reset()
+
+    def tearDown(self) -> None:
+        self.reset()
+
+    def reset(self):
+        self.client.get(f"{self.API}/reset")
+
+    def client_register(self, number=1):
+        for _ in range(number):
+            self.client.get(f"{self.API}/register")
+
+    def test_api_bolt_command_lease(self):
+        self.client_register()
+        code = 1
+        self.client.get(f"{self.API}/bolt/{code}/goto?x=4&y=3")
+
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/command?n=2")
+        )
+        self.assertEqual(resp["waypoints"], [{"x": 0, "y": 4}, {"x": 2, "y": 4}])
+        self.assertEqual(resp["counter"], 0)
+        self.assertEqual(resp["remaining"], 4)
+        retry = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/command?n=2")
+        )
+        self.assertEqual(retry["lease"], resp["lease"])
+
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/command?n=all")
+        )
+        self.assertEqual(len(resp["waypoints"]), 2)
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/ack?lease={resp['lease']}&done=2")
+        )
+        self.assertEqual(resp, {"counter": 2, "remaining": 2})
+
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/command?n=all")
+        )
+        self.assertEqual(resp["waypoints"], [{"x": 2, "y": 3}, {"x": 4, "y": 3}])
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/ack?lease={resp['lease']}&done=2")
+        )
+        self.assertEqual(resp, {"counter": 4, "remaining": 0})
+        resp = handle_client_request(self.client.get(f"{self.API}/bolt/{code}"))
+        self.assertEqual(resp["position"], {"x": 4, "y": 3})
+
+    def test_api_bolt_ack(self):
+        self.client_register()
+        code = 1
+        self.client.get(f"{self.API}/bolt/{code}/goto?x=4&y=3")
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/{code}/command?n=1")
+        )
+        self.client.get(f"{self.API}/bolt/{code}/goto?x=2&y=0")
+        result = self.client.get(f"{self.API}/bolt/{code}/ack?lease={resp['lease']}&done=1")
+        self.assertEqual(result.status_code, 409)
+        result = self.client.get(f"{self.API}/bolt/{code}/ack?lease=a&done=1")
+        self.assertEqual(result.status_code, 400)
@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+
+from app_server_test import handle_client_request
+from application import app, demand, flow_fields, paths
+from demand import DemandHeatmap, assign_sites, k_median, median_sites
+from util import Location
+
+
+class TestDemandHeatmap(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.heatmap = DemandHeatmap(half_life=10.0, size=2, clock=lambda: self.now)
+
+    def test_decay(self):
+        self.heatmap.record(Location(0, 1))
+        self.now = 10.0
+        self.heatmap.record(Location(0, 1))
+        self.heatmap.record(Location(2, 2))
+        self.assertEqual(self.heatmap.weights(), {Location(0, 1): 1.5, Location(2, 2): 1.0})
+        self.now = 30.0
+        self.assertEqual(self.heatmap.weights(), {Location(0, 1): 0.375, Location(2, 2): 0.25})
+
+    def test_size(self):
+        self.heatmap.record(Location(0, 1), weight=3)
+        self.heatmap.record(Location(0, 2))
+        self.heatmap.record(Location(0, 3), weight=2)
+        self.assertEqual(set(self.heatmap.weights()), {Location(0, 1), Location(0, 3)})
+        self.heatmap.clear()
+        self.assertEqual(self.heatmap.weights(), {})
+
+
+class TestKMedian(unittest.TestCase):
+    def test_k_median(self):
+        # Demand on a line at 0, 1 and 9, the candidate sites are 0 to 9
+        points = np.array([0, 1, 9])
+        costs = np.abs(points[:, None] - np.arange(10)[None, :]).astype(float)
+        self.assertEqual(k_median(costs, np.array([1.0, 1.0, 1.0]), 1), [1])
+        self.assertEqual(sorted(k_median(costs, np.array([1.0, 2.0, 5.0]), 2)), [1, 9])
+        self.assertEqual(k_median(costs, np.ones(3), 0), [])
+        self.assertEqual(len(k_median(costs, np.ones(3), 20)), 10)
+
+    def test_median_sites(self):
+        grid = [[0, 0, 0], [1, 1, 0], [0, 0, 0]]
+        demand = {Location(0, 0): 1.0, Location(2, 0): 1.0, Location(1, 2): 1.0}
+        # By the walls the corners are 6 steps apart, not 2
+        self.assertEqual(median_sites(grid, demand, 1), [Location(1, 2)])
+        self.assertEqual(set(median_sites(grid, demand, 3)), set(demand))
+        self.assertEqual(median_sites(grid, {}, 2), [])
+
+    def test_assign_sites(self):
+        bolts = {1: Location(0, 0), 2: Location(0, 5), 3: Location(9, 9)}
+        sites = [Location(0, 4), Location(0, 1)]
+
+        def distance(start, site):
+            if start == Location(9, 9):
+                return -1
+            return abs(start.x - site.x) + abs(start.y - site.y)
+
+        exp_res = {1: Location(0, 1), 2: Location(0, 4)}
+        self.assertEqual(assign_sites(bolts, sites, distance), exp_res)
+
+
+class TestPreposition(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+        for _ in range(2):
+            self.client.get(f"{self.API}/register")
+
+    def tearDown(self) -> None:
+        self.client.get(f"{self.API}/reset")
+
+    def test_api_preposition(self):
+        self.assertEqual(
+            handle_client_request(self.client.get(f"{self.API}/preposition")),
+            {"sites": [], "moves": []},
+        )
+        for _ in range(3):
+            demand.record(Location(0, 9))
+        demand.record(Location(9, 0))
+        resp = handle_client_request(self.client.get(f"{self.API}/preposition"))
+        self.assertEqual(resp["sites"], [{"x": 0, "y": 9}, {"x": 9, "y": 0}])
+        self.assertEqual(
+            sorted((move["x"], move["y"]) for move in resp["moves"]), [(0, 9), (9, 0)]
+        )
+        self.assertEqual(len(paths), 2)
+        self.assertNotIn(Location(0, 9), flow_fields)
+        # The bolts are on their way and no longer idle
+        resp = handle_client_request(self.client.get(f"{self.API}/preposition"))
+        self.assertEqual(resp["moves"], [])
+
+    def test_demand_from_requests(self):
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=0")
+        self.client.get(f"{self.API}/nest/23")
+        self.assertEqual(set(demand.weights()), {Location(2, 0), Location(2, 3)})
+
+
+if __name__ == "__main__":
+    unittest.main()
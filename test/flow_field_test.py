@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from application import calc_dist, factory_layout, find_path
+from flow_field import FlowField, FlowFieldCache, wavefront
+from landmarks import bfs_distances
+from layout import Layout
+from maze_maker import random_factory, reachable_cells
+from util import Location
+
+
+class TestFlowField(unittest.TestCase):
+    def test_wavefront(self):
+        grid = random_factory(20, 20, 0.3, seed=2)
+        for destination in sorted(reachable_cells(grid))[::40]:
+            result = wavefront(np.array(grid) != 1, destination)
+            self.assertTrue((result == bfs_distances(grid, destination)).all())
+
+    def test_path(self):
+        grid = random_factory(20, 20, 0.3, seed=3)
+        cells = sorted(reachable_cells(grid))
+        for destination in cells[::50]:
+            field = FlowField(grid, destination)
+            for start in cells[::17]:
+                path = field.path(start)
+                exp_res = find_path(start.x, start.y, destination.x, destination.y, layout=grid)
+                self.assertEqual(len(path), len(exp_res))
+                self.assertEqual((path[0], path[-1]), (start, destination))
+                for a, b in zip(path[1:], path[2:]):
+                    self.assertEqual(abs(a.x - b.x) + abs(a.y - b.y), 1)
+                    self.assertNotEqual(grid[b.x][b.y], 1)
+
+    def test_edge_cases(self):
+        grid = [[0, 1, 0], [0, 1, 0], [0, 1, 1]]
+        field = FlowField(grid, Location(0, 0))
+        self.assertEqual(field.path(Location(0, 0)), [Location(0, 0), Location(0, 0)])
+        self.assertIsNone(field.path(Location(0, 2)))
+        self.assertEqual(field.distance(Location(0, 2)), -1)
+        # A bolt on a wall drives off it like A* does
+        self.assertEqual(field.distance(Location(1, 1)), 2)
+        self.assertEqual(
+            field.path(Location(1, 1)), [Location(1, 1), Location(1, 0), Location(0, 0)]
+        )
+
+    def test_calc_dist(self):
+        cells = sorted(reachable_cells(factory_layout))
+        for destination in cells[::7]:
+            field = FlowField(factory_layout, destination)
+            for start in cells:
+                exp_res = calc_dist({"x": start.x, "y": start.y}, destination.x, destination.y)
+                self.assertEqual(max(field.distance(start) - 1, 0), exp_res)
+
+
+class TestFlowFieldCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = Layout([row[:] for row in factory_layout])
+        self.cache = FlowFieldCache(self.layout, size=2)
+
+    def test_lru(self):
+        first = self.cache.get(Location(0, 0))
+        self.cache.get(Location(2, 0))
+        self.assertIs(self.cache.get(Location(0, 0)), first)
+        self.cache.get(Location(3, 3))
+        self.assertIn(Location(0, 0), self.cache)
+        self.assertNotIn(Location(2, 0), self.cache)
+
+    def test_layout_change(self):
+        field = self.cache.get(Location(2, 0))
+        self.assertEqual(field.distance(Location(0, 0)), 10)
+        self.layout.set_cell(1, 0, 0)
+        self.assertNotIn(Location(2, 0), self.cache)
+        self.assertEqual(self.cache.get(Location(2, 0)).distance(Location(0, 0)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
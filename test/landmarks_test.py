@@ -0,0 +1,71 @@
+import unittest
+
+from application import app, factory_layout, find_path, landmarks, maze_layout
+from landmarks import Landmarks, bfs_distances
+from layout import Layout
+from maze_maker import Maze, random_factory, reachable_cells
+from maze_search import astar
+from util import Location
+
+
+class TestLandmarks(unittest.TestCase):
+    def test_bfs_distances(self):
+        grid = [[0, 1, 0], [0, 0, 0], [1, 1, 0]]
+        result = bfs_distances(grid, Location(0, 0)).tolist()
+        self.assertEqual(result, [[0, -1, 4], [1, 2, 3], [-1, -1, 4]])
+
+    def test_admissible(self):
+        grid = random_factory(20, 20, 0.3, seed=4)
+        alt = Landmarks(Layout(grid), count=4)
+        cells = sorted(reachable_cells(grid))
+        for finish in cells[::25]:
+            exact = bfs_distances(grid, finish)
+            bounds = alt.table(finish)
+            for loc in cells:
+                self.assertLessEqual(bounds[loc.x, loc.y], exact[loc.x, loc.y])
+
+    def test_fewer_expansions(self):
+        grid = [[0] * 12 for _ in range(12)]
+        for x in range(11):
+            grid[x][6] = 1
+        alt = Landmarks(Layout(grid), count=4)
+        start, finish = Location(0, 0), Location(0, 11)
+        m = Maze(factory=grid, start=start, finish=finish)
+        manhattan_stats, alt_stats = {}, {}
+        path, _ = astar(
+            m.start, m.finish_line, m.frontier, lambda loc: abs(loc.x) + abs(loc.y - 11), manhattan_stats
+        )
+        alt_path, _ = astar(m.start, m.finish_line, m.frontier, alt.heuristic(finish), alt_stats)
+        self.assertEqual(len(path), len(alt_path))
+        self.assertLess(alt_stats["expanded"], manhattan_stats["expanded"])
+
+    def test_refresh(self):
+        layout = Layout([[0, 0, 0], [0, 0, 0], [0, 0, 0]])
+        alt = Landmarks(layout, count=2).refresh()
+        self.assertEqual(alt.version, 0)
+        self.assertEqual(len(alt.cells), 2)
+        layout.set_cell(1, 1, 1)
+        self.assertEqual(alt.table(Location(0, 0))[2, 2], 4)
+        self.assertEqual(alt.version, 1)
+
+
+class TestLandmarkRouting(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        app.config["ROUTING_HEURISTIC"] = "landmarks"
+
+    def tearDown(self) -> None:
+        app.config["ROUTING_HEURISTIC"] = "manhattan"
+
+    def test_find_path(self):
+        result = find_path(0, 0, 4, 3)
+        app.config["ROUTING_HEURISTIC"] = "manhattan"
+        self.assertEqual(len(result), len(find_path(0, 0, 4, 3)))
+
+    def test_maze_edit_refreshes(self):
+        old = factory_layout[0][6]
+        self.client.get(f"/api/maze?x=6&y=0&v={1 - old}")
+        self.assertEqual(landmarks.version, maze_layout.version)
+        self.client.get(f"/api/maze?x=6&y=0&v={old}")
+        self.assertEqual(landmarks.version, maze_layout.version)
@@ -0,0 +1,178 @@
+import base64
+import json
+import os
+import tempfile
+import unittest
+import zlib
+
+from app_server_test import handle_client_request
+from application import app, maze_layout
+from layout import Layout, line_cells, load_grid, rect_cells
+
+
+class TestLayoutChanges(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = Layout([[0, 0, 0], [0, 1, 0]], log_size=3)
+
+    def test_changes_since(self):
+        self.layout.set_cell(0, 1, 1)
+        self.layout.set_cell(1, 1, 0)
+        self.assertEqual(self.layout.changes_since(0), [(1, 0, 1, 1), (2, 1, 1, 0)])
+        self.assertEqual(self.layout.changes_since(1), [(2, 1, 1, 0)])
+        self.assertEqual(self.layout.changes_since(2), [])
+        self.assertIsNone(self.layout.changes_since(3))
+
+    def test_log_size(self):
+        for column in range(3):
+            self.layout.set_cell(0, column, 1)
+        self.assertEqual(len(self.layout.changes_since(0)), 3)
+        self.layout.set_cell(1, 0, 1)
+        self.assertIsNone(self.layout.changes_since(0))
+        self.assertEqual(self.layout.changes_since(1), [(2, 0, 1, 1), (3, 0, 2, 1), (4, 1, 0, 1)])
+
+    def test_snapshot(self):
+        snapshot = self.layout.snapshot()
+        grid = json.loads(zlib.decompress(base64.b64decode(snapshot)))
+        self.assertEqual(grid, [[0, 0, 0], [0, 1, 0]])
+        self.assertIs(self.layout.snapshot(), snapshot)
+        self.layout.set_cell(0, 0, 1)
+        grid = json.loads(zlib.decompress(base64.b64decode(self.layout.snapshot())))
+        self.assertEqual(grid[0][0], 1)
+
+    def test_set_cells(self):
+        changed = self.layout.set_cells([(0, 0, 1), (1, 1, 1), (0, 0, 2), (0, 2, 1)])
+        self.assertEqual(changed, [(0, 0, 2), (0, 2, 1)])
+        self.assertEqual(self.layout.version, 1)
+        self.assertEqual(self.layout.changes_since(0), [(1, 0, 0, 2), (1, 0, 2, 1)])
+        self.assertEqual(self.layout.set_cells([(0, 0, 2)]), [])
+        self.assertEqual(self.layout.version, 1)
+
+    def test_shapes(self):
+        self.assertEqual(list(rect_cells(1, 2, 0, 1)), [(0, 1), (0, 2), (1, 1), (1, 2)])
+        exp_res = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1)]
+        self.assertEqual(list(line_cells([(0, 0), (0, 2), (2, 2), (2, 1)])), exp_res)
+        exp_res = [(0, 0), (1, 1), (1, 2), (2, 3), (2, 4)]
+        self.assertEqual(list(line_cells([(0, 0), (2, 4)])), exp_res)
+
+    def test_load_grid(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "hall.json")
+            for content, exp_res in (
+                ([[0, 1], [0, 0]], [[0, 1], [0, 0]]),
+                ({"maze": [[0, 0, 1]]}, [[0, 0, 1]]),
+            ):
+                with open(path, "w") as file:
+                    json.dump(content, file)
+                self.assertEqual(load_grid(path), exp_res)
+            for content in ([], {"grid": [[0]]}, [[0, 1], [0]], [[0, "1"]], [[]]):
+                with open(path, "w") as file:
+                    json.dump(content, file)
+                self.assertRaises(ValueError, load_grid, path)
+
+
+class TestMazeDelta(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+
+    def tearDown(self) -> None:
+        self.client.get(f"{self.API}/maze?x=9&y=3&v=0")
+
+    def test_api_get_maze_since(self):
+        resp = self.client.get(f"{self.API}/maze")
+        version = int(resp.headers["X-Layout-Version"])
+        self.assertEqual(version, maze_layout.version)
+        self.client.get(f"{self.API}/maze?x=9&y=3&v=1")
+        self.client.get(f"{self.API}/maze?x=9&y=3&v=2")
+        resp = handle_client_request(self.client.get(f"{self.API}/maze?since={version}"))
+        exp_res = {"version": version + 2, "changes": [{"x": 9, "y": 3, "v": 2}]}
+        self.assertEqual(resp, exp_res)
+
+    def test_api_get_maze_snapshot(self):
+        self.client.get(f"{self.API}/maze?x=9&y=3&v=1")
+        resp = handle_client_request(self.client.get(f"{self.API}/maze?since=999999"))
+        self.assertEqual(resp["encoding"], "zlib+base64")
+        grid = json.loads(zlib.decompress(base64.b64decode(resp["snapshot"])))
+        self.assertEqual(grid, maze_layout.grid)
+        self.assertEqual(grid[3][9], 1)
+        self.assertEqual(self.client.get(f"{self.API}/maze?since=x").status_code, 400)
+
+
+class TestMazeBulkEdit(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+
+    def tearDown(self) -> None:
+        self.edit(
+            [{"rect": [5, 3, 9, 3], "v": 0}, {"cells": [[9, 2], [2, 2], [1, 2]], "v": 0}]
+        )
+        self.client.get(f"{self.API}/reset")
+
+    def edit(self, edits):
+        return self.client.post(f"{self.API}/maze/edit", json={"edits": edits})
+
+    def test_api_edit_maze(self):
+        version = maze_layout.version
+        resp = self.edit([{"rect": [7, 3, 9, 3], "v": 1}, {"line": [[5, 3], [7, 3]], "v": 2}])
+        self.assertEqual(handle_client_request(resp), {"version": version + 1, "changed": 5})
+        self.assertEqual(resp.headers["X-Layout-Version"], str(version + 1))
+        self.assertEqual(maze_layout.grid[3][5:], [2, 2, 2, 1, 1])
+        changes = maze_layout.changes_since(version)
+        self.assertEqual({change[0] for change in changes}, {version + 1})
+
+    def test_api_edit_maze_replans_crossing_routes(self):
+        for _ in range(2):
+            self.client.get(f"{self.API}/register")
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=0")
+        self.client.get(f"{self.API}/bolt/2/goto?x=0&y=9")
+        leases = [
+            handle_client_request(self.client.get(f"{self.API}/bolt/{code}/command?n=1"))
+            for code in (1, 2)
+        ]
+        self.edit([{"cells": [[2, 2]], "v": 1}, {"cells": [[9, 2]], "v": 1}])
+        # Bolt 1 still drives its leased waypoint, the new path starts behind it
+        resp = handle_client_request(self.client.get(f"{self.API}/bolt/1/command?n=all"))
+        self.assertEqual(resp["lease"], leases[0]["lease"])
+        self.assertEqual(resp["waypoints"], leases[0]["waypoints"])
+        self.client.get(f"{self.API}/bolt/1/ack?lease={resp['lease']}&done=1")
+        resp = handle_client_request(self.client.get(f"{self.API}/bolt/1/command?n=all"))
+        self.assertNotEqual(resp["lease"], leases[0]["lease"])
+        self.assertNotIn({"x": 2, "y": 2}, resp["waypoints"])
+        self.assertEqual(resp["waypoints"][-1], {"x": 2, "y": 0})
+        # The route of bolt 2 does not cross the edited cells and keeps its lease
+        resp = handle_client_request(self.client.get(f"{self.API}/bolt/2/command?n=1"))
+        self.assertEqual(resp["lease"], leases[1]["lease"])
+
+    def test_api_edit_maze_acked_lease(self):
+        self.client.get(f"{self.API}/register")
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=0")
+        lease = handle_client_request(self.client.get(f"{self.API}/bolt/1/command?n=3"))
+        self.client.get(f"{self.API}/bolt/1/ack?lease={lease['lease']}&done=1")
+        self.edit([{"cells": [[1, 2]], "v": 1}])
+        # The ack counts from the start of the lease, over the replanned path
+        resp = self.client.get(f"{self.API}/bolt/1/ack?lease={lease['lease']}&done=3")
+        self.assertEqual(handle_client_request(resp)["counter"], 2)
+        bolt = handle_client_request(self.client.get(f"{self.API}/bolt/1"))
+        self.assertEqual(bolt["position"], lease["waypoints"][-1])
+
+    def test_api_edit_maze_invalid(self):
+        version = maze_layout.version
+        for edits in (
+            None,
+            [{"cells": [[0, 1]]}],
+            [{"cells": [[0, 1]], "v": 1}, {"cells": [[10, 0]], "v": 1}],
+            [{"rect": [0, 0, 1], "v": 1}],
+            [{"line": [[0, True]], "v": 1}],
+            [{"v": 1}],
+        ):
+            self.assertEqual(self.edit(edits).status_code, 400)
+        self.assertEqual(maze_layout.version, version)
+        self.assertEqual(maze_layout.grid[1][0], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from application import app
+from load_generator import FlaskClient, LoadGenerator, endpoint_name, percentile
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = FlaskClient(app)
+        self.client.get("/api/reset")
+
+    def tearDown(self) -> None:
+        self.client.get("/api/reset")
+
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name("/api/bolt/12/command"), "/api/bolt/<code>/command")
+        self.assertEqual(endpoint_name("/api/bolt/3/goto?x=1&y=2"), "/api/bolt/<code>/goto")
+        self.assertEqual(endpoint_name("/api/nest/42"), "/api/nest/<code>")
+        self.assertEqual(endpoint_name("/api/maze"), "/api/maze")
+
+    def test_run(self):
+        generator = LoadGenerator(self.client, bolts=3, nest_rate=1, goto_rate=1, seed=1)
+        report = generator.run(rounds=2)
+        self.assertEqual(report["/api/register"]["count"], 3)
+        self.assertEqual(report["/api/bolt/<code>/command"]["count"], 6)
+        self.assertEqual(report["/api/nest/<code>"]["count"], 6)
+        self.assertEqual(report["/api/bolt/<code>/goto"]["count"], 6)
+        for row in report.values():
+            self.assertLessEqual(row["p50"], row["p95"])
+            self.assertLessEqual(row["p95"], row["p99"])
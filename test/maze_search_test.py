@@ -0,0 +1,160 @@
+import unittest
+
+from application import app, find_path, maze_layout, paths, refine_path, set_path
+from app_server_test import handle_client_request
+from maze_maker import Maze, manhattan_distance, random_factory, reachable_cells
+from maze_search import AnytimeAStar, astar, bidirectional_search
+from util import Location
+
+
+class TestBidirectionalSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = [
+            [0, 0, 0, 0, 0],
+            [1, 1, 1, 1, 0],
+            [0, 0, 0, 0, 0],
+            [0, 1, 1, 1, 1],
+            [0, 0, 0, 0, 0],
+        ]
+
+    def search(self, start, finish, heuristics=True):
+        m = Maze(factory=self.layout, start=start, finish=finish)
+        if not heuristics:
+            return bidirectional_search(m.start, m.finish_line, m.frontier, finish=finish)
+        return bidirectional_search(
+            m.start,
+            m.finish_line,
+            m.frontier,
+            manhattan_distance(finish),
+            finish=finish,
+            reverse_heuristic=manhattan_distance(start),
+        )
+
+    def test_shortest_path(self):
+        start = Location(0, 0)
+        finish = Location(4, 4)
+        m = Maze(factory=self.layout, start=start, finish=finish)
+        exp_path, _ = astar(m.start, m.finish_line, m.frontier, manhattan_distance(finish))
+        for heuristics in (True, False):
+            path, _ = self.search(start, finish, heuristics)
+            self.assertEqual(path, exp_path)
+
+    def test_short_routes(self):
+        self.assertEqual(self.search(Location(0, 0), Location(0, 0))[0], [])
+        self.assertEqual(self.search(Location(0, 0), Location(0, 1))[0], [])
+        self.assertEqual(self.search(Location(0, 0), Location(0, 2))[0], [Location(0, 1)])
+
+    def test_no_solution(self):
+        self.layout[2] = [1, 1, 1, 1, 1]
+        self.assertIsNone(self.search(Location(0, 0), Location(4, 4)))
+
+    def test_stats(self):
+        stats = {}
+        m = Maze(factory=self.layout, start=Location(0, 0), finish=Location(4, 4))
+        bidirectional_search(m.start, m.finish_line, m.frontier, stats=stats, finish=m.finish)
+        self.assertGreater(stats["expanded"], 0)
+        self.assertGreater(stats["frontier_peak"], 0)
+
+    def test_needs_finish(self):
+        m = Maze(factory=self.layout, start=Location(0, 0), finish=Location(4, 4))
+        with self.assertRaises(ValueError):
+            bidirectional_search(m.start, m.finish_line, m.frontier)
+
+    def test_find_path_engine(self):
+        exp_res = find_path(0, 0, 4, 4, layout=self.layout, engine="astar")
+        result = find_path(0, 0, 4, 4, layout=self.layout, engine="bidirectional")
+        self.assertEqual(result, exp_res)
+        with self.assertRaises(ValueError):
+            find_path(0, 0, 4, 4, layout=self.layout, engine="dijkstra")
+
+
+class TestAnytimeAStar(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = random_factory(40, 40, 0.3, seed=5)
+        cells = sorted(reachable_cells(self.layout))
+        self.pairs = [(cells[i], cells[-1 - i]) for i in range(0, 200, 40)]
+
+    def search(self, start, finish, weights=(3.0, 2.0, 1.0)):
+        m = Maze(factory=self.layout, start=start, finish=finish)
+        exp_path, _ = astar(m.start, m.finish_line, m.frontier, manhattan_distance(finish))
+        search = AnytimeAStar(m.start, m.finish_line, m.frontier, manhattan_distance(finish), weights)
+        return search, exp_path
+
+    def test_bound(self):
+        for start, finish in self.pairs:
+            search, exp_path = self.search(start, finish, weights=(3.0,))
+            path, bound = search.run()
+            self.assertLessEqual(bound, 3.0)
+            self.assertLessEqual(len(path) + 1, bound * (len(exp_path) + 1))
+
+    def test_refine(self):
+        for start, finish in self.pairs:
+            search, exp_path = self.search(start, finish)
+            # An expired deadline still gives a first path
+            path, _ = search.run(0)
+            self.assertIsNotNone(path)
+            path, bound = search.run()
+            self.assertEqual(bound, 1.0)
+            self.assertTrue(search.finished)
+            self.assertEqual(len(path), len(exp_path))
+            full_path = [start] + path + [finish]
+            for a, b in zip(full_path, full_path[1:]):
+                self.assertEqual(abs(a.x - b.x) + abs(a.y - b.y), 1)
+
+    def test_short_routes(self):
+        search, _ = self.search(self.pairs[0][0], self.pairs[0][0])
+        self.assertEqual(search.run(), ([], 1.0))
+
+    def test_no_solution(self):
+        m = Maze(factory=[[0, 1, 0]], start=Location(0, 0), finish=Location(0, 2))
+        search = AnytimeAStar(m.start, m.finish_line, m.frontier, manhattan_distance(m.finish))
+        self.assertEqual(search.run(), (None, float("inf")))
+        self.assertTrue(search.finished)
+
+
+class TestAnytimePlanning(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+        self.client.get(f"{self.API}/register")
+
+    def tearDown(self) -> None:
+        self.client.get(f"{self.API}/reset")
+
+    def test_api_bolt_goto_budget(self):
+        resp = handle_client_request(
+            self.client.get(f"{self.API}/bolt/1/goto?x=2&y=3&budget_ms=5")
+        )
+        self.assertGreaterEqual(resp["bound"], 1.0)
+        self.assertEqual(resp["path"][-1], [2, 3])
+        self.assertEqual(paths.get(1).destination(), Location(2, 3))
+        resp = self.client.get(f"{self.API}/bolt/1/goto?x=2&y=3&budget_ms=soon")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_refine_path(self):
+        self.client.get(f"{self.API}/bolt/1/moved?x=2&y=0")
+        detour = [Location(2, 0), Location(3, 0), Location(3, 1), Location(3, 2), Location(3, 3)]
+        detour.append(Location(2, 3))
+        set_path(1, detour)
+        m = Maze(factory=maze_layout.grid, start=detour[0], finish=detour[-1])
+        search = AnytimeAStar(m.start, m.finish_line, m.frontier, manhattan_distance(m.finish))
+        self.assertTrue(refine_path(1, detour, search, maze_layout.version))
+        self.assertEqual(list(paths.get(1).waypoints()), [Location(2, 3)])
+        # Nothing changes once the path is the shortest
+        self.assertFalse(refine_path(1, detour, search, maze_layout.version))
+
+    def test_refine_path_leased(self):
+        self.client.get(f"{self.API}/bolt/1/moved?x=2&y=0")
+        detour = [Location(2, 0), Location(3, 0), Location(3, 1), Location(3, 2), Location(3, 3)]
+        detour.append(Location(2, 3))
+        set_path(1, detour)
+        lease = handle_client_request(self.client.get(f"{self.API}/bolt/1/command?n=2"))
+        m = Maze(factory=maze_layout.grid, start=detour[0], finish=detour[-1])
+        search = AnytimeAStar(m.start, m.finish_line, m.frontier, manhattan_distance(m.finish))
+        # The bolt still drives its leased waypoints of the detour
+        self.assertFalse(refine_path(1, detour, search, maze_layout.version))
+        resp = self.client.get(f"{self.API}/bolt/1/ack?lease={lease['lease']}&done=2")
+        self.assertEqual(handle_client_request(resp)["counter"], 2)
+
@@ -0,0 +1,66 @@
+import unittest
+
+from application import app
+from metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter(self):
+        counter = Counter("requests_total", "Requests.", labels=("route",))
+        counter.inc("/api")
+        counter.inc("/api", amount=2)
+        self.assertEqual(counter.get("/api"), 3)
+        exp_res = [
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{route="/api"} 3',
+        ]
+        self.assertEqual(counter.render(), exp_res)
+
+    def test_gauge(self):
+        gauge = Gauge("bolts", "Bolts.", lambda: 4)
+        self.assertEqual(gauge.render()[-1], "bolts 4")
+        gauge = Gauge("busy", "Busy.", lambda: {("a",): 1}, labels=("site",))
+        self.assertEqual(gauge.render()[-1], 'busy{site="a"} 1')
+
+    def test_histogram(self):
+        histogram = Histogram("latency", "Latency.", buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+        exp_res = [
+            "# HELP latency Latency.",
+            "# TYPE latency histogram",
+            'latency_bucket{le="1"} 2',
+            'latency_bucket{le="5"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            "latency_sum 14.5",
+            "latency_count 4",
+        ]
+        self.assertEqual(histogram.render(), exp_res)
+        self.assertEqual(histogram.count(), 4)
+
+    def test_registry(self):
+        registry = Registry()
+        counter = registry.register(Counter("a", 'Quote "this".', labels=("x",)))
+        counter.inc('va"l')
+        self.assertIs(registry.get("a"), counter)
+        self.assertIn('a{x="va\\"l"} 1\n', registry.render())
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+
+    def test_api_metrics(self):
+        self.client.get("/api/maze")
+        resp = self.client.get("/api/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith("text/plain"))
+        text = resp.data.decode("utf-8")
+        self.assertIn(
+            'rollenbollen_request_latency_seconds_count{route="/api/maze",method="GET"}',
+            text,
+        )
+        self.assertIn("rollenbollen_swarm_size", text)
+        self.assertIn("rollenbollen_waypoints_pending", text)
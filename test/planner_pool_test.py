@@ -0,0 +1,114 @@
+import unittest
+
+import routing
+from app_server_test import handle_client_request
+from application import app, factory_layout, find_path
+from layout import Layout
+from planner_pool import PlannerPool, plan_route
+from util import Location
+
+
+class TestPlannerPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = Layout([row[:] for row in factory_layout])
+        # Wall in the top right corner
+        self.layout.set_cell(0, 8, 1)
+        self.pool = PlannerPool(self.layout, workers=2)
+
+    def tearDown(self) -> None:
+        self.pool.shutdown()
+
+    def test_plan(self):
+        jobs = [
+            (1, Location(x=0, y=0), Location(x=2, y=0)),
+            (2, Location(x=9, y=0), Location(x=0, y=9)),
+            (3, Location(x=3, y=0), Location(x=0, y=9)),
+            (4, Location(x=3, y=0), Location(x=2, y=9)),
+        ]
+        routes, missed = self.pool.plan(jobs, "astar", 30)
+        self.assertEqual(missed, [])
+        self.assertEqual(routes[1], find_path(0, 0, 2, 0, layout=self.layout.grid))
+        self.assertIsNone(routes[2])
+        self.assertIsNone(routes[3])
+        self.assertEqual(routes[4], find_path(3, 0, 2, 9, layout=self.layout.grid))
+
+    def test_new_layout_version(self):
+        jobs = [(1, Location(x=0, y=0), Location(x=2, y=0))]
+        routes, _ = self.pool.plan(jobs, "astar", 30)
+        self.assertEqual(len(routes[1]), 11)
+        executor = self.pool.executor
+        self.layout.set_cell(1, 0, 0)
+        routes, _ = self.pool.plan(jobs, "astar", 30)
+        self.assertEqual(routes[1], [Location(0, 0), Location(1, 0), Location(2, 0)])
+        # The workers get the new grid with the jobs, they are not restarted
+        self.assertIs(self.pool.executor, executor)
+
+    def test_turn_penalty(self):
+        start, finish = Location(x=0, y=0), Location(x=3, y=0)
+        planned = []
+        for turn_penalty in (0.0, 20.0):
+            routes, _ = self.pool.plan([(1, start, finish)], "travel_time", 30, turn_penalty)
+            grid = self.layout.grid
+            route = routing.find_path(start, finish, grid, "travel_time", turn_penalty=turn_penalty)
+            self.assertEqual(routes[1], route)
+            planned.append(routes[1])
+        self.assertNotEqual(planned[0], planned[1])
+
+    def test_plan_route(self):
+        self.assertIsNone(plan_route(Location(0, 0), Location(0, 9), self.layout.grid, "astar"))
+        route = plan_route(Location(0, 0), Location(2, 0), self.layout.grid, "astar")
+        self.assertEqual(len(route), 11)
+
+
+class TestFleetPlanning(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+        for _ in range(3):
+            self.client.get(f"{self.API}/register")
+        # Wall in the top right corner
+        self.client.get(f"{self.API}/maze?x=8&y=0&v=1")
+
+    def tearDown(self) -> None:
+        self.client.get(f"{self.API}/maze?x=8&y=0&v=0")
+        self.client.get(f"{self.API}/maze?x=2&y=2&v=0")
+        self.client.get(f"{self.API}/reset")
+
+    def test_api_batch_goto(self):
+        moves = [{"bolt": 1, "x": 2, "y": 0}, {"bolt": 2, "x": 0, "y": 9}]
+        resp = handle_client_request(
+            self.client.post(f"{self.API}/goto", json={"moves": moves})
+        )
+        self.assertEqual(
+            resp["paths"], [{"bolt": 1, "optimal_route": [[0, 4], [2, 4], [2, 0]]}]
+        )
+        self.assertEqual(resp["unreachable"], [2])
+        self.assertEqual(resp["missed"], [])
+        bolt = handle_client_request(self.client.get(f"{self.API}/bolt/1"))
+        self.assertEqual(bolt["next_move"], {"x": 2, "y": 0})
+
+    def test_api_batch_goto_bad_request(self):
+        resp = self.client.post(f"{self.API}/goto", json={"moves": [{"bolt": 9, "x": 0, "y": 0}]})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post(f"{self.API}/goto", json={"moves": [{"bolt": 1, "x": "a"}]})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_replan_after_maze_edit(self):
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=0")
+        self.client.get(f"{self.API}/maze?x=2&y=2&v=1")
+        resp = handle_client_request(self.client.get(f"{self.API}/bolt/1/command?n=all"))
+        exp_res = [(0, 4), (2, 4), (2, 3), (3, 3), (3, 1), (2, 1), (2, 0)]
+        self.assertEqual(resp["waypoints"], [{"x": x, "y": y} for x, y in exp_res])
+
+    def test_api_go_home(self):
+        self.client.get(f"{self.API}/bolt/1/moved?x=2&y=0")
+        resp = self.client.get(f"{self.API}/home")
+        self.assertNotIn("X-Planner-Missed", resp.headers)
+        bolts = handle_client_request(resp)
+        self.assertEqual([bolt["next_move"] for bolt in bolts], [{"x": 0, "y": 0}] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
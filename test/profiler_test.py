@@ -0,0 +1,70 @@
+import pstats
+import unittest
+from tempfile import NamedTemporaryFile
+
+from application import app, profiler
+from layout import Layout
+from profiler import RequestProfiler
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def test_start(self):
+        profiler = RequestProfiler(size=2)
+        self.assertIsNone(profiler.start(False))
+        self.assertIsNone(profiler.start(False, percentage=0))
+        profile = profiler.start(False, percentage=100)
+        self.assertIsNotNone(profile)
+        # Only one request can be profiled at the same time
+        self.assertIsNone(profiler.start(True))
+        profiler.finish(profile, {}, {})
+        profile = profiler.start(True)
+        self.assertIsNotNone(profile)
+        profiler.finish(profile, {}, {})
+
+    def test_ring_buffer(self):
+        profiler = RequestProfiler(size=2)
+        for _ in range(3):
+            profiler.finish(profiler.start(True), {}, {})
+        self.assertEqual([record["id"] for record in profiler.summaries()], [2, 3])
+        self.assertIsNone(profiler.get(1))
+        self.assertNotIn("stats", profiler.summaries()[0])
+
+
+class TestLayout(unittest.TestCase):
+    def test_set_cell(self):
+        layout = Layout([[0, 0], [0, 1]])
+        self.assertTrue(layout.set_cell(0, 1, 1))
+        self.assertEqual(layout.grid, [[0, 1], [0, 1]])
+        self.assertEqual(layout.version, 1)
+        self.assertFalse(layout.set_cell(1, 1, 1))
+        self.assertEqual(layout.version, 1)
+
+
+class TestProfileEndpoints(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        profiler.records.clear()
+
+    def test_profile_request(self):
+        self.client.get("/api/maze")
+        self.assertEqual(self.client.get("/api/admin/profiles").get_json(), [])
+        self.client.get("/api/maze?profile=1")
+        self.client.get("/api/bolt", headers={"X-Profile": "1"})
+        summaries = self.client.get("/api/admin/profiles").get_json()
+        self.assertEqual(
+            [summary["request"]["path"] for summary in summaries],
+            ["/api/maze?profile=1", "/api/bolt"],
+        )
+        self.assertIn("layout_version", summaries[0]["snapshot"])
+        self.assertIn("bolts", summaries[0]["snapshot"])
+
+        code = summaries[0]["id"]
+        text = self.client.get(f"/api/admin/profiles/{code}?format=text")
+        self.assertIn("api_get_maze", text.data.decode("utf-8"))
+        with NamedTemporaryFile(suffix=".prof", delete=False) as f:
+            f.write(self.client.get(f"/api/admin/profiles/{code}").data)
+        self.assertGreater(pstats.Stats(f.name).total_calls, 0)
+
+    def test_unknown_profile(self):
+        self.assertEqual(self.client.get("/api/admin/profiles/0").status_code, 404)
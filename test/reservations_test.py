@@ -0,0 +1,169 @@
+import unittest
+from random import Random
+
+from app_server_test import handle_client_request
+from application import (
+    app,
+    factory_layout,
+    paths,
+    reservation_reroutes,
+    reservation_yields,
+    reservations,
+    swarm,
+)
+from maze_maker import escape_path
+from reservations import ReservationTable
+from util import Location
+
+
+class TestReservationTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = ReservationTable(exempt=[Location(0, 0)])
+
+    def test_grant(self):
+        legs = [[Location(0, 1), Location(0, 2)], [Location(1, 2)]]
+        self.assertEqual(self.table.grant(1, Location(0, 0), legs), 2)
+        self.assertNotIn(Location(0, 0), self.table.holders)
+        self.assertEqual(self.table.conflict(2, [Location(0, 0), Location(1, 2)]), 1)
+        self.assertIsNone(self.table.conflict(1, [Location(1, 2)]))
+
+        legs = [[Location(1, 0)], [Location(1, 1), Location(1, 2)], [Location(2, 2)]]
+        self.assertEqual(self.table.grant(2, Location(0, 0), legs), 1)
+        self.assertEqual(self.table.grant(2, Location(1, 0), legs[1:]), 0)
+        self.assertEqual(self.table.waits[2], 1)
+        # A new grant releases the cells the bolt drove over
+        self.assertEqual(self.table.grant(1, Location(2, 2), [[Location(3, 2)]]), 1)
+        self.assertEqual(self.table.grant(2, Location(1, 0), legs[1:2]), 1)
+        self.assertNotIn(2, self.table.waits)
+        self.assertEqual(self.table.held_by_others(2), {Location(2, 2), Location(3, 2)})
+
+    def test_denied(self):
+        self.table.grant(1, Location(3, 3), [[Location(3, 4), Location(3, 5)]])
+        self.table.grant(2, Location(2, 6), [[Location(3, 6)]])
+        self.assertEqual(self.table.grant(1, Location(3, 5), [[Location(3, 6)]]), 0)
+        # A waiting bolt does not block the cells it drove over
+        self.assertEqual(self.table.claims[1], {Location(3, 5)})
+        self.assertEqual(self.table.waits[1], 1)
+
+    def test_escape_path(self):
+        grid = [[0, 0, 0], [1, 0, 1], [1, 0, 1]]
+        avoid = {Location(0, 0), Location(0, 1), Location(1, 1), Location(2, 1)}
+        self.assertEqual(escape_path(grid, Location(2, 1), avoid)[-1], Location(0, 2))
+        self.assertIsNone(escape_path(grid, Location(2, 1), avoid | {Location(0, 2)}))
+
+    def test_release(self):
+        self.table.grant(1, Location(3, 3), [[Location(3, 4)]])
+        self.table.release(1)
+        self.assertEqual(self.table.holders, {})
+        self.table.grant(1, Location(3, 3), [[Location(3, 4)]])
+        self.table.clear()
+        self.assertEqual(self.table.claims, {})
+
+
+class TestCommandReservations(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        app.config["RESERVATIONS_ENABLED"] = True
+        self.client.get(f"{self.API}/reset")
+        for _ in range(2):
+            self.client.get(f"{self.API}/register")
+
+    def tearDown(self) -> None:
+        app.config["RESERVATIONS_ENABLED"] = False
+        self.client.get(f"{self.API}/reset")
+
+    def command(self, code, query=""):
+        return handle_client_request(self.client.get(f"{self.API}/bolt/{code}/command{query}"))
+
+    def test_wait(self):
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=0")
+        self.client.get(f"{self.API}/bolt/2/goto?x=0&y=3")
+        self.assertEqual(self.command(1), {"x": 0, "y": 4})
+        self.assertEqual(self.command(2), {"x": 0, "y": 0, "wait": True})
+        resp = self.command(2, "?n=all")
+        self.assertEqual((resp["waypoints"], resp["wait"]), ([], True))
+        self.assertEqual(self.command(1), {"x": 2, "y": 4})
+        self.assertEqual(self.command(2), {"x": 0, "y": 3})
+        exp_res = {Location(0, 4), Location(1, 4), Location(2, 4)}
+        self.assertEqual(reservations.claims[1], exp_res)
+
+    def test_reroute(self):
+        self.client.get(f"{self.API}/bolt/1/moved?x=2&y=1")
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=2")
+        self.client.get(f"{self.API}/bolt/2/moved?x=2&y=0")
+        self.client.get(f"{self.API}/bolt/2/goto?x=2&y=3")
+        self.assertEqual(self.command(1), {"x": 2, "y": 2})
+        self.assertEqual(reservations.claims[1], {Location(2, 2)})
+        before = reservation_reroutes.get()
+        for _ in range(app.config["RESERVATION_REROUTE_AFTER"] - 1):
+            self.assertTrue(self.command(2)["wait"])
+        self.assertEqual(self.command(2), {"x": 2, "y": 1})
+        self.assertEqual(reservation_reroutes.get(), before + 1)
+        self.assertEqual(self.command(2), {"x": 3, "y": 1})
+
+    def test_cleared_corridor(self):
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=5")
+        resp = self.command(1, "?n=all")
+        done = len(resp["waypoints"])
+        self.client.get(f"{self.API}/bolt/1/ack?lease={resp['lease']}&done={done}")
+        self.assertEqual(reservations.claims[1], {Location(2, 5)})
+        self.client.get(f"{self.API}/bolt/2/goto?x=2&y=2")
+        self.assertNotIn("wait", self.command(2))
+        self.assertNotIn("wait", self.command(2))
+        self.assertEqual(self.command(2), {"x": 2, "y": 2})
+
+    def test_head_on(self):
+        # Face to face in the top row, bolt 2 backs into the gap below to let bolt 1 pass
+        for code, y in ((1, 2), (2, 4)):
+            self.client.get(f"{self.API}/bolt/{code}/move?x=0&y={y}")
+            self.command(code)
+        self.client.get(f"{self.API}/bolt/1/goto?x=0&y=5")
+        self.client.get(f"{self.API}/bolt/2/goto?x=0&y=1")
+        before = reservation_yields.get()
+        for _ in range(20):
+            self.command(1)
+            self.command(2)
+        self.assertEqual(len(paths), 0)
+        positions = {code: swarm.get_bolt_by_id(code).position for code in (1, 2)}
+        self.assertEqual(positions, {1: {"x": 0, "y": 5}, 2: {"x": 0, "y": 1}})
+        self.assertEqual(reservation_yields.get(), before + 1)
+
+
+class TestFleetReservations(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        app.config["RESERVATIONS_ENABLED"] = True
+        self.client.get(f"{self.API}/reset")
+        self.bolts = 5
+        for _ in range(self.bolts):
+            self.client.get(f"{self.API}/register")
+
+    def tearDown(self) -> None:
+        app.config["RESERVATIONS_ENABLED"] = False
+        self.client.get(f"{self.API}/reset")
+
+    def test_fleet_drains(self):
+        rng = Random(5)
+        free = [
+            (x, y) for x, row in enumerate(factory_layout) for y, cell in enumerate(row) if not cell
+        ]
+        for tick in range(400):
+            if tick < 200 and rng.random() < 0.3:
+                x, y = rng.choice(free)
+                self.client.get(f"{self.API}/nest/{x}{y}")
+            for code in range(1, self.bolts + 1):
+                self.client.get(f"{self.API}/bolt/{code}/command")
+                taken = [(bolt.position["x"], bolt.position["y"]) for bolt in swarm.bolts]
+                taken = [cell for cell in taken if cell != (0, 0)]
+                self.assertEqual(len(taken), len(set(taken)))
+            if tick >= 200 and len(paths) == 0:
+                break
+        self.assertEqual(len(paths), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys
+import unittest
+
+from route_store import Route, RouteStore
+from util import Location
+
+
+class TestRoute(unittest.TestCase):
+    def setUp(self) -> None:
+        self.start = Location(x=0, y=0)
+        self.waypoints = [Location(x=0, y=3), Location(x=2, y=3), Location(x=2, y=0)]
+        self.route = Route(self.start, self.waypoints)
+
+    def test_encoding(self):
+        self.assertEqual(len(self.route), 3)
+        self.assertEqual(self.route.remaining, 8)
+        self.assertEqual(list(self.route.waypoints()), self.waypoints)
+        self.assertEqual(self.route.destination(), Location(x=2, y=0))
+
+    def test_straight_segments(self):
+        with self.assertRaises(ValueError):
+            Route(self.start, [Location(x=1, y=1)])
+
+    def test_advance(self):
+        self.assertEqual(self.route.next_waypoint(), Location(x=0, y=3))
+        self.route.advance()
+        self.assertEqual(self.route.position(), Location(x=0, y=3))
+        self.assertEqual(self.route.next_waypoint(), Location(x=2, y=3))
+        self.assertEqual(self.route.remaining, 5)
+        self.assertEqual(list(self.route.waypoints(1)), [Location(x=2, y=3)])
+        self.route.advance(5)
+        self.assertTrue(self.route.finished)
+        self.assertEqual(self.route.remaining, 0)
+        self.assertEqual(self.route.position(), Location(x=2, y=0))
+
+    def test_cells(self):
+        self.route.advance()
+        exp_res = [
+            Location(x=1, y=3),
+            Location(x=2, y=3),
+            Location(x=2, y=2),
+            Location(x=2, y=1),
+            Location(x=2, y=0),
+        ]
+        self.assertEqual(list(self.route.cells()), exp_res)
+
+    def test_compact(self):
+        cells = [Location(x=0, y=y) for y in range(1, 1001)]
+        route = Route(self.start, [cells[-1]])
+        self.assertLess(sys.getsizeof(route.segments), sys.getsizeof(cells))
+
+
+class TestRouteStore(unittest.TestCase):
+    def test_store(self):
+        store = RouteStore()
+        store.set(1, Location(x=0, y=0), [Location(x=0, y=2)])
+        store.set(2, Location(x=0, y=0), [Location(x=3, y=0), Location(x=3, y=1)])
+        self.assertIn(1, store)
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.pending_waypoints(), 3)
+        store.get(2).advance()
+        self.assertEqual(store.pending_waypoints(), 2)
+        del store[1]
+        self.assertNotIn(1, store)
+        self.assertIsNone(store.get(1))
+        self.assertIsNone(store.set(2, Location(x=0, y=0), []))
+        self.assertEqual(len(store), 0)
+
+    def test_reverse_index(self):
+        store = RouteStore()
+        store.set(1, Location(x=0, y=0), [Location(x=0, y=2), Location(x=2, y=2)])
+        store.set(2, Location(x=1, y=0), [Location(x=1, y=3)])
+        self.assertEqual(store.crossing([Location(x=1, y=2)]), {1, 2})
+        self.assertEqual(store.crossing([Location(x=0, y=0), Location(x=2, y=2)]), {1})
+        store.advance(1)
+        self.assertEqual(store.crossing([Location(x=0, y=1)]), set())
+        self.assertEqual(store.crossing([Location(x=1, y=2)]), {1, 2})
+        store.set(2, Location(x=1, y=0), [Location(x=1, y=1)])
+        self.assertEqual(store.crossing([Location(x=1, y=2)]), {1})
+        store.advance(1)
+        self.assertNotIn(1, store)
+        del store[2]
+        self.assertEqual(store.index, {})
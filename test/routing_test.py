@@ -0,0 +1,27 @@
+import unittest
+
+from routing import find_path
+from util import Location
+
+
+class TestRouting(unittest.TestCase):
+    def setUp(self) -> None:
+        self.grid = [[0, 0, 0], [1, 1, 0], [0, 0, 0]]
+
+    def test_find_path(self):
+        stats = {}
+        result = find_path(Location(0, 0), Location(2, 0), self.grid, stats=stats)
+        self.assertEqual(len(result), 7)
+        self.assertEqual((result[0], result[-1]), (Location(0, 0), Location(2, 0)))
+        self.assertGreater(stats["expanded"], 0)
+        for engine in ("bidirectional", "travel_time"):
+            self.assertEqual(find_path(Location(0, 0), Location(2, 0), self.grid, engine), result)
+
+    def test_no_path(self):
+        grid = [[0, 1, 0]]
+        self.assertRaises(ValueError, find_path, Location(0, 0), Location(0, 2), grid)
+        self.assertRaises(ValueError, find_path, Location(0, 0), Location(0, 0), grid, "dijkstra")
+
+
+if __name__ == "__main__":
+    unittest.main()
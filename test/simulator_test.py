@@ -0,0 +1,64 @@
+import unittest
+
+from maze_maker import reachable_cells
+from simulator import POLICIES, Simulation, Task, compare_policies, generate_trace
+from util import Location
+
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = [[0, 0, 0, 0], [1, 1, 1, 0], [0, 0, 0, 0]]
+
+    def test_reachable_cells(self):
+        layout = [[0, 1, 0], [0, 1, 0], [0, 0, 1]]
+        exp_res = {
+            Location(0, 0),
+            Location(1, 0),
+            Location(2, 0),
+            Location(2, 1),
+        }
+        self.assertEqual(reachable_cells(layout), exp_res)
+
+    def test_generate_trace(self):
+        trace = generate_trace(self.layout, tasks=20, seed=1)
+        self.assertEqual(len(trace), 20)
+        times = [task.time for task in trace]
+        self.assertEqual(times, sorted(times))
+        for task in trace:
+            self.assertEqual(self.layout[task.x][task.y], 0)
+
+    def test_single_task(self):
+        trace = [Task(time=0, x=2, y=0)]
+        result = Simulation(trace, POLICIES["first_idle"], bolts=1, layout=self.layout).run()
+        # 8 steps and 3 segments with a turn time of 1
+        self.assertEqual(result["duration"], 11)
+        self.assertEqual(result["mean_completion_time"], 11)
+        self.assertEqual(result["tasks"], 1)
+        self.assertEqual(result["idle_ratio"], 0)
+
+    def test_queued_tasks(self):
+        trace = [Task(time=0, x=0, y=3), Task(time=0, x=2, y=3)]
+        result = Simulation(trace, POLICIES["first_idle"], bolts=1, layout=self.layout).run()
+        self.assertEqual(result["tasks"], 2)
+        self.assertEqual(result["duration"], 4 + 3)
+        self.assertEqual(result["mean_completion_time"], (4 + 7) / 2)
+
+    def test_conflicts(self):
+        trace = [Task(time=0, x=0, y=3), Task(time=0, x=0, y=3)]
+        result = Simulation(trace, POLICIES["first_idle"], bolts=2, layout=self.layout).run()
+        self.assertEqual(result["conflicts"], 3)
+
+    def test_compare_policies(self):
+        result = compare_policies(list(POLICIES), shifts=2, tasks=10, seed=1)
+        self.assertEqual(set(result), set(POLICIES))
+        for stats in result.values():
+            self.assertEqual(stats["tasks"], 10)
+
+    def test_bolt_on_task(self):
+        result = compare_policies(["nearest"], shifts=1, bolts=1, tasks=100, seed=1)
+        self.assertEqual((result["nearest"]["tasks"], result["nearest"]["unfinished"]), (100, 0))
+        trace = [Task(time=0, x=0, y=1), Task(time=5, x=0, y=2)]
+        result = Simulation(trace, POLICIES["nearest"], bolts=1, layout=self.layout).run()
+        self.assertEqual((result["tasks"], result["unfinished"]), (2, 0))
+        result = Simulation(trace, lambda *_: 0, bolts=1, layout=self.layout).run()
+        self.assertEqual((result["tasks"], result["unfinished"]), (0, 2))
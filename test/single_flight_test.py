@@ -0,0 +1,122 @@
+import unittest
+from threading import Event, Thread
+from time import monotonic, sleep
+
+from app_server_test import handle_client_request
+from application import app, flights, maze_layout
+from single_flight import SingleFlight
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = monotonic() + timeout
+    while not condition():
+        if monotonic() > deadline:
+            return False
+        sleep(0.001)
+    return True
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self) -> None:
+        self.group = SingleFlight()
+        self.release = Event()
+        self.calls = 0
+
+    def slow(self, result="done"):
+        self.calls += 1
+        self.release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def run_followers(self, key, amount):
+        results = []
+
+        def follow():
+            try:
+                results.append(self.group.do(key, self.slow))
+            except ValueError as error:
+                results.append(error)
+
+        threads = [Thread(target=follow) for _ in range(amount)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(wait_until(lambda: self.group.calls[key].waiters == amount))
+        return threads, results
+
+    def test_shared(self):
+        leader = Thread(target=lambda: self.group.do("a", self.slow))
+        leader.start()
+        self.assertTrue(wait_until(lambda: len(self.group) == 1))
+        threads, results = self.run_followers("a", 3)
+        self.release.set()
+        for thread in [leader] + threads:
+            thread.join(5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [("done", True)] * 3)
+        self.assertEqual(len(self.group), 0)
+        # A finished call is not cached
+        self.assertEqual(self.group.do("a", self.slow), ("done", False))
+        self.assertEqual(self.calls, 2)
+
+    def test_error(self):
+        error = ValueError("No path")
+        leader = Thread(
+            target=self.assertRaises, args=(ValueError, self.group.do, "a", lambda: self.slow(error))
+        )
+        leader.start()
+        self.assertTrue(wait_until(lambda: len(self.group) == 1))
+        threads, results = self.run_followers("a", 2)
+        self.release.set()
+        for thread in [leader] + threads:
+            thread.join(5)
+        self.assertEqual(results, [error, error])
+        self.assertEqual(self.calls, 1)
+
+
+class TestCoalescedRequests(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+        for _ in range(2):
+            self.client.get(f"{self.API}/register")
+
+    def tearDown(self) -> None:
+        self.client.get(f"{self.API}/reset")
+
+    def test_api_nest_coalesced(self):
+        release = Event()
+        shared = {"bolt": 1, "path": [], "optimal_route": []}
+
+        def first():
+            release.wait(5)
+            return shared
+
+        key = ("nest", 2, 3, None, maze_layout.version)
+        leader = Thread(target=flights.do, args=(key, first))
+        leader.start()
+        self.assertTrue(wait_until(lambda: len(flights) == 1))
+        responses = []
+        follower = Thread(target=lambda: responses.append(self.client.get(f"{self.API}/nest/23")))
+        follower.start()
+        self.assertTrue(wait_until(lambda: flights.calls[key].waiters == 1))
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual(handle_client_request(responses[0]), shared)
+        self.assertEqual(responses[0].headers["X-Coalesced"], "1")
+
+    def test_api_nest_sequential(self):
+        first = self.client.get(f"{self.API}/nest/23")
+        second = self.client.get(f"{self.API}/nest/23")
+        self.assertNotIn("X-Coalesced", first.headers)
+        self.assertNotIn("X-Coalesced", second.headers)
+        # Only requests in flight are shared, the second one gets another bolt
+        bolts = {handle_client_request(resp)["bolt"] for resp in (first, second)}
+        self.assertEqual(bolts, {1, 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
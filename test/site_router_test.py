@@ -0,0 +1,126 @@
+import json
+import os
+import socket
+import tempfile
+import unittest
+from threading import Thread
+from time import monotonic, sleep
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from werkzeug.serving import make_server
+
+from app_server_test import handle_client_request
+from application import app, factory_layout
+from site_router import create_router, parse_pairs, referring_site, start_sites, stop_sites
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            with urlopen(url, timeout=1):
+                return
+        except (URLError, OSError):
+            if monotonic() > deadline:
+                raise
+            sleep(0.1)
+
+
+class TestSiteRouter(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = make_server("127.0.0.1", 0, app, threaded=True)
+        cls.thread = Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+
+    def setUp(self) -> None:
+        sites = {
+            "hall1": f"http://127.0.0.1:{self.server.server_port}",
+            "down": "http://127.0.0.1:1",
+        }
+        self.client = create_router(sites).test_client()
+        self.client.get("/sites/hall1/api/reset")
+
+    def tearDown(self) -> None:
+        self.client.get("/sites/hall1/api/reset")
+
+    def test_forward(self):
+        self.assertEqual(handle_client_request(self.client.get("/sites")), ["down", "hall1"])
+        resp = handle_client_request(self.client.get("/sites/hall1/api/maze"))
+        self.assertEqual(resp, {"maze": factory_layout})
+        self.assertEqual(handle_client_request(self.client.get("/sites/hall1/api/register")), 1)
+        moves = {"moves": [{"bolt": 1, "x": 0, "y": 3}]}
+        resp = self.client.post("/sites/hall1/api/goto", json=moves)
+        self.assertEqual(handle_client_request(resp)["paths"][0]["bolt"], 1)
+        self.assertEqual(resp.headers["Access-Control-Allow-Origin"], "*")
+        resp = self.client.get("/sites/hall1/api/bolt/1/command?n=x")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_unknown_site(self):
+        self.assertEqual(self.client.get("/sites/hall9/api/maze").status_code, 404)
+        self.assertEqual(self.client.get("/sites/down/api/maze").status_code, 502)
+
+    def test_referred_files(self):
+        # The dashboard under /sites/hall1/ loads /static/... of hall1
+        url = "/static/css/main.536cdfcb.chunk.css"
+        resp = self.client.get(url, headers={"Referer": "http://localhost/sites/hall1/"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_data(), app.test_client().get(url).get_data())
+        self.assertEqual(self.client.get(url).status_code, 404)
+        resp = self.client.get(url, headers={"Referer": "http://localhost/sites/hall9/"})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_referring_site(self):
+        self.assertEqual(referring_site("http://localhost/sites/hall1/"), "hall1")
+        self.assertEqual(referring_site("http://localhost/sites/hall1/static/a.css"), "hall1")
+        self.assertIsNone(referring_site("http://localhost/static/css/a.css"))
+        self.assertIsNone(referring_site(""))
+
+    def test_parse_pairs(self):
+        exp_res = {"a": "x.json", "b": "http://h:1"}
+        self.assertEqual(parse_pairs(["a=x.json", "b=http://h:1"]), exp_res)
+        self.assertRaises(ValueError, parse_pairs, ["a"])
+
+
+class TestSiteProcesses(unittest.TestCase):
+    def test_isolated_sites(self):
+        layouts = {"hall1": [[0, 0, 0], [0, 1, 0]], "hall2": [[0, 1], [0, 0], [0, 0]]}
+        with tempfile.TemporaryDirectory() as folder:
+            files = {}
+            for site, grid in layouts.items():
+                files[site] = os.path.join(folder, f"{site}.json")
+                with open(files[site], "w") as file:
+                    json.dump({"maze": grid}, file)
+            port = free_port()
+            sites, processes = start_sites(files, port)
+            try:
+                client = create_router(sites).test_client()
+                for url in sites.values():
+                    wait_for(url + "/api")
+                for site, grid in layouts.items():
+                    resp = handle_client_request(client.get(f"/sites/{site}/api/maze"))
+                    self.assertEqual(resp["maze"], grid)
+                client.get("/sites/hall1/api/register")
+                client.get("/sites/hall1/api/register")
+                hall1 = handle_client_request(client.get("/sites/hall1/api/bolt"))
+                hall2 = handle_client_request(client.get("/sites/hall2/api/bolt"))
+                self.assertEqual((len(hall1), len(hall2)), (2, 0))
+                metrics = client.get("/sites/hall2/api/metrics").get_data(as_text=True)
+                self.assertIn('rollenbollen_site_info{site="hall2"} 1', metrics)
+            finally:
+                stop_sites(processes)
+
+
+if __name__ == "__main__":
+    unittest.main()
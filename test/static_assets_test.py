@@ -0,0 +1,87 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from application import app
+from static_assets import HASHED_NAME, IMMUTABLE, REVALIDATE, AssetBundle, accepted_encodings
+
+
+class TestAssetBundle(unittest.TestCase):
+    def setUp(self) -> None:
+        self.folder = tempfile.TemporaryDirectory()
+        os.makedirs(os.path.join(self.folder.name, "js"))
+        self.script = b"console.log('RollenBollen');\n" * 40
+        with open(os.path.join(self.folder.name, "js", "main.0123abcd.chunk.js"), "wb") as f:
+            f.write(self.script)
+        with open(os.path.join(self.folder.name, "robots.txt"), "wb") as f:
+            f.write(b"User-agent: *\n")
+        self.bundle = AssetBundle({"static/": self.folder.name})
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def test_load(self):
+        chunk = self.bundle.get("static/js/main.0123abcd.chunk.js")
+        self.assertEqual(chunk.body, self.script)
+        self.assertEqual(chunk.cache_control, IMMUTABLE)
+        self.assertEqual(gzip.decompress(chunk.encodings["gzip"]), self.script)
+        small = self.bundle.get("static/robots.txt")
+        self.assertEqual(small.cache_control, REVALIDATE)
+        self.assertEqual(small.encodings, {})
+        self.assertIsNone(self.bundle.get("robots.txt"))
+
+    def test_hashed_name(self):
+        for name in ("main.0123abcd.chunk.js", "runtime-main.7d072426.js", "logo.6ce24c58.svg"):
+            self.assertIsNotNone(HASHED_NAME.search(name), name)
+        self.assertIsNotNone(HASHED_NAME.search("main.0123abcd.chunk.js.map"))
+        for name in ("index.html", "manifest.json", "main.0123abcd.backup/app.js"):
+            self.assertIsNone(HASHED_NAME.search(name), name)
+
+    def test_response(self):
+        name = "static/js/main.0123abcd.chunk.js"
+        resp = self.bundle.response(name, {"Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        self.assertEqual(resp.headers["Vary"], "Accept-Encoding")
+        self.assertEqual(gzip.decompress(resp.get_data()), self.script)
+        plain = self.bundle.response(name, {"Accept-Encoding": "gzip;q=0"})
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertEqual(plain.get_data(), self.script)
+        self.assertNotEqual(plain.headers["ETag"], resp.headers["ETag"])
+
+        cached = self.bundle.response(name, {"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.get_data(), b"")
+        self.assertIsNone(self.bundle.response("static/missing.js", {}))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("br;q=0.5, GZIP, identity;q=0"), ["br", "gzip"])
+        self.assertEqual(accepted_encodings(""), [])
+
+
+class TestServeAssets(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+
+    def test_home(self):
+        resp = self.client.get("/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"RollenBollen", resp.get_data())
+        self.assertEqual(resp.headers["Cache-Control"], REVALIDATE)
+        again = self.client.get("/", headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_static(self):
+        resp = self.client.get("/static/css/main.536cdfcb.chunk.css")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.headers["Cache-Control"], IMMUTABLE)
+        resp = self.client.get("/static/board/jsboard.js", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers["Content-Encoding"], "gzip")
+        with open("./static/board/jsboard.js", "rb") as f:
+            self.assertEqual(gzip.decompress(resp.get_data()), f.read())
+        self.assertEqual(self.client.get("/static/missing.js").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
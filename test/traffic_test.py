@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+
+import application
+from application import app
+from load_generator import FlaskClient
+from traffic import compare, read_log, replay
+
+
+class TestTraffic(unittest.TestCase):
+    def setUp(self) -> None:
+        app.testing = True
+        self.client = app.test_client()
+        self.API = "/api"
+        self.client.get(f"{self.API}/reset")
+        handle, self.log = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+        app.config["TRAFFIC_LOG"] = self.log
+
+    def tearDown(self) -> None:
+        app.config["TRAFFIC_LOG"] = None
+        application.recorder.close()
+        application.recorder = None
+        os.remove(self.log)
+        self.client.get(f"{self.API}/reset")
+
+    def record_session(self):
+        self.client.get(f"{self.API}/reset")
+        self.client.get(f"{self.API}/register")
+        self.client.get(f"{self.API}/bolt/1/goto?x=2&y=0")
+        self.client.post(f"{self.API}/goto", json={"moves": [{"bolt": 1, "x": 0, "y": 3}]})
+        self.client.get(f"{self.API}/maze?x=9&y=3&v=0")
+        self.client.get("/")
+        app.config["TRAFFIC_LOG"] = None
+
+    def test_record(self):
+        self.record_session()
+        entries = list(read_log(self.log))
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(entries[1]["p"], "/api/register")
+        self.assertEqual(entries[2]["p"], "/api/bolt/1/goto?x=2&y=0")
+        self.assertEqual((entries[3]["m"], entries[3]["b"]["moves"][0]["y"]), ("POST", 3))
+        self.assertNotIn("b", entries[2])
+        for entry in entries:
+            self.assertEqual(entry["s"], 200)
+            self.assertEqual(entry["v"], application.maze_layout.version)
+            self.assertGreater(entry["ms"], 0)
+        self.assertEqual(entries, sorted(entries, key=lambda entry: entry["t"]))
+
+    def test_replay(self):
+        self.record_session()
+        entries = list(read_log(self.log))
+        results = replay(entries, FlaskClient(app), speed=1000.0)
+        self.assertEqual([result["s"] for result in results], [200] * 5)
+        report = compare(entries, results)
+        self.assertEqual(report["/api/bolt/<code>/goto"]["count"], 1)
+        self.assertEqual(sum(row["mismatches"] for row in report.values()), 0)
+        results[2]["s"] = 500
+        self.assertEqual(compare(entries, results)["/api/bolt/<code>/goto"]["mismatches"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from application import find_path, optimize_path
+from maze_maker import Maze
+from travel_time import State, min_turns, route_time, travel_time_search
+from util import Location
+
+
+class TestTravelTime(unittest.TestCase):
+    def setUp(self) -> None:
+        self.layout = [[0] * 5 for _ in range(5)]
+
+    def test_min_turns(self):
+        finish = Location(4, 4)
+        self.assertEqual(min_turns(State(Location(0, 0), -1), finish), 1)
+        self.assertEqual(min_turns(State(Location(0, 0), 3), finish), 1)
+        self.assertEqual(min_turns(State(Location(0, 0), 0), finish), 2)
+        self.assertEqual(min_turns(State(Location(4, 0), 2), finish), 0)
+        self.assertEqual(min_turns(State(Location(4, 0), 0), finish), 1)
+        self.assertEqual(min_turns(State(finish, 0), finish), 0)
+
+    def test_route_time(self):
+        path = [Location(0, 0), Location(0, 1), Location(1, 1), Location(1, 2)]
+        self.assertEqual(route_time(path, self.layout, turn_penalty=2), 3 + 2 * 2)
+        self.layout[1][1] = 3
+        self.assertEqual(route_time(path, self.layout, turn_penalty=0), 5)
+
+    def test_fewer_turns(self):
+        m = Maze(factory=self.layout, start=Location(0, 0), finish=Location(4, 4))
+        path = [m.start] + travel_time_search(m, turn_penalty=2) + [m.finish]
+        self.assertEqual(len(path), 9)
+        self.assertEqual(len(optimize_path(path)), 2)
+
+    def test_cell_costs(self):
+        layout = [[0, 0, 0], [0, 9, 0], [0, 0, 0]]
+        m = Maze(factory=layout, start=Location(1, 0), finish=Location(1, 2))
+        path = travel_time_search(m, turn_penalty=1)
+        self.assertNotIn(Location(1, 1), path)
+        self.assertEqual(len(path), 3)
+
+    def test_no_solution(self):
+        layout = [[0, 1, 0]]
+        m = Maze(factory=layout, start=Location(0, 0), finish=Location(0, 2))
+        self.assertIsNone(travel_time_search(m))
+
+    def test_find_path_engine(self):
+        result = find_path(0, 0, 4, 4, layout=self.layout, engine="travel_time")
+        self.assertEqual(result[0], Location(0, 0))
+        self.assertEqual(result[-1], Location(4, 4))
+        self.assertEqual(len(result), 9)
+        self.assertEqual(len(optimize_path(result)), 2)
@@ -0,0 +1,177 @@
+"""Record the API traffic of a server and replay it against a build."""
+import argparse
+import json
+from collections import defaultdict
+from threading import Lock
+from time import perf_counter, sleep, time
+from typing import Any, Dict, Iterator, List, Optional
+
+from load_generator import FlaskClient, HttpClient, endpoint_name, percentile
+
+
+class TrafficRecorder:
+    """Append every request to a JSON lines log.
+
+    Every line has the seconds since the recording started "t", the method
+    "m", the path with query "p", the JSON body "b" if any, the status "s",
+    the latency in milliseconds "ms" and the layout version after the request
+    "v".
+    """
+
+    def __init__(self, path: str) -> None:
+        """Start a recording, appended to the log at <path>."""
+        self.path = path
+        self.start = time()
+        self.lock = Lock()
+        self.file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        body: Any,
+        status: int,
+        latency: float,
+        version: int,
+    ):
+        """Log a single request, <latency> is in seconds."""
+        entry = {"t": round(time() - self.start - latency, 6), "m": method, "p": path}
+        if body is not None:
+            entry["b"] = body
+        entry.update(s=status, ms=round(latency * 1000, 3), v=version)
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        """Stop the recording."""
+        with self.lock:
+            self.file.close()
+
+
+def read_log(path: str) -> Iterator[Dict[str, Any]]:
+    """Read the entries of a recorded log, in the recorded order."""
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay(
+    entries: List[Dict[str, Any]],
+    client,
+    speed: Optional[float] = None,
+    reset: bool = True,
+):
+    """Send the recorded <entries> again, one by one in the recorded order.
+
+    Parameters
+    ----------
+    entries : List[Dict[str, Any]]
+        The entries of the log
+    client : FlaskClient | HttpClient
+        The client to send the requests with
+    speed : float
+        1.0 keeps the recorded pace and 10.0 is ten times faster, None sends
+        every request as soon as the previous one answered
+    reset : bool
+        Reset the server first, so ids are given out like in the recording
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        Per entry the replayed status, latency in ms and layout version
+    """
+    if reset:
+        client.get("/api/reset")
+    results = []
+    start = perf_counter()
+    first = entries[0]["t"] if entries else 0.0
+    for entry in entries:
+        if speed:
+            delay = (entry["t"] - first) / speed - (perf_counter() - start)
+            if delay > 0:
+                sleep(delay)
+        sent = perf_counter()
+        status, _, headers = client.request(entry["m"], entry["p"], entry.get("b"))
+        latency = perf_counter() - sent
+        version = headers.get("X-Layout-Version")
+        results.append(
+            {
+                "s": status,
+                "ms": latency * 1000,
+                "v": int(version) if version is not None else None,
+            }
+        )
+    return results
+
+
+def compare(entries: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+    """Compare the recorded latencies with the replayed ones, per endpoint.
+
+    Returns
+    -------
+    Dict[str, Dict[str, float]]
+        Per endpoint the count, the recorded and replayed p50 and p95 in ms,
+        the change of the p50 in percent and the requests whose status or
+        layout version differs from the recording
+    """
+    recorded: Dict[str, List[float]] = defaultdict(list)
+    replayed: Dict[str, List[float]] = defaultdict(list)
+    mismatches: Dict[str, int] = defaultdict(int)
+    for entry, result in zip(entries, results):
+        endpoint = endpoint_name(entry["p"])
+        recorded[endpoint].append(entry["ms"])
+        replayed[endpoint].append(result["ms"])
+        # Only the responses of the maze have the layout version
+        version_differs = result["v"] is not None and entry["v"] != result["v"]
+        if entry["s"] != result["s"] or version_differs:
+            mismatches[endpoint] += 1
+    report = {}
+    for endpoint in sorted(recorded):
+        before = percentile(recorded[endpoint], 50)
+        after = percentile(replayed[endpoint], 50)
+        report[endpoint] = {
+            "count": len(recorded[endpoint]),
+            "recorded_p50": before,
+            "replayed_p50": after,
+            "recorded_p95": percentile(recorded[endpoint], 95),
+            "replayed_p95": percentile(replayed[endpoint], 95),
+            "change": (after - before) / before * 100 if before > 0 else 0.0,
+            "mismatches": mismatches[endpoint],
+        }
+    return report
+
+
+def print_comparison(report: Dict[str, Dict[str, float]]):
+    """Print the comparison as a table."""
+    print(
+        f"{'endpoint':<28}{'count':>7}{'p50 rec':>10}{'p50 now':>10}"
+        f"{'p95 rec':>10}{'p95 now':>10}{'change':>9}{'differ':>8}"
+    )
+    for endpoint, row in report.items():
+        print(
+            f"{endpoint:<28}{row['count']:>7}{row['recorded_p50']:>10.2f}"
+            f"{row['replayed_p50']:>10.2f}{row['recorded_p95']:>10.2f}"
+            f"{row['replayed_p95']:>10.2f}{row['change']:>8.1f}%{row['mismatches']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("log", help="A log recorded with the TRAFFIC_LOG config")
+    parser.add_argument("--url", help="Server to replay against, uses the test client if empty")
+    parser.add_argument(
+        "--speed", type=float, help="1 for the recorded pace, 10 for ten times faster"
+    )
+    parser.add_argument("--keep-state", action="store_true", help="Do not reset the server first")
+    args = parser.parse_args()
+
+    log = list(read_log(args.log))
+    replayed_log = replay(
+        log,
+        HttpClient(args.url) if args.url else FlaskClient(),
+        speed=args.speed,
+        reset=not args.keep_state,
+    )
+    print_comparison(compare(log, replayed_log))
@@ -0,0 +1,105 @@
+"""Routing that minimises the travel time instead of the amount of cells.
+
+A BOLT drives straight segments between the corners of its path, so every
+turn costs a stop and a new roll command. The search state is a cell plus
+the heading the bolt arrived with, so turns can be charged. Cells in the
+layout with a value of 2 or more take that many time units to cross.
+"""
+from typing import Dict, List, NamedTuple, Optional
+
+from maze_maker import Maze
+from maze_search import astar
+from util import Location
+
+NO_HEADING = -1
+
+
+class State(NamedTuple):
+    """A cell and the direction the bolt drove to get there."""
+
+    loc: Location
+    heading: int
+
+
+def step_heading(a: Location, b: Location):
+    """The direction of a step, in the order of Maze.frontier."""
+    if b.x < a.x:
+        return 0
+    if b.y < a.y:
+        return 1
+    if b.y > a.y:
+        return 2
+    return 3
+
+
+def cell_cost(factory: List[List[int]], loc: Location):
+    """The time to cross a cell, free cells cost 1."""
+    value = factory[loc.x][loc.y]
+    return value if value >= 2 else 1
+
+
+def min_turns(state: State, finish: Location):
+    """The least amount of turns needed to get from <state> to <finish>."""
+    needed = set()
+    if finish.x != state.loc.x:
+        needed.add(0 if finish.x < state.loc.x else 3)
+    if finish.y != state.loc.y:
+        needed.add(1 if finish.y < state.loc.y else 2)
+    if not needed:
+        return 0
+    if state.heading == NO_HEADING or state.heading in needed:
+        return len(needed) - 1
+    return len(needed)
+
+
+def travel_time_search(
+    m: Maze, turn_penalty: float = 2.0, stats: Optional[Dict[str, int]] = None
+):
+    """Find the fastest path through maze <m> with A* over cells and headings.
+
+    Parameters
+    ----------
+    m : Maze
+        The maze with the start and finish
+    turn_penalty : float
+        The time a change of direction costs, next to crossing the cell
+
+    Returns
+    -------
+    List[Location]
+        The path between the start and the finish, both excluded, like astar
+    """
+    finish = m.finish
+
+    def next_moves(state: State):
+        return [State(loc, step_heading(state.loc, loc)) for loc in m.frontier(state.loc)]
+
+    def finish_line(state: State):
+        return m.finish_line(state.loc)
+
+    def heuristic(state: State):
+        distance = abs(state.loc.x - finish.x) + abs(state.loc.y - finish.y)
+        return distance + turn_penalty * min_turns(state, finish)
+
+    def cost(state: State, space: State):
+        turned = state.heading not in (NO_HEADING, space.heading)
+        return cell_cost(m.factory, space.loc) + (turn_penalty if turned else 0)
+
+    result = astar(State(m.start, NO_HEADING), finish_line, next_moves, heuristic, stats, cost)
+    if result is None:
+        return None
+    path, _ = result
+    return [state.loc for state in path]
+
+
+def route_time(path: List[Location], factory: List[List[int]], turn_penalty: float = 2.0):
+    """The travel time of a full path, the start included."""
+    total = 0.0
+    heading = NO_HEADING
+    for a, b in zip(path, path[1:]):
+        new_heading = step_heading(a, b)
+        if heading not in (NO_HEADING, new_heading):
+            total += turn_penalty
+        total += cell_cost(factory, b)
+        heading = new_heading
+    return total